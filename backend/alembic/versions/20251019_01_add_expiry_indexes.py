@@ -0,0 +1,19 @@
+from alembic import op
+
+revision = "20251019_add_expiry_indexes"
+down_revision = "20250916_add_user_flags_post_fts"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index("ix_files_expires_at", "files", ["expires_at"], if_not_exists=True)
+    op.create_index(
+        "ix_share_links_active_expires_at",
+        "share_links",
+        ["is_active", "expires_at"],
+        if_not_exists=True,
+    )
+
+def downgrade() -> None:
+    op.drop_index("ix_share_links_active_expires_at", table_name="share_links", if_exists=True)
+    op.drop_index("ix_files_expires_at", table_name="files", if_exists=True)
@@ -0,0 +1,20 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_job_leases"
+down_revision = "20251019_add_expiry_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "job_leases",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("holder", sa.String(length=128), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("acquired_at", sa.DateTime(), nullable=True),
+        sa.Column("renewed_at", sa.DateTime(), nullable=True),
+    )
+
+def downgrade() -> None:
+    op.drop_table("job_leases")
@@ -0,0 +1,20 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_reconcile_support"
+down_revision = "20251019_add_job_leases"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index("ix_files_object_name", "files", ["object_name"], if_not_exists=True)
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("cursor", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
+    op.drop_index("ix_files_object_name", table_name="files", if_exists=True)
@@ -0,0 +1,24 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_expiry_notified_at"
+down_revision = "20251019_add_reconcile_support"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    for table in ("files", "share_links"):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("expiry_notified_at", sa.DateTime(), nullable=True))
+        op.create_index(
+            f"ix_{table}_notified_expires_at",
+            table,
+            ["expiry_notified_at", "expires_at"],
+            if_not_exists=True,
+        )
+
+def downgrade() -> None:
+    for table in ("share_links", "files"):
+        op.drop_index(f"ix_{table}_notified_expires_at", table_name=table, if_exists=True)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("expiry_notified_at")
@@ -0,0 +1,15 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_storage_expires_on"
+down_revision = "20251019_add_expiry_notified_at"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    with op.batch_alter_table("files") as batch:
+        batch.add_column(sa.Column("storage_expires_on", sa.Date(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table("files") as batch:
+        batch.drop_column("storage_expires_on")
@@ -0,0 +1,35 @@
+from alembic import op
+
+revision = "20251019_store_web_page_fts_content"
+down_revision = "20251019_add_encryption_header"
+branch_labels = None
+depends_on = None
+
+# snippet()/highlight() need the indexed text, and a contentless table also rejects
+# the per-page DELETE done on re-index. A contentless table cannot give its text back,
+# so pages are re-indexed rather than copied.
+
+def upgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS web_page_fts;")
+    op.execute("""
+        CREATE VIRTUAL TABLE web_page_fts
+        USING fts5(
+            page_id UNINDEXED,
+            title,
+            body,
+            safe_html
+        );
+    """)
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS web_page_fts;")
+    op.execute("""
+        CREATE VIRTUAL TABLE web_page_fts
+        USING fts5(
+            page_id UNINDEXED,
+            title,
+            body,
+            safe_html,
+            content=''
+        );
+    """)
@@ -0,0 +1,106 @@
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_split_web_page_html"
+down_revision = "20251019_store_web_page_fts_content"
+branch_labels = None
+depends_on = None
+
+# Sanitized HTML moves to web_page_html (zlib); web_page_fts becomes an external-content
+# index over web_page_text(title, body), kept in step by triggers.
+
+FTS = """
+    CREATE VIRTUAL TABLE web_page_fts
+    USING fts5(
+        title,
+        body,
+        content='web_page_text',
+        content_rowid='id'
+    );
+"""
+TRIGGERS = [
+    """
+    CREATE TRIGGER web_page_text_ai AFTER INSERT ON web_page_text BEGIN
+        INSERT INTO web_page_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_page_text_ad AFTER DELETE ON web_page_text BEGIN
+        INSERT INTO web_page_fts(web_page_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_page_text_au AFTER UPDATE OF title, body ON web_page_text BEGIN
+        INSERT INTO web_page_fts(web_page_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO web_page_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_pages_ad AFTER DELETE ON web_pages BEGIN
+        DELETE FROM web_page_text WHERE page_id = old.id;
+        DELETE FROM web_page_html WHERE page_id = old.id;
+    END;
+    """,
+]
+
+def upgrade() -> None:
+    op.create_table(
+        "web_page_text",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("page_id", sa.String(length=36), sa.ForeignKey("web_pages.id"), nullable=False, unique=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("body", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "web_page_html",
+        sa.Column("page_id", sa.String(length=36), sa.ForeignKey("web_pages.id"), primary_key=True),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        INSERT INTO web_page_text(page_id, title, body)
+        SELECT page_id, title, body FROM web_page_fts WHERE page_id IN (SELECT id FROM web_pages)
+    """))
+    rows = conn.execute(sa.text(
+        "SELECT page_id, safe_html FROM web_page_fts WHERE page_id IN (SELECT id FROM web_pages)"
+    )).all()
+    for page_id, safe_html in rows:
+        conn.execute(
+            sa.text("INSERT OR REPLACE INTO web_page_html(page_id, data) VALUES (:pid, :data)"),
+            {"pid": page_id, "data": zlib.compress((safe_html or "").encode("utf-8"))},
+        )
+
+    op.execute("DROP TABLE web_page_fts;")
+    op.execute(FTS)
+    op.execute("INSERT INTO web_page_fts(web_page_fts) VALUES ('rebuild');")
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+def downgrade() -> None:
+    for name in ("web_pages_ad", "web_page_text_au", "web_page_text_ad", "web_page_text_ai"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name};")
+    op.execute("DROP TABLE web_page_fts;")
+    op.execute("""
+        CREATE VIRTUAL TABLE web_page_fts
+        USING fts5(
+            page_id UNINDEXED,
+            title,
+            body,
+            safe_html
+        );
+    """)
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("""
+        SELECT t.page_id, t.title, t.body, h.data
+        FROM web_page_text t LEFT JOIN web_page_html h ON h.page_id = t.page_id
+    """)).all()
+    for page_id, title, body, data in rows:
+        conn.execute(
+            sa.text("INSERT INTO web_page_fts(page_id, title, body, safe_html) VALUES (:pid, :title, :body, :html)"),
+            {"pid": page_id, "title": title, "body": body, "html": zlib.decompress(data).decode("utf-8") if data else ""},
+        )
+    op.drop_table("web_page_html")
+    op.drop_table("web_page_text")
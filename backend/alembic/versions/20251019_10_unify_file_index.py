@@ -0,0 +1,130 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_unify_file_index"
+down_revision = "20251019_split_web_page_html"
+branch_labels = None
+depends_on = None
+
+# One index for every file kind: file_text(title, body) per file, with file_fts as its
+# external-content FTS5 index. web_page_text/web_page_fts fold into it; web_page_html stays.
+
+FTS = """
+    CREATE VIRTUAL TABLE file_fts
+    USING fts5(
+        title,
+        body,
+        content='file_text',
+        content_rowid='id'
+    );
+"""
+TRIGGERS = [
+    """
+    CREATE TRIGGER file_text_ai AFTER INSERT ON file_text BEGIN
+        INSERT INTO file_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER file_text_ad AFTER DELETE ON file_text BEGIN
+        INSERT INTO file_fts(file_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER file_text_au AFTER UPDATE OF title, body ON file_text BEGIN
+        INSERT INTO file_fts(file_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO file_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER files_ad AFTER DELETE ON files BEGIN
+        DELETE FROM file_text WHERE file_id = old.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER web_pages_ad AFTER DELETE ON web_pages BEGIN
+        DELETE FROM web_page_html WHERE page_id = old.id;
+    END;
+    """,
+]
+
+OLD_TRIGGERS = [
+    """
+    CREATE TRIGGER web_page_text_ai AFTER INSERT ON web_page_text BEGIN
+        INSERT INTO web_page_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_page_text_ad AFTER DELETE ON web_page_text BEGIN
+        INSERT INTO web_page_fts(web_page_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_page_text_au AFTER UPDATE OF title, body ON web_page_text BEGIN
+        INSERT INTO web_page_fts(web_page_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO web_page_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END;
+    """,
+    """
+    CREATE TRIGGER web_pages_ad AFTER DELETE ON web_pages BEGIN
+        DELETE FROM web_page_text WHERE page_id = old.id;
+        DELETE FROM web_page_html WHERE page_id = old.id;
+    END;
+    """,
+]
+
+def upgrade() -> None:
+    op.create_table(
+        "file_text",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(length=36), sa.ForeignKey("files.id"), nullable=False, unique=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("body", sa.Text(), nullable=True),
+    )
+    op.execute("""
+        INSERT OR IGNORE INTO file_text(file_id, title, body)
+        SELECT wp.file_id, t.title, t.body
+        FROM web_page_text t JOIN web_pages wp ON wp.id = t.page_id
+        WHERE wp.file_id IN (SELECT id FROM files)
+    """)
+
+    for name in ("web_pages_ad", "web_page_text_au", "web_page_text_ad", "web_page_text_ai"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name};")
+    op.execute("DROP TABLE web_page_fts;")
+    op.drop_table("web_page_text")
+
+    op.execute(FTS)
+    op.execute("INSERT INTO file_fts(file_fts) VALUES ('rebuild');")
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+def downgrade() -> None:
+    for name in ("web_pages_ad", "files_ad", "file_text_au", "file_text_ad", "file_text_ai"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name};")
+    op.execute("DROP TABLE file_fts;")
+
+    op.create_table(
+        "web_page_text",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("page_id", sa.String(length=36), sa.ForeignKey("web_pages.id"), nullable=False, unique=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("body", sa.Text(), nullable=True),
+    )
+    # Only pages are kept; text of other file kinds is dropped with file_text.
+    op.execute("""
+        INSERT OR IGNORE INTO web_page_text(page_id, title, body)
+        SELECT wp.id, t.title, t.body
+        FROM file_text t JOIN web_pages wp ON wp.file_id = t.file_id
+    """)
+    op.drop_table("file_text")
+    op.execute("""
+        CREATE VIRTUAL TABLE web_page_fts
+        USING fts5(
+            title,
+            body,
+            content='web_page_text',
+            content_rowid='id'
+        );
+    """)
+    op.execute("INSERT INTO web_page_fts(web_page_fts) VALUES ('rebuild');")
+    for trigger in OLD_TRIGGERS:
+        op.execute(trigger)
@@ -0,0 +1,19 @@
+from alembic import op
+
+revision = "20251019_add_export_indexes"
+down_revision = "20251019_unify_file_index"
+branch_labels = None
+depends_on = None
+
+# The inventory export walks a user's files by (owner_id, id) and looks up their links by file_id;
+# /files lists them by (owner_id, created_at).
+
+def upgrade() -> None:
+    op.create_index("ix_files_owner_id_id", "files", ["owner_id", "id"], if_not_exists=True)
+    op.create_index("ix_files_owner_id_created_at", "files", ["owner_id", "created_at"], if_not_exists=True)
+    op.create_index("ix_share_links_file_id", "share_links", ["file_id"], if_not_exists=True)
+
+def downgrade() -> None:
+    op.drop_index("ix_share_links_file_id", table_name="share_links", if_exists=True)
+    op.drop_index("ix_files_owner_id_created_at", table_name="files", if_exists=True)
+    op.drop_index("ix_files_owner_id_id", table_name="files", if_exists=True)
@@ -0,0 +1,30 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_bulk_delete_jobs"
+down_revision = "20251019_add_export_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "bulk_delete_jobs",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("owner_id", sa.String(length=36), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "bulk_delete_items",
+        sa.Column("job_id", sa.String(length=36), sa.ForeignKey("bulk_delete_jobs.id"), primary_key=True),
+        sa.Column("file_id", sa.String(length=36), primary_key=True),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("object_name", sa.String(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+    )
+
+def downgrade() -> None:
+    op.drop_table("bulk_delete_items")
+    op.drop_table("bulk_delete_jobs")
@@ -0,0 +1,15 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251019_add_web_page_updated_at"
+down_revision = "20251019_add_bulk_delete_jobs"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    with op.batch_alter_table("web_pages") as batch:
+        batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table("web_pages") as batch:
+        batch.drop_column("updated_at")
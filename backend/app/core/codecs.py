@@ -0,0 +1,142 @@
+"""
+Compression at rest for compressible uploads.
+
+``STORAGE_COMPRESSION`` picks the codec (``off``, ``gzip`` or ``zstd``). Objects are
+compressed while the upload is spooled, the codec is recorded on ``File.content_encoding``
+and downloads either pass the stored bytes through with ``Content-Encoding`` or
+decompress them as a stream. zstd needs the optional ``zstandard`` package; without it
+gzip is used.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import zlib
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger("secure-share")
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+GZIP_LEVEL = int(os.getenv("STORAGE_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("STORAGE_ZSTD_LEVEL", "3"))
+
+_zstd_warned = False
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".txt", ".md", ".csv", ".log", ".json", ".xml", ".yaml", ".yml", ".sql",
+    ".html", ".htm", ".css", ".js", ".ts", ".py", ".java", ".c", ".cpp", ".h",
+    ".cs", ".go", ".rb", ".swift", ".kt", ".php", ".sh", ".bat", ".ps1", ".svg", ".rtf",
+}
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/xml", "application/javascript",
+    "application/sql", "application/x-ndjson", "image/svg+xml",
+)
+
+
+def storage_codec(filename: str | None, content_type: str | None) -> str | None:
+    """Codec to store this upload with, or None to store it as is."""
+    mode = settings.STORAGE_COMPRESSION
+    if mode not in (GZIP, ZSTD):
+        return None
+    ext = Path(filename or "").suffix.lower()
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ext not in COMPRESSIBLE_EXTENSIONS and not ctype.startswith(COMPRESSIBLE_TYPES):
+        return None
+    if mode == ZSTD and zstandard is None:
+        global _zstd_warned
+        if not _zstd_warned:
+            logger.warning("STORAGE_COMPRESSION=zstd but zstandard is not installed; using gzip")
+            _zstd_warned = True
+        return GZIP
+    return mode
+
+
+def compressor(codec: str):
+    """Streaming compressor with ``compress(data)`` and ``flush()``."""
+    if codec == GZIP:
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def _decompressor(codec: str):
+    if codec == GZIP:
+        return zlib.decompressobj(31)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-encoded objects")
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+async def decompress_stream(codec: str, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    d = _decompressor(codec)
+    try:
+        async for chunk in body:
+            out = await run_in_threadpool(d.decompress, chunk)
+            if out:
+                yield out
+        if codec == GZIP:
+            tail = d.flush()
+            if tail:
+                yield tail
+    finally:
+        aclose = getattr(body, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def slice_stream(body: AsyncIterator[bytes], offset: int, length: int | None) -> AsyncIterator[bytes]:
+    """Bytes ``offset`` .. ``offset + length`` of a stream, read from its start."""
+    pos = 0
+    end = None if length is None else offset + length
+    try:
+        async for chunk in body:
+            start, pos = pos, pos + len(chunk)
+            if pos <= offset:
+                continue
+            piece = chunk[max(0, offset - start):len(chunk) if end is None else max(0, end - start)]
+            if piece:
+                yield piece
+            if end is not None and pos >= end:
+                break
+    finally:
+        aclose = getattr(body, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def accepts_encoding(accept_encoding: str | None, codec: str) -> bool:
+    """Whether an ``Accept-Encoding`` header allows ``codec`` (q-values honoured)."""
+    if not accept_encoding:
+        return False
+    wildcard = None
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        for p in params.split(";"):
+            name, _, value = p.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        token = token.strip().lower()
+        if token == codec:
+            return q > 0
+        if token == "*":
+            wildcard = q > 0
+    return bool(wildcard)
@@ -9,7 +9,25 @@ class Settings:
     MINIO_ACCESS_KEY: str = "minioadmin"
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "secureshare"
+    MINIO_REGION: str = os.getenv("MINIO_REGION", "us-east-1")
+    # "minio" (SDK in the threadpool), "s3" (native asyncio client against the same server)
+    # or "local" (files under STORAGE_LOCAL_ROOT, single-node deployments and tests)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "minio")
+    STORAGE_LOCAL_ROOT: str = os.getenv("STORAGE_LOCAL_ROOT", "./storage")
+    # Storage connection pool size and admission limit; keep it below the threadpool
+    # size (40) because the minio SDK runs there.
+    STORAGE_MAX_CONCURRENCY: int = int(os.getenv("STORAGE_MAX_CONCURRENCY", "32"))
+    # Open download streams, limited separately so long downloads never queue short
+    # calls; matches uvicorn's limit_concurrency, which caps downloads anyway.
+    STORAGE_MAX_STREAMS: int = int(os.getenv("STORAGE_MAX_STREAMS", "100"))
+    STORAGE_CONNECT_TIMEOUT_SECS: float = float(os.getenv("STORAGE_CONNECT_TIMEOUT_SECS", "3"))
+    STORAGE_READ_TIMEOUT_SECS: float = float(os.getenv("STORAGE_READ_TIMEOUT_SECS", "30"))
     MAX_FILE_SIZE: int = 1024 * 1024 * 1024  
+    # "app": cleanup deletes expired objects; "lifecycle": bucket ILM rules do it
+    STORAGE_EXPIRY_MODE: str = os.getenv("STORAGE_EXPIRY_MODE", "app")
+    # "off", "gzip" or "zstd": compress compressible uploads at rest
+    STORAGE_COMPRESSION: str = os.getenv("STORAGE_COMPRESSION", "off")
+    STORAGE_ENCRYPTION_KEY: str = os.getenv("STORAGE_ENCRYPTION_KEY", "")
     PUBLIC_BASE_URL: str = "https://stylus-consistency-arise-sub.trycloudflare.com"
     ALLOWED_EXTENSIONS: set = {
             ".pdf", ".doc", ".docx", ".odt", ".rtf", ".txt", ".md",
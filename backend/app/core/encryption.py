@@ -0,0 +1,161 @@
+"""
+Envelope encryption at rest with fixed-size AEAD segments.
+
+Every file gets its own random AES-256-GCM data key, stored wrapped by the master key
+(``STORAGE_ENCRYPTION_KEY``, base64 of 32 bytes) in ``File.encryption_header``. The
+object is the plaintext cut into ``SEGMENT_SIZE`` segments, each sealed on its own:
+
+    segment k = AES-GCM(data key, nonce = prefix(8) || k(4), aad = final flag)
+
+All segments but the last are full, so any plaintext byte range maps to a known
+run of stored segments and can be decrypted without touching the rest of the object.
+The final flag in the AAD makes a truncated object fail to decrypt instead of
+silently coming back short.
+"""
+from __future__ import annotations
+
+import base64
+import os
+import struct
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .config import settings
+
+VERSION = "v1"
+SEGMENT_SIZE = 64 * 1024
+TAG_SIZE = 16
+_WRAP_AAD = b"secureshare-file-key"
+_LAST = b"\x01"
+_MORE = b"\x00"
+
+
+def encryption_enabled() -> bool:
+    return bool(settings.STORAGE_ENCRYPTION_KEY)
+
+
+def _master() -> AESGCM:
+    if not settings.STORAGE_ENCRYPTION_KEY:
+        raise RuntimeError("STORAGE_ENCRYPTION_KEY is required to read encrypted objects")
+    key = base64.b64decode(settings.STORAGE_ENCRYPTION_KEY)
+    if len(key) != 32:
+        raise RuntimeError("STORAGE_ENCRYPTION_KEY must be 32 bytes, base64-encoded")
+    return AESGCM(key)
+
+
+@dataclass(frozen=True)
+class FileKey:
+    aead: AESGCM
+    prefix: bytes
+    segment_size: int
+
+    @classmethod
+    def new(cls) -> tuple[FileKey, str]:
+        """A fresh data key and the header that stores it wrapped by the master key."""
+        dek = AESGCM.generate_key(bit_length=256)
+        prefix = os.urandom(8)
+        wrap_nonce = os.urandom(12)
+        wrapped = _master().encrypt(wrap_nonce, dek, _WRAP_AAD)
+        header = ".".join([
+            VERSION,
+            str(SEGMENT_SIZE),
+            base64.urlsafe_b64encode(prefix).decode(),
+            base64.urlsafe_b64encode(wrap_nonce + wrapped).decode(),
+        ])
+        return cls(AESGCM(dek), prefix, SEGMENT_SIZE), header
+
+    @classmethod
+    def from_header(cls, header: str) -> FileKey:
+        version, segment_size, prefix, wrapped = header.split(".")
+        if version != VERSION:
+            raise ValueError(f"Unsupported encryption header version {version!r}")
+        raw = base64.urlsafe_b64decode(wrapped)
+        dek = _master().decrypt(raw[:12], raw[12:], _WRAP_AAD)
+        return cls(AESGCM(dek), base64.urlsafe_b64decode(prefix), int(segment_size))
+
+    @property
+    def stored_segment_size(self) -> int:
+        return self.segment_size + TAG_SIZE
+
+    def _nonce(self, index: int) -> bytes:
+        return self.prefix + struct.pack(">I", index)
+
+    def seal(self, index: int, data: bytes, last: bool) -> bytes:
+        return self.aead.encrypt(self._nonce(index), data, _LAST if last else _MORE)
+
+    def open(self, index: int, data: bytes, last: bool) -> bytes:
+        return self.aead.decrypt(self._nonce(index), data, _LAST if last else _MORE)
+
+    def segment_count(self, stored_size: int) -> int:
+        return max(1, -(-stored_size // self.stored_segment_size))
+
+    def plaintext_size(self, stored_size: int) -> int:
+        return stored_size - TAG_SIZE * self.segment_count(stored_size)
+
+    def stored_range(self, offset: int, length: int, stored_size: int) -> tuple[int, int, int, int]:
+        """
+        Segments covering plaintext ``offset``/``length``, as
+        ``(first_segment, segment_count, stored_offset, stored_length)``.
+        """
+        first = offset // self.segment_size
+        last = (offset + length - 1) // self.segment_size
+        start = first * self.stored_segment_size
+        end = min(stored_size, (last + 1) * self.stored_segment_size)
+        return first, last - first + 1, start, end - start
+
+
+class SegmentEncryptor:
+    """Turns a plaintext stream into sealed segments; the last one is emitted by ``finalize``."""
+
+    def __init__(self, key: FileKey) -> None:
+        self.key = key
+        self.index = 0
+        self.buf = bytearray()
+
+    def update(self, data: bytes) -> bytes:
+        self.buf += data
+        out = bytearray()
+        size = self.key.segment_size
+        # Keep at least one byte back: only finalize knows which segment is the last.
+        while len(self.buf) > size:
+            out += self.key.seal(self.index, bytes(self.buf[:size]), last=False)
+            del self.buf[:size]
+            self.index += 1
+        return bytes(out)
+
+    def finalize(self) -> bytes:
+        out = self.key.seal(self.index, bytes(self.buf), last=True)
+        self.buf.clear()
+        return out
+
+
+async def decrypt_stream(key: FileKey, body: AsyncIterator[bytes], first_segment: int, count: int,
+                         stored_size: int) -> AsyncIterator[bytes]:
+    """Decrypt ``count`` stored segments starting at ``first_segment``."""
+    total = key.segment_count(stored_size)
+    seg = key.stored_segment_size
+    index, end = first_segment, first_segment + count
+    buf = bytearray()
+    try:
+        async for chunk in body:
+            buf += chunk
+            out = bytearray()
+            # A full buffer may still hold the final segment; it is decided on at EOF.
+            while len(buf) >= seg and not (len(buf) == seg and index == total - 1):
+                out += key.open(index, bytes(buf[:seg]), last=index == total - 1)
+                del buf[:seg]
+                index += 1
+            if out:
+                yield bytes(out)
+        if buf:
+            yield key.open(index, bytes(buf), last=index == total - 1)
+            index += 1
+        if index != end:
+            raise ValueError("Encrypted object is truncated")
+    finally:
+        aclose = getattr(body, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
@@ -0,0 +1,186 @@
+"""
+On-the-fly compression of API and page responses.
+
+A pure ASGI middleware, so streamed bodies are compressed chunk by chunk rather than
+buffered. Only allowlisted text types (``HTTP_COMPRESSION_TYPES``) are touched, and
+only once they reach ``HTTP_COMPRESSION_MIN_BYTES``. Responses that already carry a
+``Content-Encoding`` (precompressed pages and assets, stored-gzip passthrough), file
+downloads (``Content-Disposition``), ranges and ``no-transform`` pass through as is.
+brotli is preferred when the optional ``brotli`` package is installed, else gzip.
+"""
+from __future__ import annotations
+
+import os
+import time
+import zlib
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.codecs import accepts_encoding
+from app.monitoring.setup import report_http_compression, report_http_compression_bypass
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+ENABLED = os.getenv("HTTP_COMPRESSION", "on") != "off"
+MIN_BYTES = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "4"))
+TYPES = tuple(
+    t.strip() for t in os.getenv(
+        "HTTP_COMPRESSION_TYPES",
+        "text/html,text/plain,text/css,text/csv,text/javascript,application/javascript,"
+        "application/json,application/x-ndjson,application/xml,image/svg+xml",
+    ).split(",") if t.strip()
+)
+# Chunks at least this large are compressed off the event loop.
+THREAD_BYTES = 256 * 1024
+
+
+class _Gzip:
+    encoding = "gzip"
+
+    def __init__(self) -> None:
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    encoding = "br"
+
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.finish()
+
+
+def _bypass_reason(headers: Headers, status: int) -> str | None:
+    if status < 200 or status in (204, 206, 304):
+        return "status"
+    if "content-encoding" in headers:
+        return "encoded"
+    if "content-disposition" in headers or "content-range" in headers:
+        return "download"
+    if "no-transform" in headers.get("cache-control", ""):
+        return "no_transform"
+    ctype = headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype not in TYPES:
+        return "type"
+    length = headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) < MIN_BYTES:
+        return "small"
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept-encoding")
+        if brotli is not None and accepts_encoding(accept, "br"):
+            factory = _Brotli
+        elif accepts_encoding(accept, "gzip"):
+            factory = _Gzip
+        else:
+            factory = None
+        await _Responder(self.app, factory)(scope, receive, send)
+
+
+class _Responder:
+    """Holds back ``http.response.start`` until the first body chunk shows whether to compress."""
+
+    def __init__(self, app: ASGIApp, factory) -> None:
+        self.app = app
+        self.factory = factory
+        self.send = None
+        self.start: Message | None = None
+        self.compressor = None
+        self.passthrough = False
+        self.bytes_in = self.bytes_out = 0
+        self.cpu = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.wrapped_send)
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        def work() -> bytes:
+            t0 = time.thread_time()
+            out = self.compressor.compress(data)
+            if final:
+                out += self.compressor.flush()
+            self.cpu += time.thread_time() - t0
+            return out
+
+        self.bytes_in += len(data)
+        out = await run_in_threadpool(work) if len(data) >= THREAD_BYTES else work()
+        self.bytes_out += len(out)
+        return out
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            reason = _bypass_reason(headers, message["status"])
+            if reason is None and self.factory is None:
+                reason = "not_accepted"
+            if reason is not None:
+                if reason not in ("type", "status", "encoded", "download"):
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                report_http_compression_bypass(reason)
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more and len(body) < MIN_BYTES:
+                headers.add_vary_header("Accept-Encoding")
+                report_http_compression_bypass("small")
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = self.factory()
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag  # the bytes differ from the identity representation
+            out = await self._compress(body, final=not more)
+            if more:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(out))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": out, "more_body": more})
+        else:
+            out = await self._compress(body, final=not more)
+            await self.send({"type": "http.response.body", "body": out, "more_body": more})
+        if not more:
+            report_http_compression(self.compressor.encoding, self.bytes_in, self.bytes_out, self.cpu)
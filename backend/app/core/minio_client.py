@@ -1,5 +1,7 @@
 import logging
 
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 
@@ -11,7 +13,22 @@ minio_client = Minio(
     settings.MINIO_ENDPOINT,
     access_key=settings.MINIO_ACCESS_KEY,
     secret_key=settings.MINIO_SECRET_KEY,
-    secure=False
+    secure=False,
+    # The SDK default is a 10-connection pool with 5 minute timeouts; size it to the
+    # storage admission limit and fail fast so a sick MinIO cannot pin request threads.
+    # Admission permits already bound the connections in use, so the pool never blocks:
+    # an out-of-band call (lifecycle rules, tags) just opens a connection it then discards.
+    http_client=urllib3.PoolManager(
+        maxsize=settings.STORAGE_MAX_CONCURRENCY + settings.STORAGE_MAX_STREAMS,
+        block=False,
+        timeout=urllib3.Timeout(
+            connect=settings.STORAGE_CONNECT_TIMEOUT_SECS,
+            read=settings.STORAGE_READ_TIMEOUT_SECS,
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=certifi.where(),
+        retries=urllib3.Retry(total=2, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    ),
 )
 
 def initialize_minio_bucket():
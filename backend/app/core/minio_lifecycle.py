@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone
+
+from minio.commonconfig import ENABLED, Filter, Tag, Tags
+from minio.lifecycleconfig import Expiration, LifecycleConfig, Rule
+
+from .config import settings
+from .minio_client import minio_client
+
+logger = logging.getLogger("secure-share")
+
+EXPIRY_TAG = "secureshare-expires-on"
+RULE_PREFIX = "secureshare-expire-"
+
+_rules_lock = threading.Lock()
+
+
+def lifecycle_enabled() -> bool:
+    return settings.STORAGE_EXPIRY_MODE == "lifecycle" and settings.STORAGE_BACKEND in ("minio", "s3")
+
+
+def storage_expiry_date(expires_at: datetime) -> date:
+    """
+    Day on which storage may drop an object that the DB expires at ``expires_at``.
+
+    Lifecycle rules fire at midnight UTC, so the date is rounded up: storage never
+    removes an object before its row has expired.
+    """
+    d = expires_at.date()
+    return d if expires_at.time() == time(0) else d + timedelta(days=1)
+
+
+def expiry_tags(on: date) -> dict[str, str]:
+    return {EXPIRY_TAG: on.isoformat()}
+
+
+def _rule(on: date) -> Rule:
+    return Rule(
+        ENABLED,
+        rule_filter=Filter(tag=Tag(EXPIRY_TAG, on.isoformat())),
+        rule_id=f"{RULE_PREFIX}{on.isoformat()}",
+        expiration=Expiration(date=datetime.combine(on, time(0), tzinfo=timezone.utc)),
+    )
+
+
+def ensure_expiry_rules(dates: Iterable[date]) -> None:
+    """
+    Make sure the bucket has one expiration rule per pending expiry date and none for
+    past days (blocking). Rules that are not ours are always preserved.
+
+    The bucket config is read, modified and written back with no cross-process lock,
+    so only the cleanup leader calls this (see ``sync_lifecycle_rules``); uploads and
+    re-tags just tag objects. Expiry dates are rounded up to a midnight at least a day
+    ahead, so a rule written on the next periodic sync is always in place in time.
+    """
+    wanted = set(dates)
+    with _rules_lock:
+        bucket = settings.MINIO_BUCKET
+        config = minio_client.get_bucket_lifecycle(bucket)
+        rules = list(config.rules) if config else []
+        ours = {r.rule_id: r for r in rules if (r.rule_id or "").startswith(RULE_PREFIX)}
+        others = [r for r in rules if r.rule_id not in ours]
+
+        today = datetime.utcnow().date()
+        keep = {rid: r for rid, r in ours.items() if date.fromisoformat(rid[len(RULE_PREFIX):]) >= today}
+        missing = [d for d in wanted if f"{RULE_PREFIX}{d.isoformat()}" not in keep]
+        for d in missing:
+            keep[f"{RULE_PREFIX}{d.isoformat()}"] = _rule(d)
+
+        if missing or len(keep) != len(ours):
+            minio_client.set_bucket_lifecycle(bucket, LifecycleConfig(others + list(keep.values())))
+            logger.info("Lifecycle rules updated: added=%s total=%s", len(missing), len(keep))
+
+
+def retag_expiry(bucket: str, object_name: str, on: date) -> None:
+    """
+    Move an object to another expiry date (blocking), e.g. after its file was extended.
+    The rule for ``on`` is added by the cleanup leader's next rule sync.
+    """
+    tags = Tags.new_object_tags()
+    tags.update(expiry_tags(on))
+    minio_client.set_object_tags(bucket, object_name, tags)
@@ -0,0 +1,279 @@
+"""
+Minimal asyncio S3 client (path-style, SigV4) for MinIO and other S3-compatible stores.
+
+Only the calls the app needs are implemented. Requests share one pooled
+``httpx.AsyncClient``, bodies stream in both directions and nothing is handed off
+to a thread for network I/O, unlike the blocking ``minio`` SDK.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlencode
+
+import anyio
+import httpx
+
+from .config import settings
+
+S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+CHUNK_SIZE = 1024 * 1024
+MAX_DELETE_KEYS = 1000  # S3's limit per DeleteObjects request
+
+S3_TIMEOUT_SECS = float(os.getenv("S3_TIMEOUT_SECS", "30"))
+
+
+class S3Error(Exception):
+    def __init__(self, status: int, code: str, message: str, resource: str = "") -> None:
+        super().__init__(f"S3 {status} {code}: {message} ({resource})")
+        self.status = status
+        self.code = code
+        self.message = message
+        self.resource = resource
+
+
+@dataclass
+class S3Object:
+    name: str
+    size: int
+    etag: str | None = None
+    content_type: str | None = None
+    last_modified: datetime | None = None
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _uri_encode(s: str, safe: str = "-_.~") -> str:
+    return quote(s, safe=safe)
+
+
+def _canonical_query(params: dict[str, str]) -> str:
+    return "&".join(
+        f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(params.items())
+    )
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 for the ``s3`` service."""
+
+    def __init__(self, access_key: str, secret_key: str, region: str) -> None:
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self._keys: dict[str, bytes] = {}
+
+    def _signing_key(self, day: str) -> bytes:
+        key = self._keys.get(day)
+        if key is None:
+            k = _hmac(f"AWS4{self.secret_key}".encode(), day)
+            k = _hmac(k, self.region)
+            k = _hmac(k, "s3")
+            key = _hmac(k, "aws4_request")
+            # One key per UTC day; keep the cache from growing across long uptimes.
+            self._keys = {day: key}
+        return key
+
+    def _signature(self, method: str, path: str, query: str, headers: dict[str, str],
+                   payload_hash: str, now: datetime) -> tuple[str, str, str]:
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        day = amz_date[:8]
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        names = sorted(headers)
+        canonical_headers = "".join(f"{n}:{' '.join(headers[n].split())}\n" for n in names)
+        signed_headers = ";".join(names)
+        canonical_request = "\n".join([
+            method, _uri_encode(path, safe="-_.~/"), query, canonical_headers, signed_headers, payload_hash,
+        ])
+        to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, scope, _sha256(canonical_request.encode())])
+        signature = hmac.new(self._signing_key(day), to_sign.encode(), hashlib.sha256).hexdigest()
+        return scope, signed_headers, signature
+
+    def sign(self, method: str, host: str, path: str, params: dict[str, str],
+             headers: dict[str, str], payload_hash: str, now: datetime | None = None) -> dict[str, str]:
+        """Return ``headers`` plus the ``Authorization``/``x-amz-*`` headers for the request."""
+        now = now or datetime.now(timezone.utc)
+        signed = {k.lower(): v for k, v in headers.items()}
+        signed["host"] = host
+        signed["x-amz-date"] = now.strftime("%Y%m%dT%H%M%SZ")
+        signed["x-amz-content-sha256"] = payload_hash
+        scope, signed_headers, signature = self._signature(
+            method, path, _canonical_query(params), signed, payload_hash, now
+        )
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return signed
+
+
+class AsyncS3Client:
+    def __init__(self, endpoint: str, access_key: str, secret_key: str,
+                 region: str = "us-east-1", secure: bool = False) -> None:
+        self.host = endpoint
+        self.base_url = f"{'https' if secure else 'http'}://{endpoint}"
+        self.signer = SigV4Signer(access_key, secret_key, region)
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop.
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=settings.STORAGE_MAX_CONCURRENCY + settings.STORAGE_MAX_STREAMS,
+                    max_keepalive_connections=settings.STORAGE_MAX_CONCURRENCY,
+                ),
+                timeout=httpx.Timeout(S3_TIMEOUT_SECS, connect=settings.STORAGE_CONNECT_TIMEOUT_SECS),
+                # Ranged reads and Content-Length must refer to the stored bytes.
+                headers={"accept-encoding": "identity"},
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @staticmethod
+    def _path(bucket: str, key: str | None = None) -> str:
+        return f"/{bucket}" if key is None else f"/{bucket}/{key}"
+
+    async def _send(self, method: str, path: str, params: dict[str, str] | None = None,
+                    headers: dict[str, str] | None = None, content=None,
+                    payload_hash: str = EMPTY_SHA256, stream: bool = False,
+                    ok: tuple[int, ...] = (200,)) -> httpx.Response:
+        params = params or {}
+        signed = self.signer.sign(method, self.host, path, params, headers or {}, payload_hash)
+        url = _uri_encode(path, safe="-_.~/")
+        if params:
+            url += "?" + _canonical_query(params)
+        req = self.http.build_request(method, url, headers=signed, content=content)
+        resp = await self.http.send(req, stream=stream)
+        if resp.status_code not in ok:
+            body = await resp.aread()
+            await resp.aclose()
+            raise self._error(resp.status_code, body, path)
+        return resp
+
+    @staticmethod
+    def _error(status: int, body: bytes, resource: str) -> S3Error:
+        code, message = {404: "NoSuchKey"}.get(status, "HTTPError"), ""
+        if body:
+            try:
+                root = ET.fromstring(body)
+                code = root.findtext("Code") or code
+                message = root.findtext("Message") or ""
+            except ET.ParseError:
+                message = body[:200].decode(errors="replace")
+        return S3Error(status, code, message, resource)
+
+    async def list_buckets(self) -> list[str]:
+        resp = await self._send("GET", "/")
+        root = ET.fromstring(resp.content)
+        return [b.text or "" for b in root.iter(f"{S3_NS}Name")]
+
+    async def bucket_exists(self, bucket: str) -> bool:
+        resp = await self._send("HEAD", self._path(bucket), ok=(200, 404))
+        return resp.status_code == 200
+
+    async def make_bucket(self, bucket: str) -> None:
+        await self._send("PUT", self._path(bucket))
+
+    async def put_file(self, bucket: str, key: str, path: str, content_type: str,
+                       tags: dict[str, str] | None = None) -> None:
+        size = (await anyio.Path(path).stat()).st_size
+        headers = {"content-type": content_type, "content-length": str(size)}
+        if tags:
+            headers["x-amz-tagging"] = urlencode(tags, quote_via=quote)
+
+        async def body() -> AsyncIterator[bytes]:
+            async with await anyio.open_file(path, "rb") as fh:
+                while chunk := await fh.read(CHUNK_SIZE):
+                    yield chunk
+
+        await self._send("PUT", self._path(bucket, key), headers=headers, content=body(),
+                         payload_hash=UNSIGNED_PAYLOAD)
+
+    async def stat_object(self, bucket: str, key: str) -> S3Object:
+        resp = await self._send("HEAD", self._path(bucket, key))
+        return S3Object(
+            name=key,
+            size=int(resp.headers.get("content-length", 0)),
+            etag=resp.headers.get("etag", "").strip('"') or None,
+            content_type=resp.headers.get("content-type"),
+            last_modified=parsedate_to_datetime(resp.headers["last-modified"])
+            if "last-modified" in resp.headers else None,
+        )
+
+    async def get_object(self, bucket: str, key: str, offset: int = 0,
+                         length: int | None = None) -> httpx.Response:
+        """Start a streamed GET; the caller must ``aclose()`` the response."""
+        headers = {}
+        if offset or length:
+            end = "" if length is None else str(offset + length - 1)
+            headers["range"] = f"bytes={offset}-{end}"
+        return await self._send("GET", self._path(bucket, key), headers=headers,
+                                stream=True, ok=(200, 206))
+
+    async def remove_object(self, bucket: str, key: str) -> None:
+        await self._send("DELETE", self._path(bucket, key), ok=(200, 204))
+
+    async def remove_objects(self, bucket: str, keys: list[str]) -> list[tuple[str, str]]:
+        """Multi-object delete of up to MAX_DELETE_KEYS keys; returns ``(key, message)`` per failure."""
+        root = ET.Element("Delete")
+        ET.SubElement(root, "Quiet").text = "true"
+        for k in keys:
+            ET.SubElement(ET.SubElement(root, "Object"), "Key").text = k
+        payload = ET.tostring(root, xml_declaration=False)
+        headers = {
+            "content-type": "application/xml",
+            "content-md5": base64.b64encode(hashlib.md5(payload).digest()).decode(),
+        }
+        resp = await self._send("POST", self._path(bucket), params={"delete": ""}, headers=headers,
+                                content=payload, payload_hash=_sha256(payload))
+        result = ET.fromstring(resp.content)
+        return [
+            (e.findtext(f"{S3_NS}Key") or "", e.findtext(f"{S3_NS}Message") or "")
+            for e in result.iter(f"{S3_NS}Error")
+        ]
+
+    async def list_objects(self, bucket: str, start_after: str | None, limit: int) -> list[S3Object]:
+        """Up to ``limit`` objects after ``start_after`` (ListObjectsV2, following continuation)."""
+        out: list[S3Object] = []
+        token = None
+        while len(out) < limit:
+            params = {"list-type": "2", "max-keys": str(min(1000, limit - len(out)))}
+            if token:
+                params["continuation-token"] = token
+            elif start_after:
+                params["start-after"] = start_after
+            resp = await self._send("GET", self._path(bucket), params=params)
+            root = ET.fromstring(resp.content)
+            for c in root.iter(f"{S3_NS}Contents"):
+                lm = c.findtext(f"{S3_NS}LastModified")
+                out.append(S3Object(
+                    name=c.findtext(f"{S3_NS}Key") or "",
+                    size=int(c.findtext(f"{S3_NS}Size") or 0),
+                    etag=(c.findtext(f"{S3_NS}ETag") or "").strip('"') or None,
+                    last_modified=datetime.fromisoformat(lm.replace("Z", "+00:00")) if lm else None,
+                ))
+            token = root.findtext(f"{S3_NS}NextContinuationToken")
+            if root.findtext(f"{S3_NS}IsTruncated") != "true" or not token:
+                break
+        return out
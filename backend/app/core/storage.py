@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import contextlib
+import heapq
+import itertools
+import logging
+import mimetypes
+import mmap
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import unquote
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .storage_governor import GuardedStorage
+
+logger = logging.getLogger("secure-share")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ObjectStat:
+    name: str
+    size: int
+    etag: str | None = None
+    content_type: str | None = None
+    last_modified: datetime | None = None
+
+
+async def iter_file_range(fh: BinaryIO, offset: int = 0, length: int | None = None) -> AsyncIterator[bytes]:
+    """Stream ``length`` bytes (or the rest) of an open file from ``offset`` via ``mmap``; closes ``fh``."""
+    try:
+        size = os.fstat(fh.fileno()).st_size
+        end = size if length is None else min(size, offset + length)
+        if offset >= end:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = offset
+            while pos < end:
+                stop = min(pos + CHUNK_SIZE, end)
+                # Page faults happen off the event loop.
+                yield await run_in_threadpool(mm.__getitem__, slice(pos, stop))
+                pos = stop
+    finally:
+        fh.close()
+
+
+class StorageBackend(ABC):
+    """Object storage operations used by the app; every call is awaitable."""
+
+    name: str
+
+    @abstractmethod
+    async def ensure_bucket(self, bucket: str) -> None: ...
+
+    @abstractmethod
+    async def health(self) -> None:
+        """Raise if the backend is unusable."""
+
+    @abstractmethod
+    async def put_file(self, bucket: str, object_name: str, path: str, content_type: str,
+                       tags: dict[str, str] | None = None) -> None: ...
+
+    @abstractmethod
+    async def stat(self, bucket: str, object_name: str) -> ObjectStat: ...
+
+    @abstractmethod
+    async def open(self, bucket: str, object_name: str, offset: int = 0,
+                   length: int | None = None) -> AsyncIterator[bytes]:
+        """
+        Open an object (or the byte range ``offset``/``length``) for streaming.
+
+        Opening happens eagerly so that missing objects and storage outages raise
+        here, before a response has started; the returned iterator yields chunks.
+        """
+
+    async def read(self, bucket: str, object_name: str, offset: int = 0, length: int | None = None) -> bytes:
+        body = await self.open(bucket, object_name, offset, length)
+        return b"".join([chunk async for chunk in body])
+
+    @abstractmethod
+    async def delete(self, bucket: str, object_name: str) -> None: ...
+
+    @abstractmethod
+    async def delete_many(self, bucket: str, names: list[str]) -> set[str]:
+        """Delete objects; returns the names that failed."""
+
+    @abstractmethod
+    async def list_page(self, bucket: str, start_after: str | None, limit: int) -> list[ObjectStat]:
+        """Up to ``limit`` objects with names > ``start_after``, in lexicographic order."""
+
+    def local_path(self, bucket: str, object_name: str) -> str | None:
+        """Filesystem path of the object when it can be served directly from disk."""
+        return None
+
+    async def close(self) -> None:
+        """Release pooled connections on shutdown; backends without a pool have nothing to do."""
+        return None
+
+
+class MinioStorage(StorageBackend):
+    name = "minio"
+
+    def __init__(self) -> None:
+        from .minio_client import minio_client
+        self.client = minio_client
+
+    async def ensure_bucket(self, bucket: str) -> None:
+        from .minio_client import initialize_minio_bucket
+        await run_in_threadpool(initialize_minio_bucket)
+
+    async def health(self) -> None:
+        await run_in_threadpool(self.client.list_buckets)
+
+    async def put_file(self, bucket, object_name, path, content_type, tags=None) -> None:
+        from minio.commonconfig import Tags
+
+        obj_tags = None
+        if tags:
+            obj_tags = Tags.new_object_tags()
+            obj_tags.update(tags)
+        await run_in_threadpool(
+            self.client.fput_object, bucket, object_name, path, content_type=content_type, tags=obj_tags
+        )
+
+    async def stat(self, bucket, object_name) -> ObjectStat:
+        st = await run_in_threadpool(self.client.stat_object, bucket, object_name)
+        return ObjectStat(
+            name=object_name,
+            size=st.size,
+            etag=st.etag,
+            content_type=st.content_type,
+            last_modified=st.last_modified,
+        )
+
+    async def open(self, bucket, object_name, offset=0, length=None) -> AsyncIterator[bytes]:
+        obj = await run_in_threadpool(self.client.get_object, bucket, object_name, offset, length or 0)
+        return self._iter(obj)
+
+    @staticmethod
+    async def _iter(obj) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await run_in_threadpool(obj.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            await run_in_threadpool(obj.close)
+            await run_in_threadpool(obj.release_conn)
+
+    async def delete(self, bucket, object_name) -> None:
+        await run_in_threadpool(self.client.remove_object, bucket, object_name)
+
+    async def delete_many(self, bucket, names) -> set[str]:
+        def _remove() -> set[str]:
+            from minio.deleteobjects import DeleteObject
+
+            failed = set()
+            for err in self.client.remove_objects(bucket, [DeleteObject(n) for n in names]):
+                logger.warning("MinIO bulk delete failed object=%s err=%s", err.name, err.message)
+                failed.add(err.name)
+            return failed
+
+        return await run_in_threadpool(_remove)
+
+    async def list_page(self, bucket, start_after, limit) -> list[ObjectStat]:
+        def _list() -> list[ObjectStat]:
+            it = self.client.list_objects(bucket, recursive=True, start_after=start_after)
+            return [
+                ObjectStat(name=o.object_name, size=o.size or 0, etag=o.etag, last_modified=o.last_modified)
+                for o in itertools.islice(it, limit)
+            ]
+
+        return await run_in_threadpool(_list)
+
+
+class S3Storage(StorageBackend):
+    """
+    The MinIO server through the native asyncio client in ``s3_async``: no thread
+    handoffs per call or per chunk, and one keep-alive connection pool shared by all
+    requests.
+    """
+
+    name = "s3"
+
+    def __init__(self) -> None:
+        from .s3_async import AsyncS3Client
+
+        self.client = AsyncS3Client(
+            settings.MINIO_ENDPOINT,
+            settings.MINIO_ACCESS_KEY,
+            settings.MINIO_SECRET_KEY,
+            region=settings.MINIO_REGION,
+        )
+
+    async def ensure_bucket(self, bucket) -> None:
+        if not await self.client.bucket_exists(bucket):
+            await self.client.make_bucket(bucket)
+            logger.info(f"Bucket '{bucket}' created successfully")
+        else:
+            logger.info(f"Bucket '{bucket}' already exists")
+
+    async def health(self) -> None:
+        await self.client.list_buckets()
+
+    async def put_file(self, bucket, object_name, path, content_type, tags=None) -> None:
+        await self.client.put_file(bucket, object_name, path, content_type, tags)
+
+    async def stat(self, bucket, object_name) -> ObjectStat:
+        o = await self.client.stat_object(bucket, object_name)
+        return ObjectStat(o.name, o.size, o.etag, o.content_type, o.last_modified)
+
+    async def open(self, bucket, object_name, offset=0, length=None) -> AsyncIterator[bytes]:
+        resp = await self.client.get_object(bucket, object_name, offset, length)
+        return self._iter(resp)
+
+    @staticmethod
+    async def _iter(resp) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in resp.aiter_raw(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await resp.aclose()
+
+    async def delete(self, bucket, object_name) -> None:
+        await self.client.remove_object(bucket, object_name)
+
+    async def delete_many(self, bucket, names) -> set[str]:
+        from .s3_async import MAX_DELETE_KEYS
+
+        failed = set()
+        for i in range(0, len(names), MAX_DELETE_KEYS):
+            for name, message in await self.client.remove_objects(bucket, names[i:i + MAX_DELETE_KEYS]):
+                logger.warning("S3 bulk delete failed object=%s err=%s", name, message)
+                failed.add(name)
+        return failed
+
+    async def list_page(self, bucket, start_after, limit) -> list[ObjectStat]:
+        return [
+            ObjectStat(o.name, o.size, o.etag, o.content_type, o.last_modified)
+            for o in await self.client.list_objects(bucket, start_after, limit)
+        ]
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Object names may contain "/" (they embed the client's file name), which S3 keys allow;
+# on disk it is escaped so every object stays one file directly in the bucket directory.
+_NAME_ESCAPES = str.maketrans({"%": "%25", "/": "%2F", "\\": "%5C"})
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as plain files under ``root/<bucket>/<object_name>``.
+
+    Meant for single-node deployments and tests: full downloads are served straight
+    from disk (see ``local_path``) and ranged reads go through ``mmap``.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root).resolve()
+
+    def _path(self, bucket: str, object_name: str) -> Path:
+        base = (self.root / bucket).resolve()
+        p = (base / object_name.translate(_NAME_ESCAPES)).resolve()
+        if p.parent != base:
+            raise ValueError(f"Invalid object name: {object_name!r}")
+        return p
+
+    async def ensure_bucket(self, bucket) -> None:
+        await run_in_threadpool(self._path(bucket, "x").parent.mkdir, parents=True, exist_ok=True)
+
+    async def health(self) -> None:
+        if not os.access(self.root, os.R_OK | os.W_OK):
+            raise RuntimeError(f"Storage root {self.root} is not accessible")
+
+    async def put_file(self, bucket, object_name, path, content_type, tags=None) -> None:
+        dest = self._path(bucket, object_name)
+
+        def _copy() -> None:
+            # Copy next to the destination first so readers never see a partial object.
+            tmp = dest.with_name(f".tmp-{uuid.uuid4().hex}")
+            try:
+                shutil.copyfile(path, tmp)
+                tmp.replace(dest)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+
+        await run_in_threadpool(_copy)
+
+    def _stat(self, p: Path) -> ObjectStat:
+        st = p.stat()
+        return ObjectStat(
+            name=unquote(p.name),
+            size=st.st_size,
+            etag=f"{st.st_mtime_ns:x}-{st.st_size:x}",
+            content_type=mimetypes.guess_type(p.name)[0],
+            last_modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+        )
+
+    async def stat(self, bucket, object_name) -> ObjectStat:
+        return await run_in_threadpool(self._stat, self._path(bucket, object_name))
+
+    async def open(self, bucket, object_name, offset=0, length=None) -> AsyncIterator[bytes]:
+        fh = await run_in_threadpool(self._path(bucket, object_name).open, "rb")
+        return iter_file_range(fh, offset, length)
+
+    async def delete(self, bucket, object_name) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            await run_in_threadpool(self._path(bucket, object_name).unlink)
+
+    async def delete_many(self, bucket, names) -> set[str]:
+        failed = set()
+        for name in names:
+            try:
+                await self.delete(bucket, name)
+            except Exception as e:
+                logger.warning("Local delete failed object=%s err=%s", name, e)
+                failed.add(name)
+        return failed
+
+    async def list_page(self, bucket, start_after, limit) -> list[ObjectStat]:
+        base = self._path(bucket, "x").parent
+
+        def _list() -> list[ObjectStat]:
+            if not base.is_dir():
+                return []
+            with os.scandir(base) as it:
+                # Page in object-name order, as S3 does and the reconciler expects.
+                names = (
+                    n for n in (unquote(e.name) for e in it if e.is_file() and not e.name.startswith(".tmp-"))
+                    if start_after is None or n > start_after
+                )
+                # O(limit) memory however many files the directory holds.
+                page = heapq.nsmallest(limit, names)
+            return [self._stat(self._path(bucket, n)) for n in page]
+
+        return await run_in_threadpool(_list)
+
+    def local_path(self, bucket, object_name) -> str | None:
+        return str(self._path(bucket, object_name))
+
+
+def _build_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    return MinioStorage()
+
+
+storage = GuardedStorage(_build_storage(), settings.STORAGE_MAX_CONCURRENCY, settings.STORAGE_MAX_STREAMS)
@@ -0,0 +1,310 @@
+"""
+Admission control and circuit breaking in front of the storage backend.
+
+Every storage call waits for one of ``STORAGE_MAX_CONCURRENCY`` permits (at most
+``STORAGE_QUEUE_TIMEOUT_SECS``) and runs under a per-operation timeout. An opened
+download then holds one of ``STORAGE_MAX_STREAMS`` stream permits instead, until the
+stream ends, so slow downloads never make short calls queue. Each permit stands for one
+pooled connection, and a timed-out call keeps its permit until its worker really stops,
+so the backend's pool (sized to both limits) is never waited on. Queue timeouts are
+saturation and reject without counting. Timeouts and
+transport/5xx errors count against a circuit breaker. After
+``STORAGE_BREAKER_FAILURES`` consecutive failures, calls fail immediately with
+``StorageUnavailable`` (served as 503 + Retry-After) for
+``STORAGE_BREAKER_RESET_SECS``, then a single probe decides whether to close again.
+A slow or dead MinIO therefore costs a request a bounded wait, not a socket timeout.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING
+
+import httpx
+import urllib3
+from minio.error import ServerError
+
+from app.monitoring.setup import (
+    report_storage_admission,
+    report_storage_circuit,
+    report_storage_rejection,
+    report_storage_release,
+    report_storage_stream,
+    report_storage_timeout,
+)
+
+if TYPE_CHECKING:
+    from .storage import ObjectStat, StorageBackend
+
+logger = logging.getLogger("secure-share")
+
+QUEUE_TIMEOUT_SECS = float(os.getenv("STORAGE_QUEUE_TIMEOUT_SECS", "5"))
+BREAKER_FAILURES = int(os.getenv("STORAGE_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECS = float(os.getenv("STORAGE_BREAKER_RESET_SECS", "30"))
+
+# Seconds; override with STORAGE_TIMEOUT_<OP>, e.g. STORAGE_TIMEOUT_PUT_FILE=600.
+# "chunk" bounds each read of a streamed download, so stalled streams are cut off too.
+OP_TIMEOUTS = {
+    op: float(os.getenv(f"STORAGE_TIMEOUT_{op.upper()}", default))
+    for op, default in {
+        "health": "3",
+        "ensure_bucket": "10",
+        "stat": "5",
+        "open": "10",
+        "chunk": "30",
+        "put_file": "300",
+        "delete": "10",
+        "delete_many": "60",
+        "list_page": "30",
+    }.items()
+}
+
+
+class StorageUnavailable(Exception):
+    """Storage is failing or saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"Storage unavailable ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _is_outage(exc: BaseException) -> bool:
+    """Errors that say storage is unhealthy, as opposed to e.g. a missing object."""
+    if isinstance(exc, FileNotFoundError):
+        return False
+    if isinstance(exc, asyncio.TimeoutError | OSError | urllib3.exceptions.HTTPError
+                  | httpx.TransportError | ServerError):
+        return True
+    status = getattr(exc, "status", None)  # s3_async.S3Error
+    return isinstance(status, int) and status >= 500
+
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int, reset_secs: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_secs = reset_secs
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Storage circuit %s -> %s", self.state, state)
+            self.state = state
+            report_storage_circuit(state)
+
+    def check(self) -> None:
+        """Raise ``StorageUnavailable`` unless a call may go through now."""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_secs - time.monotonic()
+            if remaining > 0:
+                raise StorageUnavailable("circuit_open", remaining)
+            self._set(self.HALF_OPEN)
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise StorageUnavailable("circuit_open", 1)
+            self._probing = True
+
+    def retry_after(self) -> float:
+        if self.state == self.OPEN:
+            return max(1.0, self.opened_at + self.reset_secs - time.monotonic())
+        return 1.0
+
+    def abandon(self) -> None:
+        """The admitted call never reached storage (or was cancelled); free the probe slot."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        self._set(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set(self.OPEN)
+
+
+class _GuardedStream:
+    """
+    A download body under the per-chunk timeout that holds its stream permit until it
+    is exhausted, fails or is closed (or, if a caller drops it unread, is collected).
+    """
+
+    def __init__(self, storage: GuardedStorage, body: AsyncIterator[bytes]) -> None:
+        self._storage = storage
+        self._body = body
+        self._held = True
+
+    def __aiter__(self) -> _GuardedStream:
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            return await asyncio.wait_for(self._body.__anext__(), OP_TIMEOUTS["chunk"])
+        except StopAsyncIteration:
+            await self.aclose()
+            raise
+        except Exception as e:
+            # Headers are already out, so the stream just ends; the breaker still learns.
+            if isinstance(e, asyncio.TimeoutError):
+                report_storage_timeout("chunk")
+            if _is_outage(e):
+                self._storage.breaker.record_failure()
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        if self._held:
+            self._held = False
+            try:
+                await self._body.aclose()
+            finally:
+                self._storage._release_stream()
+
+    def __del__(self) -> None:
+        if self._held:
+            self._held = False
+            self._storage._release_stream()
+
+
+class GuardedStorage:
+    """Wraps a ``StorageBackend`` with the admission semaphores, timeouts and circuit breaker."""
+
+    def __init__(self, inner: StorageBackend, max_concurrency: int, max_streams: int) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_SECS)
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._streams = asyncio.Semaphore(max_streams)
+
+    async def _acquire(self, op: str) -> None:
+        try:
+            self.breaker.check()
+        except StorageUnavailable as e:
+            report_storage_rejection(e.reason)
+            raise
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._sem.acquire(), QUEUE_TIMEOUT_SECS)
+        except asyncio.TimeoutError:
+            # Saturation is not a storage fault: reject without tripping the breaker.
+            self.breaker.abandon()
+            report_storage_rejection("queue_timeout")
+            raise StorageUnavailable("queue_timeout", 1) from None
+        report_storage_admission(op, time.perf_counter() - t0)
+
+    def _release(self) -> None:
+        self._sem.release()
+        report_storage_release()
+
+    async def _acquire_stream(self) -> None:
+        try:
+            await asyncio.wait_for(self._streams.acquire(), QUEUE_TIMEOUT_SECS)
+        except asyncio.TimeoutError:
+            report_storage_rejection("stream_queue_timeout")
+            raise StorageUnavailable("stream_queue_timeout", 1) from None
+        report_storage_stream(True)
+
+    def _release_stream(self) -> None:
+        self._streams.release()
+        report_storage_stream(False)
+
+    def _release_when_done(self, task: asyncio.Future) -> None:
+        """
+        Return the permit once ``task`` has really stopped. Cancelling stops native asyncio
+        I/O at once, but a threadpool call (the MinIO SDK) runs on until its own socket
+        timeout; until then it holds a pooled connection, so it keeps its permit too.
+        """
+        def done(t: asyncio.Future) -> None:
+            if not t.cancelled():
+                t.exception()  # retrieved: the caller was already told
+            self._release()
+
+        task.add_done_callback(done)
+
+    async def _run(self, op: str, coro_fn, *args, **kwargs):
+        """Admit and run one call; on success the caller owns the permit and must release it."""
+        await self._acquire(op)
+        task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+        try:
+            await asyncio.wait({task}, timeout=OP_TIMEOUTS[op])
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            task.cancel()
+            self._release_when_done(task)
+            raise
+        if not task.done():
+            task.cancel()
+            self._release_when_done(task)
+            report_storage_timeout(op)
+            self.breaker.record_failure()
+            raise StorageUnavailable(f"{op}_timeout", self.breaker.retry_after())
+        try:
+            result = task.result()
+        except Exception as e:
+            self._release()
+            if not _is_outage(e):
+                self.breaker.record_success()
+                raise
+            self.breaker.record_failure()
+            raise StorageUnavailable(f"{op}_failed", self.breaker.retry_after()) from e
+        self.breaker.record_success()
+        return result
+
+    async def _call(self, op: str, coro_fn, *args, **kwargs):
+        result = await self._run(op, coro_fn, *args, **kwargs)
+        self._release()
+        return result
+
+    async def ensure_bucket(self, bucket) -> None:
+        await self._call("ensure_bucket", self.inner.ensure_bucket, bucket)
+
+    async def health(self) -> None:
+        await self._call("health", self.inner.health)
+
+    async def put_file(self, bucket, object_name, path, content_type, tags=None) -> None:
+        await self._call("put_file", self.inner.put_file, bucket, object_name, path, content_type, tags)
+
+    async def stat(self, bucket, object_name) -> ObjectStat:
+        return await self._call("stat", self.inner.stat, bucket, object_name)
+
+    async def open(self, bucket, object_name, offset=0, length=None) -> AsyncIterator[bytes]:
+        # Opening is a short call; the open stream holds a pooled connection, so it keeps
+        # a stream permit until it ends.
+        await self._acquire_stream()
+        try:
+            body = await self._call("open", self.inner.open, bucket, object_name, offset, length)
+        except BaseException:
+            self._release_stream()
+            raise
+        return _GuardedStream(self, body)
+
+    async def read(self, bucket, object_name, offset=0, length=None) -> bytes:
+        body = await self.open(bucket, object_name, offset, length)
+        return b"".join([chunk async for chunk in body])
+
+    async def delete(self, bucket, object_name) -> None:
+        await self._call("delete", self.inner.delete, bucket, object_name)
+
+    async def delete_many(self, bucket, names) -> set[str]:
+        return await self._call("delete_many", self.inner.delete_many, bucket, names)
+
+    async def list_page(self, bucket, start_after, limit) -> list[ObjectStat]:
+        return await self._call("list_page", self.inner.list_page, bucket, start_after, limit)
+
+    def local_path(self, bucket, object_name) -> str | None:
+        return self.inner.local_path(bucket, object_name)
+
+    async def close(self) -> None:
+        await self.inner.close()
@@ -1,28 +1,40 @@
 import asyncio
 import logging
+import math
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
+from app.core.config import settings
 from app.core.database import Base, SessionLocal, engine
-from app.core.minio_client import initialize_minio_bucket
+from app.core.http_compression import CompressionMiddleware
+from app.core.storage import storage
+from app.core.storage_governor import StorageUnavailable
 from app.monitoring.setup import setup_monitoring
 from app.routes import (
     admin,
     auth,
+    bulk,
     download,
     files,
+    pages,
     share_links,
     share_links_compat,
     two_factor,
     ui,
     users,
 )
+from app.services.file_index import index_queue
 from app.tasks.cleanup import start_cleanup_task
+from app.tasks.notify import start_notify_task
+from app.tasks.reconcile import start_reconcile_task
+from app.tasks.reindex import stop_reindex
+from app.web import assets
 
 logger = logging.getLogger("secure-share")
 
@@ -45,22 +57,41 @@ async def lifespan(app: FastAPI):
         raise
 
     try:
-        initialize_minio_bucket()
-        logger.info("MinIO initialized")
+        await storage.ensure_bucket(settings.MINIO_BUCKET)
+        logger.info("Storage initialized: backend=%s", storage.name)
     except Exception as e:
-        logger.error(f"MinIO initialization failed: {e}")
+        logger.error(f"Storage initialization failed: {e}")
         raise
 
     cleanup_task = asyncio.create_task(start_cleanup_task())
     logger.info("Background cleanup task started")
+    reconcile_task = asyncio.create_task(start_reconcile_task())
+    logger.info("Background storage reconcile task started")
+    notify_task = asyncio.create_task(start_notify_task())
+    logger.info("Background expiry notification task started")
+    index_queue.start()
+    logger.info("Index workers started")
 
     yield  
 
     cleanup_task.cancel()
+    reconcile_task.cancel()
+    notify_task.cancel()
     try:
         await cleanup_task
     except asyncio.CancelledError:
         logger.info("Cleanup task cancelled")
+    try:
+        await reconcile_task
+    except asyncio.CancelledError:
+        logger.info("Reconcile task cancelled")
+    try:
+        await notify_task
+    except asyncio.CancelledError:
+        logger.info("Expiry notification task cancelled")
+    await stop_reindex()
+    await index_queue.stop()
+    await storage.close()
     logger.info("Application shutdown complete")
 
 app = FastAPI(
@@ -77,22 +108,34 @@ app.add_middleware(
     allow_headers=["*"],  
     expose_headers=["Content-Disposition", "Content-Length"],
 )
+app.add_middleware(CompressionMiddleware)
+
+@app.exception_handler(StorageUnavailable)
+async def storage_unavailable_handler(request: Request, exc: StorageUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Storage is temporarily unavailable"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 app.include_router(auth)
 app.include_router(files)
+app.include_router(bulk)
 app.include_router(share_links)
 app.include_router(share_links_compat)  
 app.include_router(users)
 app.include_router(admin)
 app.include_router(two_factor)
 app.include_router(download)
+app.include_router(pages)
 app.include_router(ui)
+app.include_router(assets.router)
 
 from importlib import import_module
 
 from fastapi import APIRouter as _APIRouter
 
-_route_names = ["auth", "files", "share_links", "download", "users", "two_factor", "admin", "ui"]
+_route_names = ["auth", "files", "bulk", "share_links", "download", "users", "two_factor", "admin", "pages", "ui"]
 for _name in _route_names:
     try:
         _mod = import_module(f"app.routes.{_name}")
@@ -121,8 +164,7 @@ async def health_check():
         db_status = f"error: {str(e)}"
     
     try:
-        from app.core.minio_client import minio_client
-        minio_client.list_buckets()
+        await storage.health()
         minio_status = "ok"
     except Exception as e:
         minio_status = f"error: {str(e)}"
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.core.database import Base
+
+
+class BulkDeleteJob(Base):
+    __tablename__ = "bulk_delete_jobs"
+
+    id = Column(String(36), primary_key=True)
+    owner_id = Column(String(36), nullable=False)
+    total = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class BulkDeleteItem(Base):
+    """One storage object of a bulk delete job; ``status`` is pending, deleted or failed."""
+
+    __tablename__ = "bulk_delete_items"
+
+    job_id = Column(String(36), ForeignKey("bulk_delete_jobs.id"), primary_key=True)
+    file_id = Column(String(36), primary_key=True)
+    bucket = Column(String, nullable=False)
+    object_name = Column(String, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -9,6 +9,11 @@ from app.core.database import Base
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        Index("ix_files_notified_expires_at", "expiry_notified_at", "expires_at"),
+        Index("ix_files_owner_id_id", "owner_id", "id"),
+        Index("ix_files_owner_id_created_at", "owner_id", "created_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     filename = Column(String, index=True)
@@ -16,8 +21,14 @@ class File(Base):
     size = Column(Integer)
     owner_id = Column(String(36), ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
     bucket = Column(String)
-    object_name = Column(String)
+    object_name = Column(String, index=True)
+    expiry_notified_at = Column(DateTime, nullable=True)
+    # Set when a bucket lifecycle rule (not cleanup) removes the object on this day.
+    storage_expires_on = Column(Date, nullable=True)
+    # Codec the stored object is compressed with ("gzip"/"zstd"); size stays the original size.
+    content_encoding = Column(String, nullable=True)
+    encryption_header = Column(String, nullable=True)
     
     share_links = relationship("ShareLink", back_populates="file", cascade="all, delete-orphan")
\ No newline at end of file
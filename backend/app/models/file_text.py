@@ -0,0 +1,14 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, Text
+
+from app.core.database import Base
+
+
+class FileText(Base):
+    """Extracted title and text of a file: the external content of ``file_fts``."""
+
+    __tablename__ = "file_text"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_id = Column(String(36), ForeignKey("files.id"), nullable=False, unique=True)
+    title = Column(String, nullable=True)
+    body = Column(Text, nullable=True)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -9,14 +9,19 @@ from app.core.database import Base
 
 class ShareLink(Base):
     __tablename__ = "share_links"
+    __table_args__ = (
+        Index("ix_share_links_active_expires_at", "is_active", "expires_at"),
+        Index("ix_share_links_notified_expires_at", "expiry_notified_at", "expires_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    file_id = Column(String(36), ForeignKey("files.id"))
+    file_id = Column(String(36), ForeignKey("files.id"), index=True)
     token = Column(String(64), unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime)
     max_views = Column(Integer, default=1)
     views = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    expiry_notified_at = Column(DateTime, nullable=True)
     
     file = relationship("File", back_populates="share_links")
\ No newline at end of file
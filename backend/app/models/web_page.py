@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Column, DateTime, ForeignKey, LargeBinary, String
 
 from app.core.database import Base
 
@@ -13,3 +13,14 @@ class WebPage(Base):
     file_id = Column(String(36), ForeignKey("files.id"), nullable=False, index=True)
     title = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Set whenever the title or HTML is stored; versions the rendered-page cache.
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WebPageHtml(Base):
+    """Sanitized HTML of a page, zlib-compressed."""
+
+    __tablename__ = "web_page_html"
+
+    page_id = Column(String(36), ForeignKey("web_pages.id"), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
@@ -3,7 +3,7 @@ import time
 
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from starlette.types import ASGIApp
 
@@ -16,6 +16,70 @@ cleanup_links_deactivated = Counter("cleanup_links_deactivated_total", "Share li
 cleanup_failed_deletes = Counter("cleanup_failed_deletes_total", "Failed MinIO deletes in cleanup")
 cleanup_duration = Histogram("cleanup_duration_seconds", "Duration of a cleanup run in seconds")
 
+lease_is_leader = Gauge("job_lease_is_leader", "1 if this process holds the job lease", ["job"])
+lease_transitions = Counter("job_lease_transitions_total", "Lease acquisitions and losses", ["job", "event"])
+lease_renewals = Counter("job_lease_renewals_total", "Lease acquire/renew attempts", ["job", "result"])
+reconcile_objects_scanned = Counter("reconcile_objects_scanned_total", "Storage objects scanned by reconciliation")
+reconcile_orphans_deleted = Counter("reconcile_orphans_deleted_total", "Orphaned storage objects deleted by reconciliation")
+reconcile_bytes_reclaimed = Counter("reconcile_bytes_reclaimed_total", "Bytes reclaimed by deleting orphaned objects")
+reconcile_dangling_rows = Counter("reconcile_rows_without_object_total", "File rows whose storage object is missing")
+expiry_notify_items = Counter("expiry_notify_items_total", "Files/links claimed for a pre-expiry notification")
+expiry_notify_sent = Counter("expiry_notify_digests_sent_total", "Pre-expiry digest emails sent")
+expiry_notify_failed = Counter("expiry_notify_digests_failed_total", "Pre-expiry digest emails that failed")
+lease_renew_duration = Histogram("job_lease_renew_duration_seconds", "Duration of a lease acquire/renew round trip", ["job"])
+storage_queue_wait = Histogram(
+    "storage_queue_wait_seconds", "Time storage calls waited for an admission permit", ["op"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+storage_inflight = Gauge("storage_inflight_calls", "Storage calls currently holding an admission permit")
+storage_streams = Gauge("storage_open_streams", "Download streams currently holding a stream permit")
+storage_rejections = Counter("storage_rejections_total", "Storage calls rejected without reaching storage", ["reason"])
+storage_timeouts = Counter("storage_timeouts_total", "Storage calls cut off by their per-operation timeout", ["op"])
+download_coalesce = Counter(
+    "download_coalesce_total",
+    "Full downloads by coalescing outcome: started a stream, joined one or fell back",
+    ["event"],
+)
+object_cache_events = Counter(
+    "object_cache_events_total",
+    "Object cache lookups and admissions: hit_memory, hit_disk, miss, admission_rejected, evicted",
+    ["event"],
+)
+object_cache_bytes_saved = Counter("object_cache_bytes_saved_total", "Download bytes served from the object cache")
+object_cache_bytes = Gauge("object_cache_bytes", "Bytes held by each object cache tier", ["tier"])
+prefetch_events = Counter(
+    "download_prefetch_total", "Landing-page prefetches: scheduled, used, expired, failed, dropped", ["event"]
+)
+storage_circuit_state = Gauge("storage_circuit_state", "Storage circuit breaker: 0 closed, 1 half-open, 2 open")
+index_queue_depth = Gauge("index_queue_depth", "Files waiting in the index queue")
+index_queue_lag = Histogram(
+    "index_queue_lag_seconds", "Time from upload to an index worker picking the file up",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+index_documents = Counter(
+    "index_documents_total",
+    "Files through the indexer by kind and outcome: indexed, truncated, skipped, unsupported, failed, dropped",
+    ["kind", "outcome"],
+)
+index_bytes = Counter("index_bytes_total", "Bytes of files indexed, by kind", ["kind"])
+index_duration = Histogram("index_duration_seconds", "Time to extract and store one file's text", ["kind"])
+reindex_files = Counter("reindex_files_total", "Files processed by the bulk re-indexer, by outcome", ["outcome"])
+page_cache_events = Counter(
+    "page_cache_events_total", "Rendered page cache: hit, miss, stale, evicted, not_modified", ["event"]
+)
+http_compression_responses = Counter(
+    "http_compression_responses_total", "Responses compressed by the middleware, by encoding", ["encoding"]
+)
+http_compression_bypassed = Counter(
+    "http_compression_bypassed_total", "Responses sent uncompressed, by reason", ["reason"]
+)
+http_compression_bytes = Counter(
+    "http_compression_bytes_total", "Bytes before (in) and after (out) response compression", ["encoding", "stage"]
+)
+http_compression_cpu = Counter(
+    "http_compression_cpu_seconds_total", "CPU time spent compressing responses", ["encoding"]
+)
+
 def report_cleanup(files_deleted: int, links_deactivated: int, failed: int, duration: float) -> None:
     """Record cleanup metrics to Prometheus."""
     cleanup_runs.inc()
@@ -27,6 +91,102 @@ def report_cleanup(files_deleted: int, links_deactivated: int, failed: int, dura
         cleanup_failed_deletes.inc(failed)
     cleanup_duration.observe(duration)
 
+def report_reconcile(scanned: int, orphans_deleted: int, bytes_reclaimed: int, dangling_rows: int) -> None:
+    """Record one reconciliation batch."""
+    reconcile_objects_scanned.inc(scanned)
+    reconcile_orphans_deleted.inc(orphans_deleted)
+    reconcile_bytes_reclaimed.inc(bytes_reclaimed)
+    reconcile_dangling_rows.inc(dangling_rows)
+
+def report_expiry_notify(items: int, sent: int, failed: int) -> None:
+    """Record pre-expiry notification progress."""
+    if items:
+        expiry_notify_items.inc(items)
+    if sent:
+        expiry_notify_sent.inc(sent)
+    if failed:
+        expiry_notify_failed.inc(failed)
+
+def report_lease_change(job: str, is_leader: bool) -> None:
+    """Record a leadership gain or loss for a background job."""
+    lease_is_leader.labels(job=job).set(1 if is_leader else 0)
+    lease_transitions.labels(job=job, event="acquired" if is_leader else "lost").inc()
+
+def report_lease_renewal(job: str, duration: float, ok: bool) -> None:
+    """Record one lease heartbeat attempt."""
+    lease_renewals.labels(job=job, result="ok" if ok else "error").inc()
+    lease_renew_duration.labels(job=job).observe(duration)
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def report_storage_admission(op: str, wait: float) -> None:
+    """Record the queue wait of an admitted storage call."""
+    storage_queue_wait.labels(op=op).observe(wait)
+    storage_inflight.inc()
+
+def report_storage_release() -> None:
+    storage_inflight.dec()
+
+def report_storage_stream(opened: bool) -> None:
+    if opened:
+        storage_streams.inc()
+    else:
+        storage_streams.dec()
+
+def report_storage_rejection(reason: str) -> None:
+    storage_rejections.labels(reason=reason).inc()
+
+def report_storage_timeout(op: str) -> None:
+    storage_timeouts.labels(op=op).inc()
+
+def report_storage_circuit(state: str) -> None:
+    storage_circuit_state.set(_CIRCUIT_STATES[state])
+
+def report_download_coalesce(event: str) -> None:
+    download_coalesce.labels(event=event).inc()
+
+def report_object_cache(event: str) -> None:
+    object_cache_events.labels(event=event).inc()
+
+def report_object_cache_saved(nbytes: int) -> None:
+    if nbytes:
+        object_cache_bytes_saved.inc(nbytes)
+
+def report_object_cache_usage(memory_bytes: int, disk_bytes: int) -> None:
+    object_cache_bytes.labels(tier="memory").set(memory_bytes)
+    object_cache_bytes.labels(tier="disk").set(disk_bytes)
+
+def report_prefetch(event: str) -> None:
+    prefetch_events.labels(event=event).inc()
+
+def report_index_queue(depth: int) -> None:
+    index_queue_depth.set(depth)
+
+def report_index_started(lag: float, depth: int) -> None:
+    index_queue_lag.observe(lag)
+    index_queue_depth.set(depth)
+
+def report_index_done(kind: str, outcome: str, nbytes: int, duration: float) -> None:
+    index_documents.labels(kind=kind, outcome=outcome).inc()
+    if outcome in ("indexed", "truncated"):
+        index_bytes.labels(kind=kind).inc(nbytes)
+        index_duration.labels(kind=kind).observe(duration)
+
+def report_reindex(outcome: str) -> None:
+    reindex_files.labels(outcome=outcome).inc()
+
+def report_page_cache(event: str) -> None:
+    page_cache_events.labels(event=event).inc()
+
+def report_http_compression(encoding: str, bytes_in: int, bytes_out: int, cpu: float) -> None:
+    http_compression_responses.labels(encoding=encoding).inc()
+    http_compression_bytes.labels(encoding=encoding, stage="in").inc(bytes_in)
+    http_compression_bytes.labels(encoding=encoding, stage="out").inc(bytes_out)
+    http_compression_cpu.labels(encoding=encoding).inc(cpu)
+
+def report_http_compression_bypass(reason: str) -> None:
+    http_compression_bypassed.labels(reason=reason).inc()
+
 def setup_monitoring(app: ASGIApp):
     Instrumentator().instrument(app).expose(app, endpoint="/api/metrics", include_in_schema=False)
 
@@ -1,5 +1,6 @@
 from .admin import router as admin
 from .auth import router as auth
+from .bulk import router as bulk
 from .download import router as download
 from .files import router as files
 from .pages import router as pages
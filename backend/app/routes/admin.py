@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.core.security import get_current_user
 from app.models.user import User
+from app.tasks import reindex
+from app.tasks.checkpoint import load_checkpoint
 
 router = APIRouter(
     prefix="/admin",
@@ -12,4 +16,33 @@ router = APIRouter(
 async def admin_dashboard(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return {"message": "Admin dashboard"}
\ No newline at end of file
+    return {"message": "Admin dashboard"}
+
+
+def _require_admin(current_user: User) -> None:
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+@router.post("/reindex", status_code=status.HTTP_202_ACCEPTED)
+async def start_reindex(
+    restart: bool = Query(False, description="Discard a partial rebuild and start over"),
+    current_user: User = Depends(get_current_user),
+):
+    """Rebuild the file search index in the background; resumes a partial rebuild unless ``restart``."""
+    _require_admin(current_user)
+    try:
+        await reindex.start_reindex(restart=restart)
+    except reindex.ReindexBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    return {"status": "started"}
+
+
+@router.get("/reindex")
+async def reindex_status(current_user: User = Depends(get_current_user)):
+    _require_admin(current_user)
+    return {
+        "running": reindex.reindex_running(),
+        "checkpoint": await load_checkpoint(reindex.CHECKPOINT_NAME),
+        "progress": asdict(reindex.current) if reindex.current else None,
+    }
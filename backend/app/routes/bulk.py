@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import logging
+import secrets
+import uuid
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.minio_lifecycle import retag_expiry, storage_expiry_date
+from app.dependencies.auth import get_current_user
+from app.models.file import File
+from app.models.share_link import ShareLink
+from app.models.web_page import WebPage
+from app.schemas.file import (
+    BulkCreateLinksRequest,
+    BulkDeleteResponse,
+    BulkDeleteStatus,
+    BulkExtendFilesRequest,
+    BulkExtendLinksRequest,
+    BulkFileIdsRequest,
+    BulkItemResult,
+    BulkLinkIdsRequest,
+    BulkResponse,
+)
+from app.services.bulk_delete import create_bulk_delete, get_bulk_delete_job, start_bulk_delete
+from app.services.page_cache import page_cache
+from app.tasks.expiry import expiry_scheduler
+from app.utils.urls import build_external_url
+
+logger = logging.getLogger("secure-share")
+
+router = APIRouter(tags=["Bulk"])
+
+
+def _can_manage(owner_id, current_user) -> bool:
+    return str(owner_id) == str(getattr(current_user, "id", None)) or bool(getattr(current_user, "is_admin", False))
+
+
+def _partition(ids: list[str], owners: dict[str, str], current_user) -> tuple[list[str], dict[str, str]]:
+    """Split requested ids into manageable ones and per-id failure statuses."""
+    allowed: list[str] = []
+    failed: dict[str, str] = {}
+    for i in ids:
+        if i not in owners:
+            failed[i] = "not_found"
+        elif not _can_manage(owners[i], current_user):
+            failed[i] = "forbidden"
+        else:
+            allowed.append(i)
+    return allowed, failed
+
+
+def _retag_objects(objects: list[tuple[str, str, str]], on: date) -> set[str]:
+    """Re-tag ``(file_id, bucket, object_name)`` objects to expire on ``on``; returns the ids that failed."""
+    failed = set()
+    for file_id, bucket, object_name in objects:
+        try:
+            retag_expiry(bucket, object_name, on)
+        except Exception as e:
+            logger.exception("Failed to retag %s/%s for lifecycle expiry: %s", bucket, object_name, e)
+            failed.add(file_id)
+    return failed
+
+
+@router.post("/files/bulk/extend", response_model=BulkResponse)
+async def bulk_extend_files(
+    body: BulkExtendFilesRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Move the expiry of many files (and optionally their active links) to now + expire_days; never shortens."""
+    ids = list(dict.fromkeys(body.file_ids))
+    rows = (await db.execute(
+        select(File.id, File.owner_id, File.expires_at, File.bucket, File.object_name, File.storage_expires_on)
+        .where(File.id.in_(ids))
+    )).all()
+    allowed, failed = _partition(ids, {r.id: r.owner_id for r in rows}, current_user)
+    current = {r.id: r.expires_at for r in rows}
+    new_expires = datetime.utcnow() + timedelta(days=body.expire_days)
+    new_storage_on = storage_expiry_date(new_expires)
+
+    # Lifecycle-managed objects are re-tagged first: a row must never promise a later
+    # expiry than its object's tag, or the bucket would delete an "extended" file. A file
+    # whose re-tag fails is left as it was and reported as a storage error.
+    allowed_set = set(allowed)
+    retag = [
+        (r.id, r.bucket, r.object_name) for r in rows
+        if r.id in allowed_set and r.storage_expires_on is not None and r.storage_expires_on < new_storage_on
+    ]
+    if retag:
+        for i in await run_in_threadpool(_retag_objects, retag, new_storage_on):
+            failed[i] = "storage_error"
+        allowed = [i for i in allowed if i not in failed]
+
+    updated = 0
+    link_ids: list[str] = []
+    if allowed:
+        res = await db.execute(
+            update(File)
+            .where(File.id.in_(allowed), File.expires_at < new_expires)
+            .values(expires_at=new_expires, expiry_notified_at=None)
+        )
+        updated = res.rowcount or 0
+        await db.execute(
+            update(File)
+            .where(
+                File.id.in_(allowed),
+                File.storage_expires_on != None,
+                File.storage_expires_on < new_storage_on,
+            )
+            .values(storage_expires_on=new_storage_on)
+        )
+        if body.include_links:
+            link_ids = list((await db.execute(
+                update(ShareLink)
+                .where(
+                    ShareLink.file_id.in_(allowed),
+                    ShareLink.is_active == True,
+                    ShareLink.expires_at < new_expires,
+                )
+                .values(expires_at=new_expires, expiry_notified_at=None)
+                .returning(ShareLink.id)
+            )).scalars())
+        await db.commit()
+    for link_id in link_ids:
+        expiry_scheduler.schedule_link(link_id, new_expires)
+
+    results = []
+    for i in ids:
+        if i in failed:
+            results.append(BulkItemResult(id=i, status=failed[i]))
+        elif current[i] is not None and current[i] < new_expires:
+            expiry_scheduler.schedule_file(i, new_expires)
+            results.append(BulkItemResult(id=i, status="extended", expires_at=new_expires))
+        else:
+            results.append(BulkItemResult(id=i, status="unchanged", expires_at=current[i]))
+    return BulkResponse(results=results, updated=updated)
+
+
+@router.post("/files/bulk/delete", response_model=BulkDeleteResponse)
+async def bulk_delete_files(
+    body: BulkFileIdsRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Delete many files in one transaction; their storage objects are removed in the background."""
+    ids = list(dict.fromkeys(body.file_ids))
+    rows = (await db.execute(
+        select(File.id, File.owner_id, File.bucket, File.object_name).where(File.id.in_(ids))
+    )).all()
+    allowed, failed = _partition(ids, {r.id: r.owner_id for r in rows}, current_user)
+
+    job_id = None
+    if allowed:
+        allowed_set = set(allowed)
+        objects = [
+            (r.id, r.bucket or settings.MINIO_BUCKET, r.object_name)
+            for r in rows
+            if r.id in allowed_set and r.object_name
+        ]
+        await db.execute(delete(ShareLink).where(ShareLink.file_id.in_(allowed)))
+        await db.execute(delete(WebPage).where(WebPage.file_id.in_(allowed)))
+        await db.execute(delete(File).where(File.id.in_(allowed)))
+        if objects:
+            job_id = await create_bulk_delete(db, str(current_user.id), objects)
+        await db.commit()
+        page_cache.invalidate_files(allowed)
+        if job_id:
+            start_bulk_delete(job_id)
+
+    results = [BulkItemResult(id=i, status=failed.get(i, "deleted")) for i in ids]
+    return BulkDeleteResponse(results=results, updated=len(allowed), job_id=job_id)
+
+
+@router.get("/files/bulk/delete/{job_id}", response_model=BulkDeleteStatus)
+async def bulk_delete_status(job_id: str, current_user=Depends(get_current_user)):
+    job = await get_bulk_delete_job(job_id)
+    if job is None or not _can_manage(job.owner_id, current_user):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return BulkDeleteStatus(job_id=job.id, done=job.done, total=job.total, deleted=job.deleted, failed=job.failed)
+
+
+async def _link_owners(db: AsyncSession, ids: list[str]):
+    return (await db.execute(
+        select(ShareLink.id, ShareLink.expires_at, ShareLink.is_active, File.owner_id)
+        .join(File, File.id == ShareLink.file_id)
+        .where(ShareLink.id.in_(ids))
+    )).all()
+
+
+@router.post("/share-links/bulk/extend", response_model=BulkResponse)
+async def bulk_extend_links(
+    body: BulkExtendLinksRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    ids = list(dict.fromkeys(body.link_ids))
+    rows = await _link_owners(db, ids)
+    allowed, failed = _partition(ids, {r.id: r.owner_id for r in rows}, current_user)
+    current = {r.id: r for r in rows}
+    new_expires = datetime.utcnow() + timedelta(days=body.expire_days)
+
+    updated = 0
+    if allowed:
+        res = await db.execute(
+            update(ShareLink)
+            .where(ShareLink.id.in_(allowed), ShareLink.is_active == True, ShareLink.expires_at < new_expires)
+            .values(expires_at=new_expires, expiry_notified_at=None)
+        )
+        updated = res.rowcount or 0
+        await db.commit()
+
+    results = []
+    for i in ids:
+        r = current.get(i)
+        if i in failed:
+            results.append(BulkItemResult(id=i, status=failed[i]))
+        elif not r.is_active:
+            results.append(BulkItemResult(id=i, status="inactive", expires_at=r.expires_at))
+        elif r.expires_at is not None and r.expires_at < new_expires:
+            expiry_scheduler.schedule_link(i, new_expires)
+            results.append(BulkItemResult(id=i, status="extended", expires_at=new_expires))
+        else:
+            results.append(BulkItemResult(id=i, status="unchanged", expires_at=r.expires_at))
+    return BulkResponse(results=results, updated=updated)
+
+
+@router.post("/share-links/bulk/deactivate", response_model=BulkResponse)
+async def bulk_deactivate_links(
+    body: BulkLinkIdsRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    ids = list(dict.fromkeys(body.link_ids))
+    rows = await _link_owners(db, ids)
+    allowed, failed = _partition(ids, {r.id: r.owner_id for r in rows}, current_user)
+    was_active = {r.id: bool(r.is_active) for r in rows}
+
+    updated = 0
+    if allowed:
+        res = await db.execute(
+            update(ShareLink)
+            .where(ShareLink.id.in_(allowed), ShareLink.is_active == True)
+            .values(is_active=False)
+        )
+        updated = res.rowcount or 0
+        await db.commit()
+
+    results = [
+        BulkItemResult(id=i, status=failed.get(i) or ("deactivated" if was_active[i] else "inactive"))
+        for i in ids
+    ]
+    return BulkResponse(results=results, updated=updated)
+
+
+@router.post("/share-links/bulk/create", response_model=BulkResponse)
+async def bulk_create_links(
+    request: Request,
+    body: BulkCreateLinksRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    ids = list(dict.fromkeys(body.file_ids))
+    rows = (await db.execute(select(File.id, File.owner_id).where(File.id.in_(ids)))).all()
+    allowed, failed = _partition(ids, {r.id: r.owner_id for r in rows}, current_user)
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(days=body.expire_days)
+    new_links = [
+        {
+            "id": str(uuid.uuid4()),
+            "file_id": file_id,
+            "token": secrets.token_urlsafe(24),
+            "created_at": now,
+            "expires_at": expires_at,
+            "max_views": body.max_views,
+            "views": 0,
+            "is_active": True,
+        }
+        for file_id in allowed
+    ]
+    if new_links:
+        await db.execute(insert(ShareLink), new_links)
+        await db.commit()
+
+    results = [BulkItemResult(id=i, status=s) for i, s in failed.items()]
+    for link in new_links:
+        expiry_scheduler.schedule_link(link["id"], expires_at)
+        results.append(BulkItemResult(
+            id=link["file_id"],
+            status="created",
+            expires_at=expires_at,
+            token=link["token"],
+            share_url=build_external_url(request, f"/s/{link['token']}"),
+        ))
+    order = {i: n for n, i in enumerate(ids)}
+    results.sort(key=lambda r: order[r.id])
+    return BulkResponse(results=results, updated=len(new_links))
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import html
+import logging
 import math
 import urllib.parse
 from collections.abc import AsyncIterator
@@ -10,16 +10,28 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.concurrency import run_in_threadpool
 
+from app.core.codecs import accepts_encoding, decompress_stream, slice_stream
 from app.core.database import get_db
-from app.core.minio_client import minio_client
+from app.core.encryption import FileKey, decrypt_stream
+from app.core.storage import ObjectStat, storage
+from app.core.storage_governor import StorageUnavailable
 from app.models.file import File
 from app.models.share_link import ShareLink
+from app.services.coalesce import download_coalescer
+from app.services.object_cache import object_cache
+from app.services.prefetch import Prefetched, prefetcher
+from app.utils.responses import ZeroCopyFileResponse
 from app.utils.urls import build_external_url
+from app.web.template import load
+
+logger = logging.getLogger("secure-share")
 
 router = APIRouter(tags=["Download"])
 
+ERROR_PAGE = load("error.html")
+LANDING_PAGE = load("landing.html")
+
 
 def _rfc5987_filename(value: str) -> str:
     quoted = urllib.parse.quote(value, safe="")
@@ -37,48 +49,30 @@ def _human_size(n: int | None) -> str:
     return f"{n / (1024 ** p):.2f} {units[p]}"
 
 
-async def _aiter_minio(obj) -> AsyncIterator[bytes]:
+def _parse_range(value: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive (start, end); None means the whole body."""
+    if not value or not value.startswith("bytes=") or "," in value:
+        return None
+    start_s, _, end_s = value[len("bytes="):].strip().partition("-")
     try:
-        while True:
-            chunk = await run_in_threadpool(obj.read, 1024 * 1024)  
-            if not chunk:
-                break
-            yield chunk
-    finally:
-        await run_in_threadpool(obj.close)
+        if start_s:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        else:
+            start, end = max(0, size - int(end_s)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range Not Satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
 
 
 def _render_error_page(title: str, message: str, status_code: int = 404) -> HTMLResponse:
-    esc = lambda s: html.escape(s or "", quote=True)
-    page = f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8"/>
-  <meta name="viewport" content="width=device-width,initial-scale=1"/>
-  <title>{esc(title)}</title>
-  <style>
-    :root{{ --bg:#0b1016; --card:#111827; --fg:#e5eef7; --muted:#8ea3b7; }}
-    html,body{{ height:100%; }}
-    body{{ margin:0; background:var(--bg); color:var(--fg); font:16px/1.45 system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif; }}
-    .wrap{{ min-height:100%; display:grid; place-items:center; padding:24px; }}
-    .card{{ background:var(--card); padding:28px; max-width:640px; border-radius:16px; box-shadow:0 10px 30px rgba(0,0,0,.35); }}
-    .title{{ margin:0 0 8px 0; font-size:22px; }}
-    .muted{{ color:var(--muted); margin:0; }}
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    <div class="card">
-      <h1 class="title">{esc(title)}</h1>
-      <p class="muted">{esc(message)}</p>
-    </div>
-  </div>
-</body>
-</html>"""
+    page = ERROR_PAGE.render(title=title, message=message)
     return HTMLResponse(content=page, status_code=status_code, headers={"Cache-Control": "no-store"})
 
 
-
 @router.get("/s/{token}", response_class=HTMLResponse)
 async def share_landing(token: str, request: Request, db: AsyncSession = Depends(get_db)):
     """
@@ -101,74 +95,44 @@ async def share_landing(token: str, request: Request, db: AsyncSession = Depends
         await db.commit()
         return _render_error_page("File not found", "The file has been removed or is no longer available.", 404)
 
+    # The page below starts the download right away; warm the object meanwhile.
+    prefetcher.schedule(token, file.bucket, file.object_name)
+
     direct_url = build_external_url(request, f"/download/{token}")
-    filename = file.filename or "download.bin"
-    safe_filename = html.escape(filename, quote=True)
-
-    html_page = f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>Downloading {safe_filename}</title>
-  <style>
-    :root {{ --bg:#0b0d10; --card:#151a20; --fg:#e7edf3; --muted:#9fb0c3; }}
-    html,body {{ height:100%; }}
-    body {{ margin:0; background:var(--bg); color:var(--fg); font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, "Apple Color Emoji","Segoe UI Emoji"; }}
-    .wrap {{ max-width:720px; margin:0 auto; padding:40px 20px; }}
-    .card {{ background:var(--card); border-radius:20px; padding:28px; box-shadow: 0 10px 30px rgba(0,0,0,.25); }}
-    h1 {{ font-size:22px; margin:0 0 12px; }}
-    p {{ margin: 6px 0; color:var(--muted); }}
-    .row {{ display:flex; gap:12px; align-items:center; flex-wrap:wrap; margin-top:20px; }}
-    .btn {{ text-decoration:none; display:inline-block; padding:12px 18px; border-radius:12px; background:#2a7cff; color:white; font-weight:600; border:0; cursor:pointer; }}
-    .btn.secondary {{ background:#2b3340; color:#d7e1ea; }}
-    .meta {{ margin-top:10px; font-size:14px; }}
-    .hidden {{ display:none; }}
-    code {{ background:#0f1318; padding:2px 6px; border-radius:6px; }}
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    <div class="card">
-      <h1>Preparing download…</h1>
-      <p><strong>{safe_filename}</strong></p>
-      <p class="meta">Size: {_human_size(file.size)}{(' · expires: ' + link.expires_at.isoformat()) if link.expires_at else ''}</p>
-
-      <div class="row">
-        <a id="dl" class="btn" href="{direct_url}" download="{safe_filename}">Download</a>
-        <button class="btn secondary" id="copy">Copy link</button>
-      </div>
-
-      <p class="meta" id="status">The download should start automatically. If it doesn’t, click <strong>Download</strong>.</p>
-
-      <input id="hidden" class="hidden" value="{direct_url}" readonly/>
-    </div>
-  </div>
-
-  <script>
-    // Auto-trigger the browser's download using the anchor
-    const a = document.getElementById('dl');
-    setTimeout(() => a.click(), 250);
-
-    // Copy link
-    document.getElementById('copy').addEventListener('click', async () => {{
-      const url = document.getElementById('hidden').value;
-      try {{
-        await navigator.clipboard.writeText(url);
-        document.getElementById('status').textContent = 'Link copied to clipboard.';
-      }} catch (e) {{
-        // Fallback: show the input so the user can copy manually
-        document.getElementById('hidden').classList.remove('hidden');
-        document.getElementById('hidden').select();
-        document.getElementById('status').textContent = 'Press Ctrl+C to copy the link below.';
-      }}
-    }});
-  </script>
-</body>
-</html>"""
+    meta = f"Size: {_human_size(file.size)}"
+    if link.expires_at:
+        meta += " · expires: " + link.expires_at.isoformat()
+    html_page = LANDING_PAGE.render(filename=file.filename or "download.bin", meta=meta, url=direct_url)
     return HTMLResponse(html_page, headers={"Cache-Control": "no-store"})
 
 
+async def _open_stored(file: File, stat: ObjectStat, pre: Prefetched | None,
+                       offset: int = 0, length: int | None = None) -> AsyncIterator[bytes]:
+    """
+    Stored bytes of ``file`` (all of them unless ``length`` is set), from the
+    hot-object cache, a landing-page prefetch or a (coalesced) storage stream.
+    """
+    whole = length is None and offset == 0
+    hit = await object_cache.get(file.bucket, file.object_name)
+    if hit is not None:
+        return hit.iter_range(offset, length)
+    if pre is not None and whole:
+        return object_cache.fill_through(file.bucket, file.object_name, stat, pre.stream())
+    try:
+        if whole:
+            # Viral links: concurrent full downloads share one storage stream.
+            body = await download_coalescer.open(file.bucket, file.object_name)
+        else:
+            body = await storage.open(file.bucket, file.object_name, offset, length)
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Storage is temporarily unavailable") from e
+    if whole:
+        body = object_cache.fill_through(file.bucket, file.object_name, stat, body)
+    return body
+
+
 @router.get("/download/{token}")
 async def download_by_token(token: str, request: Request, db: AsyncSession = Depends(get_db)):
     now = datetime.utcnow()
@@ -186,20 +150,29 @@ async def download_by_token(token: str, request: Request, db: AsyncSession = Dep
         await db.commit()
         raise HTTPException(status_code=404, detail="File not found")
 
+    key = None
+    if file.encryption_header:
+        try:
+            key = FileKey.from_header(file.encryption_header)
+        except Exception as e:
+            logger.exception("Cannot unwrap the data key of file %s", file.id)
+            raise HTTPException(status_code=500, detail="File cannot be decrypted") from e
+
     link.views = (link.views or 0) + 1
     if link.max_views and link.views >= link.max_views:
         link.is_active = False
     await db.commit()
 
-    try:
-        stat = await run_in_threadpool(minio_client.stat_object, file.bucket, file.object_name)
-    except Exception:
-        raise HTTPException(status_code=404, detail="File not found in storage")
-
-    try:
-        obj = await run_in_threadpool(minio_client.get_object, file.bucket, file.object_name)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Storage is temporarily unavailable")
+    # A prefetch or a hot-object cache entry already knows the stat.
+    pre = await prefetcher.take(token, file.bucket, file.object_name)
+    stat = pre.stat if pre is not None else object_cache.stat(file.bucket, file.object_name)
+    if stat is None:
+        try:
+            stat = await storage.stat(file.bucket, file.object_name)
+        except StorageUnavailable:
+            raise
+        except Exception:
+            raise HTTPException(status_code=404, detail="File not found in storage")
 
     override = request.query_params.get("filename")
     effective_name = override or file.filename or "download.bin"
@@ -207,14 +180,60 @@ async def download_by_token(token: str, request: Request, db: AsyncSession = Dep
 
     headers = {
         "Content-Disposition": content_disposition,
-        "Content-Length": str(getattr(stat, "size", "") or ""),
+        "Accept-Ranges": "bytes",
         "Cache-Control": "no-store",
     }
 
-    media_type = file.content_type or getattr(stat, "content_type", None) or "application/octet-stream"
+    media_type = file.content_type or stat.content_type or "application/octet-stream"
+
+    # stat.size is the stored size; encryption adds a tag per segment and compression
+    # changes it altogether, in which case file.size is the original one.
+    payload_size = key.plaintext_size(stat.size) if key else stat.size
+    codec = file.content_encoding
+    size = file.size if codec else payload_size
+    byte_range = _parse_range(request.headers.get("range"), size)
+    passthrough = bool(codec) and byte_range is None and accepts_encoding(
+        request.headers.get("accept-encoding"), codec
+    )
+    if codec:
+        headers["Vary"] = "Accept-Encoding"
+    if passthrough:
+        headers["Content-Encoding"] = codec
+
+    if byte_range is None:
+        local_path = storage.local_path(file.bucket, file.object_name)
+        if local_path and not key and (not codec or passthrough):
+            return ZeroCopyFileResponse(local_path, media_type=media_type, headers=headers)
+        offset, length, status_code = 0, None, 200
+        headers["Content-Length"] = str(payload_size if passthrough else size)
+    else:
+        start, end = byte_range
+        offset, length, status_code = start, end - start + 1, 206
+        headers["Content-Length"] = str(length)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    decode = bool(codec) and not passthrough
+    if key is not None and byte_range is not None and not codec:
+        # Only the segments covering the range are fetched and decrypted.
+        first, count, stored_offset, stored_length = key.stored_range(offset, length, stat.size)
+        body = await _open_stored(file, stat, pre, stored_offset, stored_length)
+        body = decrypt_stream(key, body, first, count, stat.size)
+        body = slice_stream(body, offset - first * key.segment_size, length)
+    elif key is None and not decode:
+        body = await _open_stored(file, stat, pre, offset, length)
+    else:
+        # Ranges of a compressed object are cut from its decompressed stream.
+        body = await _open_stored(file, stat, pre)
+        if key is not None:
+            body = decrypt_stream(key, body, 0, key.segment_count(stat.size), stat.size)
+        if decode:
+            body = decompress_stream(codec, body)
+            if byte_range is not None:
+                body = slice_stream(body, offset, length)
 
     return StreamingResponse(
-        _aiter_minio(obj),
+        body,
+        status_code=status_code,
         media_type=media_type,
         headers=headers,
     )
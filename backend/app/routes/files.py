@@ -6,26 +6,38 @@ import secrets
 import tempfile
 import uuid
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile
-from sqlalchemy import and_, func, or_, select
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.core.codecs import compressor, storage_codec
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.minio_client import minio_client
+from app.core.encryption import FileKey, SegmentEncryptor, encryption_enabled
+from app.core.minio_lifecycle import expiry_tags, lifecycle_enabled, storage_expiry_date
 from app.core.security import get_current_user
+from app.core.storage import storage
 from app.dependencies.auth import get_current_user
 from app.models.file import File
+from app.models.file_text import FileText
 from app.models.share_link import ShareLink
-from app.schemas.file import FileInfo, FileListResponse, UploadResponse
-from app.services.index_html import index_html_if_applicable
+from app.schemas.file import FileListResponse, UploadResponse
+from app.services.file_index import fts_query, index_queue
+from app.services.inventory_export import FORMATS, LIST_COLUMNS, export_inventory, file_rows
+from app.services.object_cache import object_cache
+from app.services.page_cache import page_cache
+from app.tasks.expiry import expiry_scheduler
 from app.utils.urls import build_external_url
 
 logger = logging.getLogger("secure-share")
 
 router = APIRouter(tags=["Files"])
 
+
 def _mojibake(s: str) -> str | None:
     try:
         b = s.encode("utf-8", errors="ignore")
@@ -43,23 +55,46 @@ async def upload_file(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    suffix = "_" + file.filename if file.filename else ""
+    # Client file names may contain "/"; the temp file only keeps the last component.
+    suffix = "_" + Path(file.filename).name if file.filename else ""
+    content_type = file.content_type or "application/octet-stream"
+    codec = storage_codec(file.filename, content_type)
+    comp = compressor(codec) if codec else None
+    key, encryption_header = FileKey.new() if encryption_enabled() else (None, None)
+    enc = SegmentEncryptor(key) if key else None
+
+    # Compress first: ciphertext does not compress.
+    def _encode(chunk: bytes, final: bool = False) -> bytes:
+        if comp:
+            chunk = comp.flush() if final else comp.compress(chunk)
+        if enc:
+            chunk = enc.update(chunk) + (enc.finalize() if final else b"")
+        return chunk
+
+    file_size = 0
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         while True:
             chunk = await file.read(1024 * 1024)
             if not chunk:
                 break
-            tmp.write(chunk)
+            file_size += len(chunk)
+            tmp.write(await run_in_threadpool(_encode, chunk) if comp or enc else chunk)
+        if comp or enc:
+            tmp.write(_encode(b"", final=True))
         temp_path = tmp.name
 
-    file_size = os.path.getsize(temp_path)
-    content_type = file.content_type or "application/octet-stream"
-
     bucket = settings.MINIO_BUCKET
     object_name = f"{uuid.uuid4()}_{file.filename or 'file.bin'}"
+    expires_at = datetime.utcnow() + timedelta(days=expire_days)
+
+    storage_expires_on = None
+    tags = None
+    if lifecycle_enabled():
+        storage_expires_on = storage_expiry_date(expires_at)
+        tags = expiry_tags(storage_expires_on)
 
     try:
-        minio_client.fput_object(bucket, object_name, temp_path, content_type=content_type)
+        await storage.put_file(bucket, object_name, temp_path, content_type=content_type, tags=tags)
     finally:
         try:
             os.remove(temp_path)
@@ -73,21 +108,19 @@ async def upload_file(
         size=file_size,
         owner_id=str(current_user.id) if hasattr(current_user, "id") else current_user["id"],
         created_at=datetime.utcnow(),
-        expires_at=datetime.utcnow() + timedelta(days=expire_days),
+        expires_at=expires_at,
         bucket=bucket,
         object_name=object_name,
+        storage_expires_on=storage_expires_on,
+        content_encoding=codec,
+        encryption_header=encryption_header,
     )
     db.add(f)
     await db.commit()
     await db.refresh(f)
+    expiry_scheduler.schedule_file(f.id, f.expires_at)
+    index_queue.enqueue(f.id)
 
-    try:
-        page = await index_html_if_applicable(db, f)
-        if page:
-            await db.commit()
-    except Exception as e:
-        logger.exception("HTML indexing failed for file %s: %s", f.id, e)
-    
     resp = UploadResponse(
         id=f.id, filename=f.filename, content_type=f.content_type, size=f.size, created_at=f.created_at, expires_at=f.expires_at
     )
@@ -105,6 +138,7 @@ async def upload_file(
         )
         db.add(s)
         await db.commit()
+        expiry_scheduler.schedule_link(s.id, s.expires_at)
         share_url = build_external_url(request, f"/download/{s.token}")
         resp.share_url = share_url
         resp.token = s.token
@@ -129,19 +163,21 @@ async def delete_file(
 
     try:
         if file_obj.bucket and file_obj.object_name:
-            minio_client.remove_object(file_obj.bucket, file_obj.object_name)
+            await storage.delete(file_obj.bucket, file_obj.object_name)
     except Exception:
-        logging.exception("MinIO remove_object failed for %s/%s", file_obj.bucket, file_obj.object_name)
+        logging.exception("Storage delete failed for %s/%s", file_obj.bucket, file_obj.object_name)
+    object_cache.invalidate(file_obj.bucket, file_obj.object_name)
 
     await db.delete(file_obj)
     await db.commit()
+    page_cache.invalidate_files([file_id])
     return {"status": "ok", "id": file_id}
 
 
-@router.get("/files", response_model=FileListResponse)
+@router.get("/files", response_model=FileListResponse, response_class=ORJSONResponse)
 async def list_files(
     request: Request,
-    search: str | None = Query(None, description="Search by filename"),
+    search: str | None = Query(None, description="Search by filename or indexed content"),
     file_type: str | None = Query(None, description="Filter by extension (e.g., 'pdf')"),
     start_date: str | None = Query(None, description="Filter by created_at >= YYYY-MM-DD"),
     end_date: str | None = Query(None, description="Filter by created_at <= YYYY-MM-DD"),
@@ -159,6 +195,14 @@ async def list_files(
         like_exprs = [File.filename.ilike(f"%{needle}%")]
         if mb:
             like_exprs.append(File.filename.ilike(f"%{mb}%"))
+        match = fts_query(needle)
+        if match:
+            fts = table("file_fts", column("rowid"))
+            like_exprs.append(File.id.in_(
+                select(FileText.file_id)
+                .join(fts, fts.c.rowid == FileText.id)
+                .where(literal_column("file_fts").op("MATCH")(match))
+            ))
         conditions.append(or_(*like_exprs))
 
     if file_type:
@@ -193,7 +237,7 @@ async def list_files(
         count_stmt = count_stmt.where(where_clause)
     total = (await db.execute(count_stmt)).scalar_one()
 
-    query = select(File)
+    query = select(*LIST_COLUMNS)
     if where_clause is not None:
         query = query.where(where_clause)
 
@@ -207,6 +251,18 @@ async def list_files(
 
     query = query.offset(skip).limit(limit)
 
-    rows = (await db.execute(query)).scalars().all()
-    files = [FileInfo.from_orm(r) for r in rows]
-    return FileListResponse(files=files, total=total, skip=skip, limit=limit)
\ No newline at end of file
+    rows = (await db.execute(query)).all()
+    # Returned as a response so FastAPI does not re-validate and re-encode it against FileListResponse,
+    # which only documents the shape.
+    return ORJSONResponse({"files": file_rows(rows), "total": total, "skip": skip, "limit": limit})
+
+
+@router.get("/files/export", response_class=StreamingResponse)
+async def export_files(
+    fmt: str = Query("ndjson", alias="format", description="ndjson (one file per line) or csv (one row per share link)"),
+    current_user=Depends(get_current_user),
+):
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    owner_id = str(current_user.id) if hasattr(current_user, "id") else current_user["id"]
+    return StreamingResponse(export_inventory(owner_id, fmt), media_type=FORMATS[fmt])
\ No newline at end of file
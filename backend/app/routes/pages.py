@@ -1,118 +1,214 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+import html
+import json
+import os
+import urllib.parse
+import zlib
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy import text
+from sqlalchemy import DateTime, bindparam, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core.database import get_db
+from app.dependencies.auth import get_current_user
+from app.monitoring.setup import report_page_cache
+from app.schemas.page import PageHit, PageSearchResponse
+from app.services.file_index import fts_query
+from app.services.page_cache import RenderedPage, page_cache, render
+from app.web.template import Markup, load
 
 router = APIRouter(tags=["Pages"])
 
-BASE_STYLE = """
-:root{color-scheme:light dark}
-body{margin:0;font-family:system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, "Helvetica Neue", Arial, "Apple Color Emoji","Segoe UI Emoji";line-height:1.5}
-header{position:sticky;top:0;background:Canvas;padding:.75rem 1rem;border-bottom:1px solid color-mix(in oklab, Canvas, CanvasText 12%)}
-main{max-width:1100px;margin:0 auto;padding:1rem}
-article{padding:1rem;border:1px solid color-mix(in oklab, Canvas, CanvasText 12%);border-radius:12px;margin:1rem 0;background:Canvas}
-h1,h2,h3{line-height:1.2}
-.page-meta{font:12px/1.4 ui-monospace;color:color-mix(in oklab, CanvasText, Canvas 35%)}
-.search-hint{font-size:12px;color:color-mix(in oklab, CanvasText, Canvas 40%)}
-a{color:LinkText;text-decoration:underline;text-underline-offset:2px}
-"""
-CSP = "default-src 'none'; img-src 'self' data: blob:; style-src 'unsafe-inline'; base-uri 'none'; frame-ancestors 'none'; form-action 'none'"
+TITLE_WEIGHT = float(os.getenv("PAGES_SEARCH_TITLE_WEIGHT", "10"))
+SNIPPET_TOKENS = int(os.getenv("PAGES_SEARCH_SNIPPET_TOKENS", "24"))
+# Match markers: snippet() output is plain text, so it is escaped first and the
+# markers are turned into <mark> afterwards.
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
 
-@router.get("/pages/{page_id}", response_class=HTMLResponse)
-async def view_page(page_id: str, db: AsyncSession = Depends(get_db)):
+PAGE = load("page.html")
+SEARCH_PAGE = load("search.html")
+CSP = "default-src 'none'; img-src 'self' data: blob:; style-src 'self'; base-uri 'none'; frame-ancestors 'none'; form-action 'none'"
+
+def _encode_cursor(*key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str | None, *types) -> list | None:
+    """The keyset of ``cursor``, whose elements must be instances of ``types``; 400 otherwise."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        key = None
+    if isinstance(key, list) and len(key) == len(types) and all(
+        isinstance(v, t) and not isinstance(v, bool) for v, t in zip(key, types, strict=True)
+    ):
+        return key
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _marked(value: str | None) -> str:
+    return html.escape(value or "").replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+async def _search(db: AsyncSession, owner_id: str, q: str, limit: int, cursor: str | None) -> PageSearchResponse:
+    """
+    One page of the caller's pages matching ``q``, best first (bm25, title weighted),
+    or the most recent ones when ``q`` is empty. Pagination is keyset-based, so later
+    pages cost the same as the first. Snippets are computed for the returned rows only.
+    """
+    match = fts_query(q)
+    if match is None:
+        after = _decode_cursor(cursor, str, str)  # created_at, id
+        rows = (await db.execute(text(f"""
+            SELECT wp.id, wp.title, wp.created_at, f.filename
+            FROM web_pages wp
+            JOIN files f ON f.id = wp.file_id
+            WHERE f.owner_id = :owner
+            {"AND (wp.created_at < :c OR (wp.created_at = :c AND wp.id < :cid))" if after else ""}
+            ORDER BY wp.created_at DESC, wp.id DESC
+            LIMIT :limit
+        """), {"owner": owner_id, "limit": limit + 1, "c": after and after[0], "cid": after and after[1]})).all()
+        hits = [
+            PageHit(id=r.id, title=r.title or r.filename or r.id, filename=r.filename,
+                    title_html=html.escape(r.title or r.filename or r.id))
+            for r in rows[:limit]
+        ]
+        next_cursor = _encode_cursor(str(rows[limit - 1].created_at), rows[limit - 1].id) if len(rows) > limit else None
+        return PageSearchResponse(hits=hits, next_cursor=next_cursor)
+
+    after = _decode_cursor(cursor, int | float, int)  # score, rowid
+    rows = (await db.execute(text(f"""
+        SELECT * FROM (
+            SELECT w.rowid AS rid, wp.id, wp.title, f.filename,
+                   bm25(file_fts, :title_weight, 1.0) AS score
+            FROM file_fts w
+            JOIN file_text t ON t.id = w.rowid
+            JOIN web_pages wp ON wp.file_id = t.file_id
+            JOIN files f ON f.id = t.file_id
+            WHERE file_fts MATCH :q AND f.owner_id = :owner
+        )
+        {"WHERE score > :s OR (score = :s AND rid > :rid)" if after else ""}
+        ORDER BY score, rid
+        LIMIT :limit
+    """), {
+        "q": match, "owner": owner_id, "title_weight": TITLE_WEIGHT, "limit": limit + 1,
+        "s": after and after[0], "rid": after and after[1],
+    })).all()
+    page = rows[:limit]
+
+    excerpts = {}
+    if page:
+        placeholders = ",".join(f":r{i}" for i in range(len(page)))
+        params = {f"r{i}": r.rid for i, r in enumerate(page)}
+        for rec in (await db.execute(text(f"""
+            SELECT rowid AS rid,
+                   highlight(file_fts, 0, :mo, :mc) AS title_hl,
+                   snippet(file_fts, 1, :mo, :mc, '…', :tokens) AS body_hl
+            FROM file_fts
+            WHERE file_fts MATCH :q AND rowid IN ({placeholders})
+        """), {"q": match, "mo": _MARK_OPEN, "mc": _MARK_CLOSE, "tokens": SNIPPET_TOKENS, **params})).all():
+            excerpts[rec.rid] = rec
+
+    hits = []
+    for r in page:
+        title = r.title or r.filename or r.id
+        ex = excerpts.get(r.rid)
+        hits.append(PageHit(
+            id=r.id, title=title, filename=r.filename, score=-r.score,
+            title_html=_marked(ex.title_hl) if ex is not None and ex.title_hl else html.escape(title),
+            snippet_html=_marked(ex.body_hl) if ex is not None and ex.body_hl else None,
+        ))
+    next_cursor = _encode_cursor(page[-1].score, page[-1].rid) if len(rows) > limit else None
+    return PageSearchResponse(hits=hits, next_cursor=next_cursor)
+
+
+@router.get("/pages/search.json", response_model=PageSearchResponse)
+async def search_pages_json(q: str = Query("", description="Search query; empty lists the latest pages"),
+                            limit: int = Query(20, ge=1, le=100),
+                            cursor: str | None = Query(None, description="next_cursor of the previous page"),
+                            db: AsyncSession = Depends(get_db),
+                            current_user=Depends(get_current_user)):
+    return await _search(db, str(current_user.id), q, limit, cursor)
+
+
+@router.get("/pages/search", response_class=HTMLResponse)
+async def search_pages(q: str = Query("", description="Запрос, можно пустой для всех страниц"),
+                       limit: int = Query(20, ge=1, le=100),
+                       cursor: str | None = Query(None),
+                       db: AsyncSession = Depends(get_db),
+                       current_user=Depends(get_current_user)):
+    result = await _search(db, str(current_user.id), q, limit, cursor)
+
+    items = []
+    for hit in result.hits:
+        snippet = f"<p>{hit.snippet_html}</p>" if hit.snippet_html else ""
+        items.append(
+            f'<article id="p-{hit.id}"><h2><a href="/pages/{hit.id}">{hit.title_html}</a></h2>'
+            f'<div class="page-meta">{html.escape(hit.filename or "")}</div>{snippet}</article>'
+        )
+    listing = "\n".join(items) if items else "<p>Ничего не найдено.</p>"
+    if result.next_cursor:
+        qs = urllib.parse.urlencode({"q": q, "limit": limit, "cursor": result.next_cursor})
+        listing += f'\n<p><a href="/pages/search?{qs}">Дальше →</a></p>'
+
+    html_page = SEARCH_PAGE.render(csp=CSP, q=q, listing=Markup(listing))
+    return HTMLResponse(html_page, headers={"Content-Security-Policy": CSP})
+
+
+async def _render(db: AsyncSession, page_id: str, owner_id: str) -> RenderedPage:
     row = await db.execute(text("""
-        SELECT wp.id, wp.title, f.filename, wpf.safe_html
+        SELECT wp.id, wp.file_id, wp.title, wp.updated_at, f.filename, f.expires_at, h.data
         FROM web_pages wp
         JOIN files f ON f.id = wp.file_id
-        JOIN web_page_fts wpf ON wpf.page_id = wp.id
-        WHERE wp.id = :pid
-    """), {"pid": page_id})
+        LEFT JOIN web_page_html h ON h.page_id = wp.id
+        WHERE wp.id = :pid AND f.owner_id = :owner AND (f.expires_at IS NULL OR f.expires_at > :now)
+    """).bindparams(bindparam("now", type_=DateTime)).columns(expires_at=DateTime, updated_at=DateTime),
+        {"pid": page_id, "owner": owner_id, "now": datetime.utcnow()})
     r = row.first()
     if not r:
         raise HTTPException(status_code=404, detail="Page not found")
-    title = r.title or r.filename or "Page"
-    safe_html = r.safe_html or "<p>(Empty)</p>"
-    html = f"""<!doctype html>
-<html lang="ru"><head>
-<meta charset="utf-8"/>
-<title>{title}</title>
-<meta http-equiv="Content-Security-Policy" content="{CSP}"/>
-<style>{BASE_STYLE}</style>
-</head>
-<body>
-<header>
-  <strong>{title}</strong>
-  <div class="search-hint">Нажмите Ctrl/⌘+F для поиска по этой странице</div>
-</header>
-<main>
-  <article>{safe_html}</article>
-</main>
-</body>
-</html>"""
-    return HTMLResponse(html, headers={"Content-Security-Policy": CSP})
 
-@router.get("/pages/search", response_class=HTMLResponse)
-async def search_pages(q: str = Query("", description="Запрос, можно пустой для всех страниц"),
-                       limit: int = 20, db: AsyncSession = Depends(get_db)):
-    if q:
-        sql = text("""
-            SELECT wp.id, wp.title, f.filename
-            FROM web_page_fts w
-            JOIN web_pages wp ON wp.id = w.page_id
-            JOIN files f ON f.id = wp.file_id
-            WHERE w.body MATCH :q OR w.title MATCH :q
-            LIMIT :limit
-        """)
-        rows = (await db.execute(sql, {"q": q, "limit": limit})).all()
-    else:
-        sql = text("""
-            SELECT wp.id, wp.title, f.filename
-            FROM web_pages wp
-            JOIN files f ON f.id = wp.file_id
-            ORDER BY wp.created_at DESC
-            LIMIT :limit
-        """)
-        rows = (await db.execute(sql, {"limit": limit})).all()
-
-    ids = [r.id for r in rows] if rows else []
-    safe_html_map = {}
-    if ids:
-        placeholders = ",".join([f":p{i}" for i in range(len(ids))])
-        params = {f"p{i}": ids[i] for i in range(len(ids))}
-        wsql = text(f"SELECT page_id, safe_html FROM web_page_fts WHERE page_id IN ({placeholders})")
-        for rec in (await db.execute(wsql, params)).all():
-            safe_html_map[rec.page_id] = rec.safe_html
+    def build() -> RenderedPage:
+        safe_html = (zlib.decompress(r.data).decode("utf-8") if r.data else "") or "<p>(Empty)</p>"
+        return render(r.file_id, owner_id, r.expires_at, r.updated_at,
+                      PAGE.render(title=r.title or r.filename or "Page", csp=CSP, body=Markup(safe_html)))
 
-    items = []
-    for r in rows:
-        title = r.title or r.filename or r.id
-        anchor = f"p-{r.id}"
-        body = safe_html_map.get(r.id, "<p>(Empty)</p>")
-        items.append(f'<h2 id="{anchor}">{title}</h2><article>{body}</article>')
+    return await run_in_threadpool(build)
 
-    hint = "Нажмите Ctrl/⌘+F для полнотекстового поиска прямо на этой странице."
-    listing = "\n".join(items) if items else "<p>Ничего не найдено.</p>"
 
-    html = f"""<!doctype html>
-<html lang="ru"><head>
-<meta charset="utf-8"/>
-<title>Поиск по страницам</title>
-<meta http-equiv="Content-Security-Policy" content="{CSP}"/>
-<style>{BASE_STYLE}</style>
-</head>
-<body>
-<header>
-  <strong>Поиск по страницам</strong>
-  <div class="page-meta">Запрос: {q!s}</div>
-  <div class="search-hint">{hint}</div>
-</header>
-<main>
-  {listing}
-</main>
-</body>
-</html>"""
-    return HTMLResponse(html, headers={"Content-Security-Policy": CSP})
+async def _is_current(db: AsyncSession, page_id: str, page: RenderedPage) -> bool:
+    """Whether a cached page still matches the database: same content, file still there."""
+    row = await db.execute(text("""
+        SELECT wp.updated_at, f.expires_at
+        FROM web_pages wp
+        JOIN files f ON f.id = wp.file_id
+        WHERE wp.id = :pid AND f.owner_id = :owner
+    """).columns(updated_at=DateTime, expires_at=DateTime), {"pid": page_id, "owner": page.owner_id})
+    r = row.first()
+    return r is not None and r.updated_at == page.updated_at and r.expires_at == page.expires_at
+
+
+@router.get("/pages/{page_id}", response_class=HTMLResponse)
+async def view_page(page_id: str, request: Request, db: AsyncSession = Depends(get_db),
+                    current_user=Depends(get_current_user)):
+    owner_id = str(current_user.id)
+    page = page_cache.get(page_id, owner_id)
+    if page is not None and not await _is_current(db, page_id, page):
+        report_page_cache("stale")
+        page_cache.invalidate(page_id)
+        page = None
+    if page is None:
+        version = page_cache.version
+        page = await _render(db, page_id, owner_id)
+        page_cache.put(page_id, page, version)
+
+    if page.body.not_modified(request.headers.get("if-none-match")):
+        report_page_cache("not_modified")
+    return page.body.response(request, "text/html", {"Content-Security-Policy": CSP, "Cache-Control": "no-cache"})
@@ -14,6 +14,7 @@ from app.models.file import File
 from app.models.share_link import ShareLink
 from app.models.user import User
 from app.schemas.file import ShareResponse
+from app.tasks.expiry import expiry_scheduler
 from app.utils.urls import build_external_url
 
 router = APIRouter(prefix="/share-links", tags=["Share Links"])
@@ -45,6 +46,7 @@ async def create_share_link(
     db.add(link)
     await db.commit()
     await db.refresh(link)
+    expiry_scheduler.schedule_link(link.id, link.expires_at)
 
     page_url = build_external_url(request, f"/s/{token}")
 
@@ -116,6 +118,7 @@ async def ensure_share_link(
     db.add(link)
     await db.commit()
     await db.refresh(link)
+    expiry_scheduler.schedule_link(link.id, link.expires_at)
 
     page_url = build_external_url(request, f"/s/{token}")
     return ShareResponse(share_url=page_url, token=token, expires_at=link.expires_at)
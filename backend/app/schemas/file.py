@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conlist
 
 
 class FileInfo(BaseModel):
@@ -34,4 +34,48 @@ class FileListResponse(BaseModel):
 class ShareResponse(BaseModel):
     share_url: str
     token: str
-    expires_at: datetime
\ No newline at end of file
+    expires_at: datetime
+
+BULK_MAX_ITEMS = 1000
+
+class BulkExtendFilesRequest(BaseModel):
+    file_ids: conlist(str, min_items=1, max_items=BULK_MAX_ITEMS)
+    expire_days: int = Field(7, ge=1, le=365)
+    include_links: bool = True
+
+class BulkExtendLinksRequest(BaseModel):
+    link_ids: conlist(str, min_items=1, max_items=BULK_MAX_ITEMS)
+    expire_days: int = Field(7, ge=1, le=365)
+
+class BulkFileIdsRequest(BaseModel):
+    file_ids: conlist(str, min_items=1, max_items=BULK_MAX_ITEMS)
+
+class BulkLinkIdsRequest(BaseModel):
+    link_ids: conlist(str, min_items=1, max_items=BULK_MAX_ITEMS)
+
+class BulkCreateLinksRequest(BaseModel):
+    file_ids: conlist(str, min_items=1, max_items=BULK_MAX_ITEMS)
+    expire_days: int = Field(7, ge=1, le=365)
+    max_views: int | None = Field(None, ge=1)
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: str
+    expires_at: datetime | None = None
+    token: str | None = None
+    share_url: str | None = None
+
+class BulkResponse(BaseModel):
+    results: list[BulkItemResult]
+    updated: int
+
+
+class BulkDeleteResponse(BulkResponse):
+    job_id: str | None = None
+
+class BulkDeleteStatus(BaseModel):
+    job_id: str
+    done: bool
+    total: int
+    deleted: int
+    failed: list[str]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class PageHit(BaseModel):
+    id: str
+    title: str
+    filename: str | None
+    title_html: str
+    snippet_html: str | None = None
+    score: float | None = None
+
+class PageSearchResponse(BaseModel):
+    hits: list[PageHit]
+    next_cursor: str | None = None
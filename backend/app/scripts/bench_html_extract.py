@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CHUNK = 1024 * 1024
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua отчёт квартал выручка").split()
+
+
+def _sentence(rng: random.Random, n: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _article(rng: random.Random, target: int) -> str:
+    parts = ["<!doctype html><html><head><title>Article</title><style>p{margin:0}</style></head><body>"]
+    size = 0
+    while size < target:
+        block = (f"<h2>{_sentence(rng, 4)}</h2><p>{_sentence(rng)} <a href='https://example.com/{size}'>link</a> "
+                 f"<b>{_sentence(rng, 3)}</b> {_sentence(rng)}</p><ul><li>{_sentence(rng, 5)}</li></ul>")
+        parts.append(block)
+        size += len(block)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _table_export(rng: random.Random, target: int) -> str:
+    parts = ["<html><head><title>Export</title></head><body><table><thead><tr><th>id</th><th>name</th>"
+             "<th>note</th></tr></thead><tbody>"]
+    size, row = 0, 0
+    while size < target:
+        block = f'<tr class="r" data-id="{row}"><td>{row}</td><td>{_sentence(rng, 2)}</td><td>{_sentence(rng, 6)}</td></tr>'
+        parts.append(block)
+        size += len(block)
+        row += 1
+    parts.append("</tbody></table></body></html>")
+    return "".join(parts)
+
+
+def _script_heavy(rng: random.Random, target: int) -> str:
+    parts = ["<html><head><title>App</title>"]
+    size = 0
+    while size < target:
+        block = f"<script>var x{size} = {json.dumps(_sentence(rng, 40))};</script><div onclick='x()'>{_sentence(rng)}</div>"
+        parts.append(block)
+        size += len(block)
+    parts.append("</head><body><p>tail</p></body></html>")
+    return "".join(parts)
+
+
+def build_corpus(directory: Path) -> list[Path]:
+    rng = random.Random(42)
+    docs = {
+        "article_64k.html": _article(rng, 64 * 1024),
+        "article_1m.html": _article(rng, 1024 * 1024),
+        "table_4m.html": _table_export(rng, 4 * 1024 * 1024),
+        "scripts_2m.html": _script_heavy(rng, 2 * 1024 * 1024),
+    }
+    paths = []
+    for name, content in docs.items():
+        path = directory / name
+        path.write_text(content, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _legacy(path: Path) -> tuple[str, str, str]:
+    """The BeautifulSoup + bleach pipeline the streaming extractor replaced."""
+    import bleach
+    from bs4 import BeautifulSoup
+
+    tags = bleach.sanitizer.ALLOWED_TAGS.union({
+        "p", "div", "span", "br", "hr", "pre", "code", "h1", "h2", "h3", "h4", "h5", "h6",
+        "ul", "ol", "li", "strong", "em", "blockquote", "cite", "table", "thead", "tbody", "tr", "th", "td",
+        "img", "a",
+    })
+    attrs = {
+        **bleach.sanitizer.ALLOWED_ATTRIBUTES,
+        "a": ["href", "title", "name", "id", "target", "rel"],
+        "img": ["src", "alt", "title", "width", "height"],
+    }
+    raw = path.read_bytes().decode("utf-8", errors="ignore")
+    soup = BeautifulSoup(raw, "html.parser")
+    title = (soup.title.string.strip() if soup.title and soup.title.string else "") or path.name
+    for s in soup(["script", "style", "noscript"]):
+        s.decompose()
+    text = soup.get_text(" ", strip=True)
+    safe_html = bleach.clean(str(soup.body or soup), tags=tags, attributes=attrs, strip=True)
+    return title, text, safe_html
+
+
+def _streaming(path: Path) -> tuple[str, str, str]:
+    from app.services.html_extract import StreamingExtractor
+
+    parser = StreamingExtractor(path.name)
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK):
+            if not parser.feed_bytes(chunk):
+                break
+    page = parser.finish()
+    if page is None:
+        return "", "", ""
+    return page.title, page.text, page.safe_html
+
+
+def _current_rss_kib() -> int:
+    with Path("/proc/self/status").open() as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(impl: str, path: Path) -> None:
+    import bleach  # noqa: F401  (import cost is not part of the measurement)
+    from bs4 import BeautifulSoup  # noqa: F401
+
+    from app.services import html_extract  # noqa: F401
+
+    base = _current_rss_kib()
+    t0 = time.perf_counter()
+    title, text, safe_html = (_legacy if impl == "legacy" else _streaming)(path)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "rss_kib": peak - base, "text": len(text), "html": len(safe_html)}))
+
+
+def run(paths: list[Path], unbounded: bool) -> None:
+    env = dict(os.environ)
+    if unbounded:
+        env.update(HTML_EXTRACT_MAX_INPUT_BYTES=str(2**40), HTML_EXTRACT_MAX_TEXT_CHARS=str(2**40),
+                   HTML_EXTRACT_MAX_HTML_CHARS=str(2**40), HTML_EXTRACT_TIME_LIMIT_SECS="1e9")
+    for path in paths:
+        mib = path.stat().st_size / 2**20
+        for impl in ("legacy", "streaming"):
+            out = subprocess.run(
+                [sys.executable, "-m", "app.scripts.bench_html_extract", "--worker", impl, str(path)],
+                capture_output=True, text=True, env=env, check=True,
+            )
+            r = json.loads(out.stdout)
+            print(f"[bench] doc={path.name} size_mib={mib:.1f} impl={impl} "
+                  f"seconds={r['seconds']:.2f} throughput_mib_s={mib / r['seconds']:.1f} "
+                  f"peak_rss_mib={r['rss_kib'] / 1024:.0f} text_chars={r['text']} html_chars={r['html']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare HTML page extraction: BeautifulSoup + bleach vs the streaming extractor"
+    )
+    parser.add_argument("--corpus", help="Directory of .html files (default: a generated corpus)")
+    parser.add_argument("--unbounded", action="store_true", help="Lift the extraction caps for a like-for-like run")
+    parser.add_argument("--worker", nargs=2, metavar=("IMPL", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.worker[0], Path(args.worker[1]))
+        return
+    if args.corpus:
+        paths = sorted(p for p in Path(args.corpus).iterdir() if p.suffix in (".html", ".htm"))
+        run(paths, args.unbounded)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(build_corpus(Path(tmp)), args.unbounded)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[bench] Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
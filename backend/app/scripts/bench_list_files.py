@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.file import File
+from app.models.share_link import ShareLink
+from app.models.user import User
+from app.schemas.file import FileInfo, FileListResponse
+from app.services.inventory_export import LIST_COLUMNS, export_inventory, file_rows
+
+PAGE = 100
+
+
+async def _seed(db, files: int) -> str:
+    owner = str(uuid.uuid4())
+    await db.execute(insert(User).values(id=owner, email="bench@example.com", hashed_password="x"))
+    now = datetime.utcnow()
+    for start in range(0, files, 5000):
+        await db.execute(insert(File), [
+            {"id": str(uuid.uuid4()), "filename": f"report-{i:06d}.pdf", "content_type": "application/pdf",
+             "size": 1000 + i, "owner_id": owner, "created_at": now - timedelta(seconds=i),
+             "expires_at": now + timedelta(days=7), "bucket": "files", "object_name": f"obj-{i}"}
+            for i in range(start, min(start + 5000, files))
+        ])
+    file_ids = (await db.execute(select(File.id).where(File.owner_id == owner))).scalars().all()
+    await db.execute(insert(ShareLink), [  # a link on every third file, with some views
+        {"id": str(uuid.uuid4()), "file_id": file_id, "token": uuid.uuid4().hex, "created_at": now,
+         "expires_at": now + timedelta(days=7), "max_views": 10, "views": n % 10, "is_active": True}
+        for n, file_id in enumerate(file_ids[::3])
+    ])
+    await db.commit()
+    return owner
+
+
+async def _legacy_page(db, owner: str, skip: int) -> bytes:
+    """ORM entities, FileInfo.from_orm and FastAPI's response_model encoding, as list_files did before."""
+    rows = (await db.execute(
+        select(File).where(File.owner_id == owner).order_by(File.created_at.desc()).offset(skip).limit(PAGE)
+    )).scalars().all()
+    resp = FileListResponse(files=[FileInfo.from_orm(r) for r in rows], total=0, skip=skip, limit=PAGE)
+    validated, _ = FileListResponse.__fields__["files"].validate(resp.files, {}, loc=("response",))
+    return JSONResponse(jsonable_encoder({**resp.dict(), "files": validated})).body
+
+
+async def _lean_page(db, owner: str, skip: int) -> bytes:
+    rows = (await db.execute(
+        select(*LIST_COLUMNS).where(File.owner_id == owner).order_by(File.created_at.desc()).offset(skip).limit(PAGE)
+    )).all()
+    return ORJSONResponse({"files": file_rows(rows), "total": 0, "skip": skip, "limit": PAGE}).body
+
+
+async def _bench_pages(db, owner: str, rounds: int) -> None:
+    for name, page in (("legacy", _legacy_page), ("lean", _lean_page)):
+        latencies = []
+        for i in range(rounds):
+            t0 = time.perf_counter()
+            await page(db, owner, (i % 10) * PAGE)  # the first pages, as the UI shows them
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        print(f"[bench] list page_rows={PAGE} impl={name} p50_ms={statistics.median(latencies) * 1000:.2f} "
+              f"p99_ms={latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}")
+
+
+async def _bench_export(sessions, owner: str, files: int) -> None:
+    for fmt in ("ndjson", "csv"):
+        t0 = time.perf_counter()
+        size = 0
+        async for chunk in export_inventory(owner, fmt, sessions):
+            size += len(chunk)
+        elapsed = time.perf_counter() - t0
+        print(f"[bench] export format={fmt} files={files} rows_s={files / elapsed:.0f} "
+              f"throughput_mib_s={size / elapsed / 2**20:.1f} mib={size / 2**20:.1f}")
+
+
+async def run(files: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            owner = await _seed(db, files)
+            await _bench_pages(db, owner, rounds)
+        await _bench_export(sessions, owner, files)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare /files serialization: ORM + pydantic vs column rows + orjson; time the inventory export"
+    )
+    parser.add_argument("--files", type=int, default=50000, help="Rows to seed for one owner")
+    parser.add_argument("--rounds", type=int, default=200, help="100-row pages to time per implementation")
+    args = parser.parse_args()
+    asyncio.run(run(args.files, args.rounds))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[bench] Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.storage import MinioStorage, S3Storage, StorageBackend
+
+
+async def _download(backend: StorageBackend, bucket: str, name: str) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    size = 0
+    async for chunk in await backend.open(bucket, name):
+        size += len(chunk)
+    return time.perf_counter() - t0, size
+
+
+async def _bench(backend: StorageBackend, bucket: str, name: str, concurrency: int, rounds: int) -> None:
+    await _download(backend, bucket, name)  # warm up connections
+    latencies: list[float] = []
+    total_bytes = 0
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(_download(backend, bucket, name) for _ in range(concurrency)))
+        latencies.extend(r[0] for r in results)
+        total_bytes += sum(r[1] for r in results)
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    print(f"[bench] backend={backend.name} concurrency={concurrency} downloads={len(latencies)} "
+          f"throughput_mib_s={total_bytes / elapsed / 2**20:.1f} "
+          f"p50_ms={statistics.median(latencies) * 1000:.1f} "
+          f"p99_ms={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}")
+
+
+async def run(size_mib: int, concurrency: int, rounds: int) -> None:
+    bucket = settings.MINIO_BUCKET
+    name = f"bench-{uuid.uuid4()}"
+    threaded, native = MinioStorage(), S3Storage()
+    with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        tmp.write(os.urandom(size_mib * 2**20))
+    try:
+        await native.put_file(bucket, name, tmp.name, "application/octet-stream")
+        for backend in (threaded, native):
+            await _bench(backend, bucket, name, concurrency, rounds)
+    finally:
+        Path(tmp.name).unlink()
+        await native.delete(bucket, name)
+        await native.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare concurrent downloads: minio SDK in the threadpool vs the native asyncio client"
+    )
+    parser.add_argument("--size-mib", type=int, default=16, help="Size of the test object")
+    parser.add_argument("--concurrency", type=int, default=32, help="Simultaneous downloads per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mib, args.concurrency, args.rounds))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[bench] Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
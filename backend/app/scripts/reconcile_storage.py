@@ -0,0 +1,25 @@
+import argparse
+import asyncio
+import sys
+
+from app.tasks.reconcile import reconcile_pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile MinIO objects with the files table")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches (resumable)")
+    args = parser.parse_args()
+
+    report = asyncio.run(reconcile_pass(dry_run=args.dry_run, max_batches=args.max_batches))
+    print(f"[reconcile] scanned={report.objects_scanned} orphans={report.orphans_found} "
+          f"deleted={report.orphans_deleted} reclaimed_bytes={report.bytes_reclaimed} "
+          f"in_grace={report.in_grace} rows_without_object={report.dangling_rows} "
+          f"delete_errors={report.delete_errors} completed={report.completed}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[reconcile] Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
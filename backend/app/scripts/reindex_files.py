@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import sys
+
+from app.tasks.reindex import ReindexBusy, run_reindex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the file search index from storage (resumable)")
+    parser.add_argument("--restart", action="store_true", help="Discard a partial rebuild and start over")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches (resumable)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_reindex(restart=args.restart, max_batches=args.max_batches))
+    print(f"[reindex] scanned={report.files_scanned} indexed={report.indexed} skipped={report.skipped} "
+          f"failed={report.failed} batches={report.batches} cursor={report.cursor} completed={report.completed}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ReindexBusy as e:
+        print(f"[reindex] {e}", file=sys.stderr)
+        sys.exit(2)
+    except Exception as e:
+        print(f"[reindex] Unexpected error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.core.storage import storage
+from app.models.bulk_delete import BulkDeleteItem, BulkDeleteJob
+from app.services.object_cache import object_cache
+
+logger = logging.getLogger("secure-share")
+
+REMOVE_BATCH = 1000  # S3 DeleteObjects limit per request
+JOB_TTL_SECS = 3600
+# An unfinished job not touched for this long lost its worker and is resumed.
+STALE_SECS = int(os.getenv("BULK_DELETE_STALE_SECONDS", "300"))
+
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class BulkDeleteProgress:
+    id: str
+    owner_id: str
+    total: int
+    deleted: int
+    failed: list[str]
+    done: bool
+
+
+async def create_bulk_delete(db: AsyncSession, owner_id: str, objects: list[tuple[str, str, str]]) -> str:
+    """
+    Record a job for ``(file_id, bucket, object_name)`` objects in the caller's transaction.
+
+    Committing it together with the row deletes means no object is forgotten if the
+    process stops before ``start_bulk_delete`` runs; the leader resumes stale jobs.
+    """
+    job_id = str(uuid.uuid4())
+    db.add(BulkDeleteJob(id=job_id, owner_id=owner_id, total=len(objects)))
+    await db.flush()
+    await db.execute(insert(BulkDeleteItem), [
+        {"job_id": job_id, "file_id": file_id, "bucket": bucket, "object_name": name, "status": "pending"}
+        for file_id, bucket, name in objects
+    ])
+    return job_id
+
+
+async def _run(job_id: str) -> None:
+    deleted = failed = 0
+    async with SessionLocal() as db:
+        items = (await db.execute(
+            select(BulkDeleteItem.file_id, BulkDeleteItem.bucket, BulkDeleteItem.object_name)
+            .where(BulkDeleteItem.job_id == job_id, BulkDeleteItem.status == "pending")
+        )).all()
+        by_bucket: dict[str, list[tuple[str, str]]] = {}
+        for file_id, bucket, name in items:
+            by_bucket.setdefault(bucket, []).append((file_id, name))
+        object_cache.invalidate_many((bucket, name) for _, bucket, name in items)
+
+        try:
+            for bucket, pairs in by_bucket.items():
+                for i in range(0, len(pairs), REMOVE_BATCH):
+                    chunk = pairs[i:i + REMOVE_BATCH]
+                    try:
+                        missed = await storage.delete_many(bucket, [n for _, n in chunk])
+                    except Exception as e:
+                        logger.exception("Bulk delete batch failed bucket=%s: %s", bucket, e)
+                        missed = {n for _, n in chunk}
+                    for status, ids in (
+                        ("deleted", [fid for fid, n in chunk if n not in missed]),
+                        ("failed", [fid for fid, n in chunk if n in missed]),
+                    ):
+                        if ids:
+                            await db.execute(
+                                update(BulkDeleteItem)
+                                .where(BulkDeleteItem.job_id == job_id, BulkDeleteItem.file_id.in_(ids))
+                                .values(status=status)
+                            )
+                    await db.execute(
+                        update(BulkDeleteJob).where(BulkDeleteJob.id == job_id).values(updated_at=datetime.utcnow())
+                    )
+                    await db.commit()
+                    deleted += len(chunk) - len(missed)
+                    failed += len(missed)
+            now = datetime.utcnow()
+            await db.execute(
+                update(BulkDeleteJob).where(BulkDeleteJob.id == job_id).values(updated_at=now, finished_at=now)
+            )
+            await db.commit()
+        finally:
+            logger.info("bulk_delete_summary job=%s pending=%s deleted=%s failed=%s",
+                        job_id, len(items), deleted, failed)
+
+
+def start_bulk_delete(job_id: str) -> None:
+    """
+    Remove the pending objects of a committed job from storage in the background.
+
+    Rows are already gone by the time this runs; objects that fail to delete are
+    reported on the job and later collected by the storage reconciler.
+    """
+    task = asyncio.create_task(_run(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def get_bulk_delete_job(job_id: str) -> BulkDeleteProgress | None:
+    async with SessionLocal() as db:
+        job = (await db.execute(select(BulkDeleteJob).where(BulkDeleteJob.id == job_id))).scalars().first()
+        if job is None:
+            return None
+        counts = dict((await db.execute(
+            select(BulkDeleteItem.status, func.count())
+            .where(BulkDeleteItem.job_id == job_id)
+            .group_by(BulkDeleteItem.status)
+        )).all())
+        failed = (await db.execute(
+            select(BulkDeleteItem.file_id)
+            .where(BulkDeleteItem.job_id == job_id, BulkDeleteItem.status == "failed")
+        )).scalars().all()
+    return BulkDeleteProgress(
+        id=job.id,
+        owner_id=job.owner_id,
+        total=job.total,
+        deleted=counts.get("deleted", 0),
+        failed=list(failed),
+        done=job.finished_at is not None,
+    )
+
+
+async def maintain_bulk_deletes() -> None:
+    """Resume jobs whose worker stopped and drop jobs finished more than JOB_TTL_SECS ago."""
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        expired = select(BulkDeleteJob.id).where(BulkDeleteJob.finished_at < now - timedelta(seconds=JOB_TTL_SECS))
+        await db.execute(delete(BulkDeleteItem).where(BulkDeleteItem.job_id.in_(expired)))
+        await db.execute(delete(BulkDeleteJob).where(BulkDeleteJob.id.in_(expired)))
+        stale = (await db.execute(
+            update(BulkDeleteJob)
+            .where(
+                BulkDeleteJob.finished_at == None,
+                BulkDeleteJob.updated_at < now - timedelta(seconds=STALE_SECS),
+            )
+            .values(updated_at=now)
+            .returning(BulkDeleteJob.id)
+        )).scalars().all()
+        await db.commit()
+    for job_id in stale:
+        logger.warning("Resuming stale bulk delete job=%s", job_id)
+        start_bulk_delete(job_id)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+from collections.abc import AsyncIterator
+
+from app.core.storage import storage
+from app.monitoring.setup import report_download_coalesce
+
+logger = logging.getLogger("secure-share")
+
+RING_CHUNKS = int(os.getenv("COALESCE_RING_CHUNKS", "16"))
+IDLE_SECS = float(os.getenv("COALESCE_IDLE_SECS", "30"))
+
+
+class _Flight:
+    """
+    One storage stream shared by every concurrent full download of an object.
+
+    The producer reads ahead of the fastest subscriber by at most ``RING_CHUNKS``
+    chunks and keeps that many behind the head; a subscriber that falls further
+    back than the ring reaches continues on its own ranged stream instead of
+    slowing everyone else down.
+    """
+
+    def __init__(self, key: tuple[str, str]) -> None:
+        self.key = key
+        self.chunks: deque[bytes] = deque()
+        self.base = 0  # index of chunks[0]
+        self.positions: dict[int, int] = {}
+        self.done = False
+        self.error: BaseException | None = None
+        self.cond = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+        # Resolves once the storage stream is open, or with the error opening it.
+        self.opened: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self.opened.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._next_sub = 0
+
+    @property
+    def head(self) -> int:
+        return self.base + len(self.chunks)
+
+    def subscribe(self) -> int:
+        self._next_sub += 1
+        self.positions[self._next_sub] = 0
+        return self._next_sub
+
+    async def run(self, bucket: str, object_name: str) -> None:
+        try:
+            body = await storage.open(bucket, object_name)
+        except asyncio.CancelledError:
+            self.done = True
+            self.opened.cancel()
+            raise
+        except Exception as e:
+            self.done = True
+            self.opened.set_exception(e)
+            return
+        self.opened.set_result(None)
+        await self.produce(body)
+
+    async def produce(self, body: AsyncIterator[bytes]) -> None:
+        try:
+            while True:
+                async with self.cond:
+                    # Pace on the fastest subscriber; give up if nobody makes progress.
+                    await asyncio.wait_for(
+                        self.cond.wait_for(
+                            lambda: not self.positions or self.head - max(self.positions.values()) < RING_CHUNKS
+                        ),
+                        IDLE_SECS,
+                    )
+                    if not self.positions:
+                        break
+                try:
+                    chunk = await body.__anext__()
+                except StopAsyncIteration:
+                    break
+                async with self.cond:
+                    self.chunks.append(chunk)
+                    if len(self.chunks) > RING_CHUNKS:
+                        self.chunks.popleft()
+                        self.base += 1
+                    self.cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            await body.aclose()
+            async with self.cond:
+                self.done = True
+                self.cond.notify_all()
+
+    async def consume(self, sub: int, bucket: str, object_name: str) -> AsyncIterator[bytes]:
+        sent = 0
+        try:
+            while True:
+                async with self.cond:
+                    await self.cond.wait_for(
+                        lambda: self.positions[sub] < self.head or self.positions[sub] < self.base or self.done
+                    )
+                    pos = self.positions[sub]
+                    if pos < self.base or (pos >= self.head and self.error is not None):
+                        break  # fell out of the ring, or the shared stream failed
+                    if pos >= self.head:
+                        return
+                    chunk = self.chunks[pos - self.base]
+                    self.positions[sub] = pos + 1
+                    self.cond.notify_all()
+                yield chunk
+                sent += len(chunk)
+        finally:
+            async with self.cond:
+                self.positions.pop(sub, None)
+                self.cond.notify_all()
+
+        report_download_coalesce("fallback")
+        async for chunk in await storage.open(bucket, object_name, sent):
+            yield chunk
+
+
+class DownloadCoalescer:
+    """Single-flight fan-out of full-object downloads, keyed by bucket/object name."""
+
+    def __init__(self) -> None:
+        self._flights: dict[tuple[str, str], _Flight] = {}
+
+    async def open(self, bucket: str, object_name: str) -> AsyncIterator[bytes]:
+        """
+        Like ``storage.open(bucket, object_name)``, but joins a stream of the same
+        object that is already in flight (or still being opened) when its first chunk
+        is still buffered. The flight is registered before the open is awaited, so a
+        burst of requests costs one open; they all get its error if it fails.
+        Object names are never reused, so no ETag check is needed.
+        """
+        key = (bucket, object_name)
+        flight = self._joinable(key)
+        if flight is not None:
+            report_download_coalesce("joined")
+        else:
+            flight = _Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(flight.run(bucket, object_name))
+            flight.task.add_done_callback(lambda _: self._land(flight))
+            report_download_coalesce("started")
+        # Subscribed before the wait, so the producer does not take the flight for abandoned.
+        sub = flight.subscribe()
+        try:
+            await asyncio.shield(flight.opened)
+        except BaseException:
+            flight.positions.pop(sub, None)
+            raise
+        return flight.consume(sub, bucket, object_name)
+
+    def _joinable(self, key: tuple[str, str]) -> _Flight | None:
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done and flight.base == 0:
+            return flight
+        return None
+
+    def _land(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+
+download_coalescer = DownloadCoalescer()
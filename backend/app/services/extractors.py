@@ -0,0 +1,208 @@
+"""
+Text extractors for the file index, one per document kind.
+
+Each extractor turns a file's (decrypted, decompressed) byte stream into an
+``Extracted`` title and text. Plain text, source code, CSV/JSON/XML and HTML are
+read as streams and cut at their ``max_bytes``; DOCX/ODT (zipped XML) and PDF need
+the whole file, so they are spooled to disk and skipped when larger than their cap.
+Caps are ``INDEX_MAX_BYTES_<KIND>``. PDF needs the optional ``pypdf`` package.
+"""
+from __future__ import annotations
+
+import codecs
+import os
+import tempfile
+import zipfile
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from xml.etree import ElementTree
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.html_extract import MAX_INPUT_BYTES, MAX_TEXT_CHARS, Extracted, extract_html
+
+try:
+    import pypdf
+except ImportError:  # optional dependency
+    pypdf = None
+
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".csv", ".tsv", ".log", ".json", ".ndjson", ".yaml", ".yml", ".ini", ".toml", ".sql",
+    ".py", ".js", ".ts", ".java", ".c", ".cpp", ".h", ".hpp", ".cs", ".go", ".rb", ".rs", ".swift", ".kt",
+    ".php", ".sh", ".bat", ".ps1", ".css",
+}
+
+_DC_TITLE = "{http://purl.org/dc/elements/1.1/}title"
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_ODF_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+def _cap(kind: str, default: int) -> int:
+    return int(os.getenv(f"INDEX_MAX_BYTES_{kind.upper()}", str(default)))
+
+
+async def _close(body: AsyncIterator[bytes]) -> None:
+    aclose = getattr(body, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+# -- streamed kinds ---------------------------------------------------------------
+
+async def _text(body: AsyncIterator[bytes], title: str, max_bytes: int) -> Extracted:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parts: list[str] = []
+    read = chars = 0
+    truncated = False
+    try:
+        async for chunk in body:
+            if read + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - read]
+                truncated = True
+            read += len(chunk)
+            piece = decoder.decode(chunk)
+            if chars + len(piece) > MAX_TEXT_CHARS:
+                piece = piece[:MAX_TEXT_CHARS - chars]
+                truncated = True
+            parts.append(piece)
+            chars += len(piece)
+            if truncated:
+                break
+    finally:
+        await _close(body)
+    if not truncated:
+        parts.append(decoder.decode(b"", final=True))
+    return Extracted(title, "".join(parts), "", truncated)
+
+
+async def _xml(body: AsyncIterator[bytes], title: str, max_bytes: int) -> Extracted | None:
+    return await extract_html(body, title, max_bytes, keep_html=False)
+
+
+async def _html(body: AsyncIterator[bytes], title: str, max_bytes: int) -> Extracted | None:
+    return await extract_html(body, title, max_bytes)
+
+
+# -- whole-file kinds -------------------------------------------------------------
+
+def _dc_title(z: zipfile.ZipFile, member: str) -> str | None:
+    try:
+        with z.open(member) as f:
+            for _, elem in ElementTree.iterparse(f):
+                if elem.tag == _DC_TITLE and elem.text and elem.text.strip():
+                    return elem.text.strip()
+    except (KeyError, ElementTree.ParseError):
+        pass
+    return None
+
+
+def _xml_blocks(f, title: str, block_tags: set[str], text_tag: str | None = None) -> Extracted:
+    """Text of every block element (paragraph, heading) of a document XML, one per line."""
+    lines: list[str] = []
+    chars = 0
+    for _, elem in ElementTree.iterparse(f):
+        if elem.tag not in block_tags:
+            continue
+        if text_tag is None:
+            line = "".join(elem.itertext())
+        else:
+            line = "".join(t.text or "" for t in elem.iter(text_tag))
+        elem.clear()
+        if not line:
+            continue
+        if chars + len(line) > MAX_TEXT_CHARS:
+            lines.append(line[:MAX_TEXT_CHARS - chars])
+            return Extracted(title, "\n".join(lines), "", truncated=True)
+        lines.append(line)
+        chars += len(line) + 1
+    return Extracted(title, "\n".join(lines), "")
+
+
+def _docx(path: str, title: str) -> Extracted:
+    with zipfile.ZipFile(path) as z:
+        title = _dc_title(z, "docProps/core.xml") or title
+        with z.open("word/document.xml") as f:
+            return _xml_blocks(f, title, {_W + "p"}, _W + "t")
+
+
+def _odt(path: str, title: str) -> Extracted:
+    with zipfile.ZipFile(path) as z:
+        title = _dc_title(z, "meta.xml") or title
+        with z.open("content.xml") as f:
+            return _xml_blocks(f, title, {_ODF_TEXT + "p", _ODF_TEXT + "h"})
+
+
+def _pdf(path: str, title: str) -> Extracted:
+    reader = pypdf.PdfReader(path)
+    meta = reader.metadata
+    if meta is not None and meta.title and meta.title.strip():
+        title = meta.title.strip()
+    pages: list[str] = []
+    chars = 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if chars + len(text) > MAX_TEXT_CHARS:
+            pages.append(text[:MAX_TEXT_CHARS - chars])
+            return Extracted(title, "\n".join(pages), "", truncated=True)
+        pages.append(text)
+        chars += len(text) + 1
+    return Extracted(title, "\n".join(pages), "")
+
+
+def _whole_file(parse: Callable[[str, str], Extracted]):
+    async def run(body: AsyncIterator[bytes], title: str, max_bytes: int) -> Extracted | None:
+        fd, path = tempfile.mkstemp(prefix="secureshare-index-")
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as out:
+                async for chunk in body:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        return None
+                    await run_in_threadpool(out.write, chunk)
+            return await run_in_threadpool(parse, path, title)
+        finally:
+            await _close(body)
+            Path(path).unlink()
+    return run
+
+
+@dataclass(frozen=True)
+class Extractor:
+    kind: str
+    extensions: frozenset[str]
+    content_types: tuple[str, ...]
+    max_bytes: int
+    run: Callable[[AsyncIterator[bytes], str, int], Awaitable[Extracted | None]]
+    whole_file: bool = False
+
+
+EXTRACTORS = [
+    Extractor("html", frozenset({".html", ".htm"}), ("text/html",), _cap("html", MAX_INPUT_BYTES), _html),
+    Extractor("xml", frozenset({".xml", ".svg"}), ("application/xml", "text/xml", "image/svg+xml"),
+              _cap("xml", 16 * 1024 * 1024), _xml),
+    Extractor("text", frozenset(TEXT_EXTENSIONS), ("text/", "application/json", "application/x-ndjson"),
+              _cap("text", 16 * 1024 * 1024), _text),
+    Extractor("docx", frozenset({".docx"}),
+              ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",),
+              _cap("docx", 32 * 1024 * 1024), _whole_file(_docx), whole_file=True),
+    Extractor("odt", frozenset({".odt"}), ("application/vnd.oasis.opendocument.text",),
+              _cap("odt", 32 * 1024 * 1024), _whole_file(_odt), whole_file=True),
+]
+if pypdf is not None:
+    EXTRACTORS.append(Extractor("pdf", frozenset({".pdf"}), ("application/pdf",),
+                                _cap("pdf", 32 * 1024 * 1024), _whole_file(_pdf), whole_file=True))
+
+
+def extractor_for(filename: str | None, content_type: str | None) -> Extractor | None:
+    """The extractor for a file, by extension first and then by content type."""
+    ext = Path(filename or "").suffix.lower()
+    for ex in EXTRACTORS:
+        if ext in ex.extensions:
+            return ex
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    for ex in EXTRACTORS:
+        if ctype and ctype.startswith(ex.content_types):
+            return ex
+    return None
@@ -0,0 +1,163 @@
+"""
+Full-text index of uploaded files.
+
+Uploads are queued and indexed by a small pool of background workers
+(``INDEX_WORKERS``), so extraction never holds up the upload response. Each file's
+text goes into ``file_text``, the external content of the ``file_fts`` FTS5 index;
+HTML files additionally get a ``web_pages`` row and their sanitized HTML for
+``/pages``. The queue is per process and bounded by ``INDEX_QUEUE_MAX``; files that
+do not make it in are picked up by the re-indexer.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import zlib
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.codecs import decompress_stream
+from app.core.database import SessionLocal
+from app.core.encryption import FileKey, decrypt_stream
+from app.core.storage import storage
+from app.models.file import File
+from app.models.file_text import FileText
+from app.models.web_page import WebPage, WebPageHtml
+from app.monitoring.setup import report_index_done, report_index_queue, report_index_started
+from app.services.extractors import extractor_for
+from app.services.html_extract import Extracted
+from app.services.page_cache import page_cache
+
+logger = logging.getLogger("secure-share")
+
+WORKERS = int(os.getenv("INDEX_WORKERS", "2"))
+QUEUE_MAX = int(os.getenv("INDEX_QUEUE_MAX", "1000"))
+
+
+def fts_query(q: str) -> str | None:
+    """User input as an FTS5 query: every word quoted, all required."""
+    terms = ['"' + t.replace('"', '""') + '"' for t in q.split()]
+    return " ".join(terms) if terms else None
+
+
+async def open_plain(file: File) -> AsyncIterator[bytes]:
+    """The original bytes of a stored file, decrypted and decompressed as needed."""
+    key = FileKey.from_header(file.encryption_header) if file.encryption_header else None
+    if key is not None:
+        stat = await storage.stat(file.bucket, file.object_name)
+    body = await storage.open(file.bucket, file.object_name)
+    if key is not None:
+        body = decrypt_stream(key, body, 0, key.segment_count(stat.size), stat.size)
+    if file.content_encoding:
+        body = decompress_stream(file.content_encoding, body)
+    return body
+
+
+async def store_web_page(db: AsyncSession, file: File, title: str, safe_html: str) -> None:
+    """Create or update the ``/pages`` entry of an HTML file."""
+    existing = await db.execute(select(WebPage).where(WebPage.file_id == str(file.id)))
+    page = existing.scalars().first()
+    if page is None:
+        page = WebPage(file_id=str(file.id), title=title)
+        db.add(page)
+        await db.flush()
+    else:
+        page.title = title
+        page.updated_at = datetime.utcnow()
+    await db.merge(WebPageHtml(page_id=page.id, data=zlib.compress(safe_html.encode("utf-8"))))
+    page_cache.invalidate(page.id)
+
+
+async def extract_file(file: File) -> tuple[str, str, Extracted | None]:
+    """
+    Extract the text of one file. Returns ``(kind, outcome, doc)`` with outcome one of
+    indexed, truncated, skipped, unsupported; ``doc`` is None unless there is text to store.
+    """
+    extractor = extractor_for(file.filename, file.content_type)
+    if extractor is None:
+        return "none", "unsupported", None
+    if extractor.whole_file and (file.size or 0) > extractor.max_bytes:
+        return extractor.kind, "skipped", None
+
+    doc = await extractor.run(await open_plain(file), file.filename or "", extractor.max_bytes)
+    if doc is None:
+        logger.warning("Skipped indexing %s: it exceeds the %s extraction limits", file.filename, extractor.kind)
+        return extractor.kind, "skipped", None
+    return extractor.kind, "truncated" if doc.truncated else "indexed", doc
+
+
+async def index_file(db: AsyncSession, file: File) -> tuple[str, str]:
+    """Extract and store the text of one file; the caller commits. Returns ``(kind, outcome)``."""
+    kind, outcome, doc = await extract_file(file)
+    if doc is None:
+        return kind, outcome
+
+    # Triggers on file_text keep file_fts in step.
+    existing = await db.execute(select(FileText).where(FileText.file_id == str(file.id)))
+    row = existing.scalars().first()
+    if row is None:
+        db.add(FileText(file_id=str(file.id), title=doc.title, body=doc.text))
+    else:
+        row.title, row.body = doc.title, doc.text
+    if kind == "html":
+        await store_web_page(db, file, doc.title, doc.safe_html)
+    return kind, outcome
+
+
+class IndexQueue:
+    """Bounded queue of file ids drained by ``WORKERS`` background tasks."""
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[tuple[str, float]] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(QUEUE_MAX)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(WORKERS)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def enqueue(self, file_id: str) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((file_id, time.monotonic()))
+        except asyncio.QueueFull:
+            logger.warning("Index queue full; file %s left for the re-indexer", file_id)
+            report_index_done("none", "dropped", 0, 0.0)
+        report_index_queue(self._queue.qsize())
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            file_id, queued_at = await queue.get()
+            report_index_started(time.monotonic() - queued_at, queue.qsize())
+            t0 = time.monotonic()
+            kind, outcome, size = "none", "failed", 0
+            try:
+                async with SessionLocal() as db:
+                    file = await db.get(File, file_id)
+                    if file is None:
+                        outcome = "deleted"
+                    else:
+                        size = file.size or 0
+                        kind, outcome = await index_file(db, file)
+                        await db.commit()
+            except Exception as e:
+                logger.exception("Indexing failed for file %s: %s", file_id, e)
+            finally:
+                report_index_done(kind, outcome, size, time.monotonic() - t0)
+                queue.task_done()
+
+
+index_queue = IndexQueue()
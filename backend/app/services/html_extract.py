@@ -0,0 +1,233 @@
+"""
+Single-pass extraction of title, plain text and sanitized HTML from uploaded pages.
+
+The document is fed to an incremental ``html.parser`` in chunks as it streams out of
+storage; text is collected and allowed markup re-emitted in the same pass, so no tree
+is built and memory stays bounded by the output caps rather than the input size. The
+output matches what ``bleach.clean(..., strip=True)`` produced for the old
+BeautifulSoup pipeline: unknown tags are dropped but their text kept, attributes are
+filtered per tag and URLs limited to http(s) and mailto.
+
+Input size, collected text, sanitized HTML and wall time are capped. What happens to
+a page that hits a cap is ``HTML_EXTRACT_OVERFLOW``: ``truncate`` keeps what was
+extracted so far, ``title`` indexes only the title and ``skip`` does not index the page.
+"""
+from __future__ import annotations
+
+import codecs
+import os
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from html import escape
+from html.parser import HTMLParser
+
+from starlette.concurrency import run_in_threadpool
+
+MAX_INPUT_BYTES = int(os.getenv("HTML_EXTRACT_MAX_INPUT_BYTES", str(32 * 1024 * 1024)))
+MAX_TEXT_CHARS = int(os.getenv("HTML_EXTRACT_MAX_TEXT_CHARS", str(2 * 1024 * 1024)))
+MAX_HTML_CHARS = int(os.getenv("HTML_EXTRACT_MAX_HTML_CHARS", str(4 * 1024 * 1024)))
+TIME_LIMIT_SECS = float(os.getenv("HTML_EXTRACT_TIME_LIMIT_SECS", "10"))
+OVERFLOW = os.getenv("HTML_EXTRACT_OVERFLOW", "truncate")
+
+ALLOWED_TAGS = frozenset({
+    "a", "abbr", "acronym", "b", "blockquote", "code", "em", "i", "li", "ol", "strong", "ul",
+    "p", "div", "span", "br", "hr", "pre",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+    "cite", "table", "thead", "tbody", "tr", "th", "td",
+    "img",
+})
+ALLOWED_ATTRS = {
+    "a": {"href", "title", "name", "id", "target", "rel"},
+    "abbr": {"title"},
+    "acronym": {"title"},
+    "img": {"src", "alt", "title", "width", "height"},
+}
+ALLOWED_PROTOCOLS = frozenset({"http", "https", "mailto"})
+URI_ATTRS = frozenset({"href", "src"})
+VOID_TAGS = frozenset({"br", "hr", "img"})
+SKIP_TAGS = frozenset({"script", "style", "noscript"})
+# Tags whose end tag is optional: opening another one closes the previous.
+IMPLIED_END = frozenset({"p", "li", "tr", "td", "th"})
+
+
+@dataclass
+class Extracted:
+    title: str
+    text: str
+    safe_html: str
+    truncated: bool = False
+
+
+def _allowed_url(value: str) -> bool:
+    scheme, sep, _ = value.strip().partition(":")
+    if not sep or "/" in scheme or "?" in scheme or "#" in scheme:
+        return True  # relative
+    return scheme.lower() in ALLOWED_PROTOCOLS
+
+
+class StreamingExtractor(HTMLParser):
+    """
+    Feed bytes with ``feed_bytes``; ``finish`` returns the result (None when skipped).
+    With ``keep_html=False`` only title and text are collected (XML documents).
+    """
+
+    def __init__(self, fallback_title: str, max_input_bytes: int = MAX_INPUT_BYTES, keep_html: bool = True) -> None:
+        super().__init__(convert_charrefs=True)
+        self.fallback_title = fallback_title
+        self.max_input_bytes = max_input_bytes
+        self.keep_html = keep_html
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.deadline = time.monotonic() + TIME_LIMIT_SECS
+        self.input_bytes = 0
+        self.limit: str | None = None  # which cap was hit
+        self.title: str | None = None
+        self._in_title = False
+        self._skip = 0
+        self._pending: list[str] = []  # text node being assembled across chunks
+        self._text: list[str] = []
+        self._text_chars = 0
+        self._html: list[str] = []
+        self._html_chars = 0
+        self._open: list[str] = []
+        self._body = False
+        self._after_body = False
+
+    # -- input ----------------------------------------------------------------------
+
+    def feed_bytes(self, data: bytes) -> bool:
+        """Parse another chunk; False once a cap is hit and reading should stop."""
+        if self.limit:
+            return False
+        room = self.max_input_bytes - self.input_bytes
+        if len(data) > room:
+            data = data[:room]
+            self.limit = "input"
+        self.input_bytes += len(data)
+        self.feed(self.decoder.decode(data))
+        if not self.limit and time.monotonic() > self.deadline:
+            self.limit = "time"
+        return not self.limit
+
+    def finish(self) -> Extracted | None:
+        if not self.limit:
+            self.feed(self.decoder.decode(b"", final=True))
+            self.close()
+        self._flush_text()
+        self._close_tags(len(self._open))
+        title = (self.title or "").strip() or self.fallback_title
+        if not self.limit:
+            return Extracted(title, " ".join(self._text), "".join(self._html))
+        if OVERFLOW == "skip":
+            return None
+        if OVERFLOW == "title":
+            return Extracted(title, title, "", truncated=True)
+        return Extracted(title, " ".join(self._text), "".join(self._html), truncated=True)
+
+    # -- output ---------------------------------------------------------------------
+
+    def _emit(self, markup: str) -> None:
+        if not self.keep_html or self._after_body or self.limit:
+            return
+        if self._html_chars + len(markup) > MAX_HTML_CHARS:
+            self.limit = "html"
+            return
+        self._html.append(markup)
+        self._html_chars += len(markup)
+
+    def _flush_text(self) -> None:
+        if not self._pending:
+            return
+        node = "".join(self._pending).strip()
+        self._pending.clear()
+        if not node or self.limit:
+            return
+        if self._text_chars + len(node) + 1 > MAX_TEXT_CHARS:
+            node = node[:max(0, MAX_TEXT_CHARS - self._text_chars - 1)]
+            self.limit = "text"
+        if node:
+            self._text.append(node)
+            self._text_chars += len(node) + 1
+
+    def _close_tags(self, count: int) -> None:
+        for _ in range(count):
+            self._emit(f"</{self._open.pop()}>")
+
+    # -- parser callbacks -----------------------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush_text()
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if self._skip:
+            return
+        if tag == "title" and self.title is None:
+            self._in_title = True
+            self.title = ""
+        elif tag == "body" and not self._body:
+            # Only the body is kept, as str(soup.body) did; drop what came before it.
+            self._body = True
+            self._html.clear()
+            self._html_chars = 0
+            self._open.clear()
+        if tag not in ALLOWED_TAGS:
+            return
+        if tag in IMPLIED_END and self._open and self._open[-1] == tag:
+            self._close_tags(1)
+        allowed = ALLOWED_ATTRS.get(tag, ())
+        parts = [tag]
+        for name, value in sorted(attrs, key=lambda a: a[0]):
+            if name not in allowed:
+                continue
+            value = value or ""
+            if name in URI_ATTRS and not _allowed_url(value):
+                continue
+            parts.append(f'{name}="{escape(value)}"')
+        self._emit(f"<{' '.join(parts)}>")
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush_text()
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if self._skip:
+            return
+        if tag == "title":
+            self._in_title = False
+        elif tag == "body" and self._body:
+            self._close_tags(len(self._open))
+            self._after_body = True
+        if tag in self._open:
+            # Close it along with anything left open inside it.
+            self._close_tags(self._open[::-1].index(tag) + 1)
+
+    def handle_data(self, data: str) -> None:
+        if self._skip or self.limit:
+            return
+        if self._in_title:
+            self.title += data
+        self._pending.append(data)
+        self._emit(escape(data, quote=False))
+
+
+async def extract_html(body: AsyncIterator[bytes], fallback_title: str, max_input_bytes: int = MAX_INPUT_BYTES,
+                       keep_html: bool = True) -> Extracted | None:
+    """Run the extractor over a byte stream, closing the stream once done or capped."""
+    parser = StreamingExtractor(fallback_title, max_input_bytes, keep_html)
+    try:
+        async for chunk in body:
+            if not await run_in_threadpool(parser.feed_bytes, chunk):
+                break
+    finally:
+        aclose = getattr(body, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return await run_in_threadpool(parser.finish)
@@ -0,0 +1,102 @@
+"""
+A user's whole file inventory (files, their share links and view counts) as NDJSON or CSV.
+
+Files are read in keyset batches of ``EXPORT_BATCH_SIZE`` by id, each in its own short
+session, and every batch is encoded and yielded before the next is read; memory stays
+flat however many files a user has and no connection is held while the client reads.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable
+
+import orjson
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.file import File
+from app.models.share_link import ShareLink
+
+BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Columns of a FileInfo, selected as plain rows so a listing skips ORM entities and pydantic.
+LIST_COLUMNS = (File.id, File.filename, File.content_type, File.size, File.created_at, File.expires_at)
+LIST_FIELDS = tuple(c.key for c in LIST_COLUMNS)
+LINK_COLUMNS = (ShareLink.token, ShareLink.created_at, ShareLink.expires_at, ShareLink.views,
+                ShareLink.max_views, ShareLink.is_active)
+LINK_FIELDS = tuple(c.key for c in LINK_COLUMNS)
+
+CSV_HEADER = (*LIST_FIELDS, "views", *(f"link_{f}" for f in LINK_FIELDS))
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def file_rows(rows) -> list[dict]:
+    """``LIST_COLUMNS`` rows as FileInfo-shaped dicts, ready for orjson."""
+    return [dict(zip(LIST_FIELDS, r, strict=True)) for r in rows]
+
+
+async def inventory_batches(owner_id: str, sessions: Callable = SessionLocal) -> AsyncIterator[list[dict]]:
+    """
+    The owner's files in id order, BATCH_SIZE at a time, each with ``views`` (summed
+    over its links) and ``share_links``.
+    """
+    after = ""
+    while True:
+        async with sessions() as db:
+            files = file_rows((await db.execute(
+                select(*LIST_COLUMNS)
+                .where(File.owner_id == owner_id, File.id > after)
+                .order_by(File.id)
+                .limit(BATCH_SIZE)
+            )).all())
+            if not files:
+                return
+            links = defaultdict(list)
+            rows = await db.execute(
+                select(ShareLink.file_id, *LINK_COLUMNS)
+                .where(ShareLink.file_id.in_([f["id"] for f in files]))
+                .order_by(ShareLink.file_id, ShareLink.created_at)
+            )
+            for file_id, *link in rows:
+                links[file_id].append(dict(zip(LINK_FIELDS, link, strict=True)))
+        for f in files:
+            file_links = links.get(f["id"], [])
+            f["views"] = sum(link["views"] or 0 for link in file_links)
+            f["share_links"] = file_links
+        yield files
+        after = files[-1]["id"]
+
+
+def _csv_value(value) -> object:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_csv(files: list[dict]) -> bytes:
+    """One row per share link, file columns repeated; files without links get one row."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for f in files:
+        head = [_csv_value(f[k]) for k in LIST_FIELDS] + [f["views"]]
+        for link in f["share_links"] or [None]:
+            tail = [_csv_value(link[k]) for k in LINK_FIELDS] if link else [""] * len(LINK_FIELDS)
+            writer.writerow(head + tail)
+    return buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(files: list[dict]) -> bytes:
+    return b"".join(orjson.dumps(f, option=orjson.OPT_APPEND_NEWLINE) for f in files)
+
+
+async def export_inventory(owner_id: str, fmt: str, sessions: Callable = SessionLocal) -> AsyncIterator[bytes]:
+    """Encoded chunks of the inventory, one per batch; CSV starts with a header row."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerow(CSV_HEADER)
+        yield buf.getvalue().encode("utf-8")
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    async for files in inventory_batches(owner_id, sessions):
+        yield encode(files)
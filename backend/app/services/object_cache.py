@@ -0,0 +1,312 @@
+"""
+Tiered cache of download bodies in front of object storage.
+
+Small objects live in a memory LRU, mid-size ones in a local disk directory with its
+own byte budget; anything larger always streams from storage. Entries are keyed by
+bucket/object name (names are never reused and deletes invalidate) and keep the object's
+stat, so a hit needs no storage call at all. Admission follows TinyLFU: when a tier is full, a new
+object only gets in if it has been requested more often (per a decaying count-min
+sketch) than every entry it would evict, so one-off downloads cannot flush out the
+share links that many recipients are opening.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.storage import CHUNK_SIZE, ObjectStat, iter_file_range
+from app.monitoring.setup import (
+    report_object_cache,
+    report_object_cache_saved,
+    report_object_cache_usage,
+)
+
+logger = logging.getLogger("secure-share")
+
+MEMORY_BYTES = int(os.getenv("OBJECT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+MEMORY_MAX_ITEM = int(os.getenv("OBJECT_CACHE_MEMORY_MAX_ITEM", str(1024 * 1024)))
+DISK_BYTES = int(os.getenv("OBJECT_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+DISK_MAX_ITEM = int(os.getenv("OBJECT_CACHE_DISK_MAX_ITEM", str(64 * 1024 * 1024)))
+CACHE_DIR = os.getenv("OBJECT_CACHE_DIR", str(Path(tempfile.gettempdir()) / "secureshare-cache"))
+SKETCH_WIDTH = 1 << 14
+
+
+class FrequencySketch:
+    """Count-min sketch of 4-bit counters, halved every ``10 * width`` increments."""
+
+    DEPTH = 4
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+        self.rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self.additions = 0
+        self.sample_size = 10 * width
+
+    def _indexes(self, key: str) -> list[int]:
+        return [hash((seed, key)) % self.width for seed in range(self.DEPTH)]
+
+    def increment(self, key: str) -> None:
+        for row, i in zip(self.rows, self._indexes(key), strict=True):
+            if row[i] < 15:
+                row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            for row in self.rows:
+                for i in range(self.width):
+                    row[i] >>= 1
+            self.additions //= 2
+
+    def estimate(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self.rows, self._indexes(key), strict=True))
+
+
+class _Tier:
+    """LRU of ``key -> (size, (stat, value))`` with a byte budget and TinyLFU admission."""
+
+    def __init__(self, name: str, capacity: int, max_item: int) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.max_item = max_item
+        self.entries: OrderedDict[str, tuple[int, tuple]] = OrderedDict()
+        self.used = 0
+
+    def fits(self, size: int) -> bool:
+        return 0 < size <= self.max_item and size <= self.capacity
+
+    def victims(self, key: str, size: int, sketch: FrequencySketch) -> list[str] | None:
+        """Entries to evict so ``key`` fits, or None if admission is refused."""
+        need = self.used + size - self.capacity
+        freq = sketch.estimate(key)
+        out: list[str] = []
+        for victim, (vsize, _) in self.entries.items():
+            if need <= 0:
+                break
+            if freq <= sketch.estimate(victim):
+                return None
+            out.append(victim)
+            need -= vsize
+        return out
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def add(self, key: str, size: int, value) -> None:
+        self.entries[key] = (size, value)
+        self.used += size
+
+    def pop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.used -= entry[0]
+        return entry[1]
+
+
+@dataclass
+class CacheHit:
+    tier: str
+    size: int
+    stat: ObjectStat
+    data: bytes | None = None
+    file: BinaryIO | None = None
+
+    async def iter_range(self, offset: int = 0, length: int | None = None) -> AsyncIterator[bytes]:
+        sent = 0
+        try:
+            if self.file is not None:
+                async for chunk in iter_file_range(self.file, offset, length):
+                    sent += len(chunk)
+                    yield chunk
+                return
+            end = self.size if length is None else min(self.size, offset + length)
+            view = memoryview(self.data)
+            for pos in range(offset, end, CHUNK_SIZE):
+                chunk = bytes(view[pos:min(pos + CHUNK_SIZE, end)])
+                sent += len(chunk)
+                yield chunk
+        finally:
+            report_object_cache_saved(sent)
+
+
+def _key(bucket: str, object_name: str) -> str:
+    return f"{bucket}/{object_name}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ObjectCache:
+    def __init__(self) -> None:
+        self.enabled = settings.STORAGE_BACKEND != "local" and (MEMORY_BYTES > 0 or DISK_BYTES > 0)
+        self.sketch = FrequencySketch(SKETCH_WIDTH)
+        self.memory = _Tier("memory", MEMORY_BYTES, MEMORY_MAX_ITEM)
+        self.disk = _Tier("disk", DISK_BYTES, DISK_MAX_ITEM)
+        self._filling: set[str] = set()
+        self._dir: Path | None = None
+
+    def _cache_dir(self) -> Path:
+        # One directory per process; directories left by dead processes are removed.
+        if self._dir is None:
+            root = Path(CACHE_DIR)
+            root.mkdir(parents=True, exist_ok=True)
+            for d in root.iterdir():
+                if d.name.isdigit() and int(d.name) != os.getpid() and not _pid_alive(int(d.name)):
+                    shutil.rmtree(d, ignore_errors=True)
+            self._dir = root / str(os.getpid())
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir.mkdir()
+        return self._dir
+
+    def stat(self, bucket: str, object_name: str) -> ObjectStat | None:
+        """The cached object's stat, standing in for a storage ``stat`` on a hit."""
+        if not self.enabled:
+            return None
+        key = _key(bucket, object_name)
+        for tier in (self.memory, self.disk):
+            entry = tier.entries.get(key)
+            if entry is not None:
+                return entry[1][0]
+        return None
+
+    async def get(self, bucket: str, object_name: str) -> CacheHit | None:
+        if not self.enabled:
+            return None
+        key = _key(bucket, object_name)
+        self.sketch.increment(key)
+        entry = self.memory.get(key)
+        if entry is not None:
+            stat, data = entry
+            report_object_cache("hit_memory")
+            return CacheHit("memory", len(data), stat, data=data)
+        entry = self.disk.get(key)
+        if entry is not None:
+            stat, path = entry
+            size = self.disk.entries[key][0]
+            try:
+                # Opened now, so a concurrent eviction cannot pull the file from under us.
+                fh = await run_in_threadpool(open, path, "rb")
+            except FileNotFoundError:
+                self._drop(self.disk, key)
+            else:
+                report_object_cache("hit_disk")
+                return CacheHit("disk", size, stat, file=fh)
+        report_object_cache("miss")
+        return None
+
+    def contains(self, bucket: str, object_name: str) -> bool:
+        """Whether a lookup would hit; unlike ``get`` it does not count as a request."""
+        return self.stat(bucket, object_name) is not None
+
+    def _tier_for(self, size: int) -> _Tier | None:
+        for tier in (self.memory, self.disk):
+            if tier.fits(size):
+                return tier
+        return None
+
+    def _admit(self, tier: _Tier, key: str, size: int) -> bool:
+        victims = tier.victims(key, size, self.sketch)
+        if victims is None:
+            report_object_cache("admission_rejected")
+            return False
+        for v in victims:
+            self._drop(tier, v)
+            report_object_cache("evicted")
+        return True
+
+    def fill_through(self, bucket: str, object_name: str, stat: ObjectStat,
+                     body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Return ``body`` unchanged, or wrapped so that a complete read of the object
+        also stores it in the cache. Only one concurrent download fills a given key.
+        """
+        if not self.enabled:
+            return body
+        key = _key(bucket, object_name)
+        size = stat.size
+        tier = self._tier_for(size)
+        if tier is None or key in self._filling or key in tier.entries:
+            return body
+        if tier.victims(key, size, self.sketch) is None:
+            report_object_cache("admission_rejected")
+            return body
+        self._filling.add(key)
+        if tier is self.memory:
+            return self._fill_memory(key, stat, body)
+        return self._fill_disk(key, stat, body)
+
+    async def _fill_memory(self, key, stat, body) -> AsyncIterator[bytes]:
+        parts: list[bytes] = []
+        try:
+            async for chunk in body:
+                parts.append(chunk)
+                yield chunk
+            data = b"".join(parts)
+            if len(data) == stat.size and self._admit(self.memory, key, stat.size):
+                self.memory.add(key, stat.size, (stat, data))
+                report_object_cache_usage(self.memory.used, self.disk.used)
+        finally:
+            self._filling.discard(key)
+
+    async def _fill_disk(self, key, stat, body) -> AsyncIterator[bytes]:
+        final = self._cache_dir() / uuid.uuid4().hex
+        tmp = final.with_suffix(".part")
+        fh = await run_in_threadpool(open, tmp, "wb")
+        written = 0
+        try:
+            async for chunk in body:
+                await run_in_threadpool(fh.write, chunk)
+                written += len(chunk)
+                yield chunk
+            await run_in_threadpool(fh.close)
+            if written == stat.size and self._admit(self.disk, key, stat.size):
+                await run_in_threadpool(tmp.replace, final)
+                self.disk.add(key, stat.size, (stat, final))
+                report_object_cache_usage(self.memory.used, self.disk.used)
+        finally:
+            self._filling.discard(key)
+            fh.close()
+            await run_in_threadpool(tmp.unlink, missing_ok=True)
+
+    def _drop(self, tier: _Tier, key: str) -> None:
+        entry = tier.pop(key)
+        if tier is self.disk and entry is not None:
+            with contextlib.suppress(FileNotFoundError):
+                entry[1].unlink()
+        report_object_cache_usage(self.memory.used, self.disk.used)
+
+    def invalidate(self, bucket: str, object_name: str) -> None:
+        """Forget a deleted object (this process only; object names are never reused)."""
+        key = _key(bucket, object_name)
+        for tier in (self.memory, self.disk):
+            if key in tier.entries:
+                self._drop(tier, key)
+
+    def invalidate_many(self, objects: Iterable[tuple[str, str]]) -> None:
+        for bucket, object_name in objects:
+            self.invalidate(bucket, object_name)
+
+
+object_cache = ObjectCache()
@@ -0,0 +1,112 @@
+"""
+Rendered ``/pages/{page_id}`` responses, ready to send.
+
+A page is rendered once into the full HTML document, hashed for a strong ETag and
+precompressed (gzip, and brotli when the optional ``brotli`` package is installed);
+later hits are a dictionary lookup plus ``Accept-Encoding`` negotiation. Entries keep
+their file's expiry and are not served past it. They are dropped when the page is
+re-indexed, when its file is deleted and when a re-index swaps the whole index in.
+Each entry also records the page's ``web_pages.updated_at``, which the route checks
+against the database on a hit, so changes made by another process (a delete or
+cleanup in another worker, the re-index CLI) are never served stale.
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.monitoring.setup import report_page_cache
+from app.utils.precompressed import Precompressed, precompress
+
+MAX_BYTES = int(os.getenv("PAGE_CACHE_BYTES", str(32 * 1024 * 1024)))
+MAX_ITEM = int(os.getenv("PAGE_CACHE_MAX_ITEM", str(2 * 1024 * 1024)))
+GZIP_LEVEL = int(os.getenv("PAGE_CACHE_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("PAGE_CACHE_BROTLI_QUALITY", "9"))
+
+
+@dataclass
+class RenderedPage:
+    file_id: str
+    owner_id: str
+    expires_at: datetime | None
+    updated_at: datetime | None
+    body: Precompressed
+
+
+def render(file_id: str, owner_id: str, expires_at: datetime | None, updated_at: datetime | None,
+           document: str) -> RenderedPage:
+    """
+    Encode, hash and precompress a page; CPU-bound, run it in a thread. Pages too
+    large to cache are not compressed, as the work would be thrown away.
+    """
+    body = document.encode("utf-8")
+    return RenderedPage(file_id, owner_id, expires_at, updated_at,
+                        precompress(body, len(body) <= MAX_ITEM, GZIP_LEVEL, BROTLI_QUALITY))
+
+
+class PageCache:
+    """
+    LRU of page id -> RenderedPage under a byte budget. ``version`` moves on every
+    invalidation; a page rendered from data read before it is not stored.
+    """
+
+    def __init__(self) -> None:
+        self.entries: OrderedDict[str, RenderedPage] = OrderedDict()
+        self.by_file: dict[str, str] = {}
+        self.used = 0
+        self.version = 0
+
+    def get(self, page_id: str, owner_id: str) -> RenderedPage | None:
+        """The cached page, if it belongs to ``owner_id``; anyone else's is a miss."""
+        page = self.entries.get(page_id)
+        if page is not None and page.expires_at is not None and page.expires_at <= datetime.utcnow():
+            self._drop(page_id)
+            page = None
+        if page is None or page.owner_id != owner_id:
+            report_page_cache("miss")
+            return None
+        self.entries.move_to_end(page_id)
+        report_page_cache("hit")
+        return page
+
+    def put(self, page_id: str, page: RenderedPage, version: int) -> None:
+        size = page.body.size
+        if version != self.version or len(page.body.variants["identity"]) > MAX_ITEM or size > MAX_BYTES:
+            return
+        self._drop(page_id)
+        while self.used + size > MAX_BYTES and self.entries:
+            self._drop(next(iter(self.entries)))
+            report_page_cache("evicted")
+        self.entries[page_id] = page
+        self.by_file[page.file_id] = page_id
+        self.used += size
+
+    def _drop(self, page_id: str) -> None:
+        page = self.entries.pop(page_id, None)
+        if page is not None:
+            self.used -= page.body.size
+            if self.by_file.get(page.file_id) == page_id:
+                del self.by_file[page.file_id]
+
+    def invalidate(self, page_id: str) -> None:
+        self.version += 1
+        self._drop(page_id)
+
+    def invalidate_files(self, file_ids: Iterable[str]) -> None:
+        self.version += 1
+        for file_id in file_ids:
+            page_id = self.by_file.get(str(file_id))
+            if page_id is not None:
+                self._drop(page_id)
+
+    def clear(self) -> None:
+        self.version += 1
+        self.entries.clear()
+        self.by_file.clear()
+        self.used = 0
+
+
+page_cache = PageCache()
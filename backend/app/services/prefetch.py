@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.storage import ObjectStat, storage
+from app.monitoring.setup import report_prefetch
+from app.services.object_cache import object_cache
+
+logger = logging.getLogger("secure-share")
+
+HEAD_BYTES = int(os.getenv("PREFETCH_HEAD_BYTES", str(1024 * 1024)))
+TTL_SECS = float(os.getenv("PREFETCH_TTL_SECS", "15"))
+MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", "64"))
+
+
+@dataclass
+class Prefetched:
+    bucket: str
+    object_name: str
+    stat: ObjectStat
+    head: list[bytes]
+    head_size: int
+
+    @property
+    def complete(self) -> bool:
+        return self.head_size >= self.stat.size
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """The buffered head, then the rest of the object, opened while the head goes out."""
+        rest = None
+        if not self.complete:
+            rest = asyncio.create_task(storage.open(self.bucket, self.object_name, self.head_size))
+        body = None
+        try:
+            for chunk in self.head:
+                yield chunk
+            if rest is not None:
+                body = await rest
+                async for chunk in body:
+                    yield chunk
+        finally:
+            if rest is not None and body is None:
+                if not rest.done():
+                    rest.cancel()
+                elif not rest.cancelled() and rest.exception() is None:
+                    await rest.result().aclose()
+
+
+class Prefetcher:
+    """
+    Warms objects for downloads that are about to happen.
+
+    The share landing page triggers its download link a moment after it renders, so
+    serving the page starts fetching the object's metadata and first ``HEAD_BYTES``
+    (the whole object when it is small) into a short-lived buffer that the download
+    request then takes. Entries are per process and expire after ``TTL_SECS``.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = settings.STORAGE_BACKEND != "local" and MAX_ENTRIES > 0
+        self._entries: dict[str, tuple[float, asyncio.Task]] = {}
+
+    def schedule(self, token: str, bucket: str, object_name: str) -> None:
+        if not self.enabled or token in self._entries:
+            return
+        self._prune()
+        if len(self._entries) >= MAX_ENTRIES:
+            report_prefetch("dropped")
+            return
+        task = asyncio.create_task(self._fetch(bucket, object_name))
+        # Unclaimed entries may fail unobserved; retrieve the error to keep asyncio quiet.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._entries[token] = (time.monotonic() + TTL_SECS, task)
+        report_prefetch("scheduled")
+
+    async def _fetch(self, bucket: str, object_name: str) -> Prefetched:
+        # Cached objects are served from the cache, stat included; nothing to fetch.
+        stat = object_cache.stat(bucket, object_name)
+        if stat is not None:
+            return Prefetched(bucket, object_name, stat, [], 0)
+        stat = await storage.stat(bucket, object_name)
+        head: list[bytes] = []
+        size = 0
+        if stat.size:
+            async for chunk in await storage.open(bucket, object_name, 0, min(stat.size, HEAD_BYTES)):
+                head.append(chunk)
+                size += len(chunk)
+        return Prefetched(bucket, object_name, stat, head, size)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for token, (deadline, task) in list(self._entries.items()):
+            if deadline < now:
+                task.cancel()
+                del self._entries[token]
+                report_prefetch("expired")
+
+    async def take(self, token: str, bucket: str, object_name: str) -> Prefetched | None:
+        """Claim the prefetched object for ``token``, waiting for it if still in flight."""
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return None
+        deadline, task = entry
+        if deadline < time.monotonic():
+            task.cancel()
+            report_prefetch("expired")
+            return None
+        try:
+            pre = await task
+        except Exception as e:
+            logger.debug("Prefetch for %s/%s failed: %s", bucket, object_name, e)
+            report_prefetch("failed")
+            return None
+        if (pre.bucket, pre.object_name) != (bucket, object_name):
+            return None
+        report_prefetch("used")
+        return pre
+
+
+prefetcher = Prefetcher()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.database import SessionLocal
+from app.models.job_checkpoint import JobCheckpoint
+
+
+async def load_checkpoint(name: str) -> str | None:
+    """Return the saved cursor of a resumable job, or None to start from the beginning."""
+    async with SessionLocal() as db:
+        row = (await db.execute(select(JobCheckpoint).where(JobCheckpoint.name == name))).scalars().first()
+        return row.cursor if row else None
+
+
+async def save_checkpoint(name: str, cursor: str | None) -> None:
+    """Persist a job cursor; None marks the pass as complete."""
+    async with SessionLocal() as db:
+        row = (await db.execute(select(JobCheckpoint).where(JobCheckpoint.name == name))).scalars().first()
+        if row is None:
+            db.add(JobCheckpoint(name=name, cursor=cursor))
+        else:
+            row.cursor = cursor
+        await db.commit()
+
+
+async def lower_checkpoint(name: str, cursor: str) -> None:
+    """Set a cursor unless it already holds a smaller value; safe against concurrent writers."""
+    async with SessionLocal() as db:
+        res = await db.execute(
+            update(JobCheckpoint)
+            .where(JobCheckpoint.name == name, or_(JobCheckpoint.cursor == None, JobCheckpoint.cursor > cursor))
+            .values(cursor=cursor, updated_at=datetime.utcnow())
+        )
+        if not res.rowcount:
+            await db.execute(
+                sqlite_insert(JobCheckpoint)
+                .values(name=name, cursor=cursor, updated_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=[JobCheckpoint.name])
+            )
+        await db.commit()
+
+
+async def take_checkpoint(name: str) -> str | None:
+    """Return a cursor and clear it, unless another writer changed it in between."""
+    cursor = await load_checkpoint(name)
+    if cursor is None:
+        return None
+    async with SessionLocal() as db:
+        res = await db.execute(
+            update(JobCheckpoint)
+            .where(JobCheckpoint.name == name, JobCheckpoint.cursor == cursor)
+            .values(cursor=None, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+    # A lost race means a writer lowered it; the next take returns the lower value.
+    return cursor if res.rowcount else None
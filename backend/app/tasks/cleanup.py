@@ -1,33 +1,48 @@
 import asyncio
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import delete, distinct, select, update
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.core.database import SessionLocal
-from app.core.minio_client import minio_client
+from app.core.minio_lifecycle import ensure_expiry_rules, lifecycle_enabled
+from app.core.storage import storage
 from app.models.file import File
 from app.models.share_link import ShareLink
+from app.models.web_page import WebPage
 from app.monitoring.setup import report_cleanup
+from app.services.bulk_delete import maintain_bulk_deletes
+from app.services.object_cache import object_cache
+from app.services.page_cache import page_cache
+from app.tasks.expiry import expiry_scheduler
+from app.tasks.leader import LeaseElector
 
 logger = logging.getLogger(__name__)
 
-INTERVAL_SECS = int(os.getenv("CLEANUP_INTERVAL_SECONDS", "300"))  
 MAX_PER_LOOP = int(os.getenv("CLEANUP_MAX_RECORDS_PER_LOOP", "200"))
 RETRY_ATTEMPTS = int(os.getenv("CLEANUP_RETRY_ATTEMPTS", "3"))
 RETRY_BACKOFF = float(os.getenv("CLEANUP_RETRY_BACKOFF_SECS", "0.5"))
+FAILED_RETRY_SECS = int(os.getenv("CLEANUP_FAILED_RETRY_SECONDS", "300"))
+ERROR_BACKOFF_SECS = 60
+LEASE_TTL_SECS = int(os.getenv("CLEANUP_LEASE_TTL_SECONDS", "30"))
+LEASE_RENEW_SECS = int(os.getenv("CLEANUP_LEASE_RENEW_SECONDS", "10"))
+LIFECYCLE_SYNC_SECS = int(os.getenv("LIFECYCLE_SYNC_SECONDS", "600"))
+BULK_DELETE_SWEEP_SECS = 60
+
+cleanup_lease = LeaseElector("cleanup", ttl_secs=LEASE_TTL_SECS, renew_secs=LEASE_RENEW_SECS)
 
 CLEANED_FILES = 0
 CLEANED_LINKS = 0
 FAILED_FILE_DELETES = 0
 
-async def _retry_minio_delete(bucket: str, object_name: str) -> bool:
-    """Retry wrapper for MinIO deletion."""
+async def _retry_storage_delete(bucket: str, object_name: str) -> bool:
+    """Retry wrapper for storage deletion."""
     for attempt in range(1, RETRY_ATTEMPTS + 1):
         try:
-            minio_client.remove_object(bucket, object_name)
+            await storage.delete(bucket, object_name)
             return True
         except Exception as e:
             logger.warning(f"MinIO delete failed (attempt {attempt}/{RETRY_ATTEMPTS}) "
@@ -36,66 +51,142 @@ async def _retry_minio_delete(bucket: str, object_name: str) -> bool:
                 await asyncio.sleep(RETRY_BACKOFF * attempt)
     return False
 
-async def cleanup_expired_files():
-    global CLEANED_FILES, CLEANED_LINKS, FAILED_FILE_DELETES
-    logger.info("Cleanup task started: interval=%s max_per_loop=%s", INTERVAL_SECS, MAX_PER_LOOP)
-
+async def _expire_lifecycle_rows(db, file_ids: list[str], now: datetime) -> int:
+    """Drop expired rows whose objects a bucket lifecycle rule removes; no storage calls."""
+    due = select(File.id).where(
+        File.id.in_(file_ids),
+        File.expires_at != None,
+        File.expires_at <= now,
+        File.storage_expires_on != None,
+    )
+    objects = (await db.execute(
+        select(File.bucket, File.object_name).where(File.id.in_(due))
+    )).all()
+    if not objects:
+        return 0
+    await db.execute(delete(ShareLink).where(ShareLink.file_id.in_(due)))
+    await db.execute(delete(WebPage).where(WebPage.file_id.in_(due)))
+    res = await db.execute(delete(File).where(File.id.in_(due)))
+    await db.commit()
+    object_cache.invalidate_many((o.bucket, o.object_name) for o in objects)
+    page_cache.invalidate_files(file_ids)
+    return res.rowcount or 0
+
+async def sync_lifecycle_rules() -> None:
+    """Recreate rules for every pending expiry date and drop rules for past days."""
+    today = datetime.utcnow().date()
+    async with SessionLocal() as db:
+        dates = (await db.execute(
+            select(distinct(File.storage_expires_on)).where(File.storage_expires_on >= today)
+        )).scalars().all()
+    await run_in_threadpool(ensure_expiry_rules, dates)
+
+async def _lifecycle_sync_loop() -> None:
+    """The leader is the only writer of the bucket's lifecycle config, so rule updates never race."""
     while True:
-        started = datetime.utcnow()
-        files_deleted = 0
-        links_deactivated = 0
+        try:
+            await sync_lifecycle_rules()
+        except Exception as e:
+            logger.exception("Lifecycle rule sync failed: %s", e)
+        await asyncio.sleep(LIFECYCLE_SYNC_SECS)
 
+async def _bulk_delete_sweep_loop() -> None:
+    while True:
         try:
-            async with SessionLocal() as db:  
-                now = datetime.utcnow()
+            await maintain_bulk_deletes()
+        except Exception as e:
+            logger.exception("Bulk delete sweep failed: %s", e)
+        await asyncio.sleep(BULK_DELETE_SWEEP_SECS)
 
-                res = await db.execute(
-                    select(ShareLink).where(
-                        and_(ShareLink.is_active == True, ShareLink.expires_at != None, ShareLink.expires_at < now)
-                    ).limit(MAX_PER_LOOP)
+async def cleanup_due(file_ids: list[str], link_ids: list[str]) -> None:
+    """Expire the given links/files; rows are re-checked so stale heap entries are no-ops."""
+    global CLEANED_FILES, CLEANED_LINKS, FAILED_FILE_DELETES
+    started = datetime.utcnow()
+    files_deleted = 0
+    links_deactivated = 0
+    failed = 0
+
+    async with SessionLocal() as db:
+        now = datetime.utcnow()
+
+        for i in range(0, len(link_ids), MAX_PER_LOOP):
+            res = await db.execute(
+                update(ShareLink)
+                .where(
+                    ShareLink.id.in_(link_ids[i:i + MAX_PER_LOOP]),
+                    ShareLink.is_active == True,
+                    ShareLink.expires_at != None,
+                    ShareLink.expires_at <= now,
                 )
-                expired_links = res.scalars().all()
-                if expired_links:
-                    for link in expired_links:
-                        link.is_active = False
-                        links_deactivated += 1
-                    await db.commit()
-
-                res = await db.execute(
-                    select(File).where(
-                        File.expires_at != None, File.expires_at < now
-                    ).limit(MAX_PER_LOOP)
+                .values(is_active=False)
+            )
+            links_deactivated += res.rowcount or 0
+            await db.commit()
+
+        for i in range(0, len(file_ids), MAX_PER_LOOP):
+            chunk = file_ids[i:i + MAX_PER_LOOP]
+            files_deleted += await _expire_lifecycle_rows(db, chunk, now)
+
+            res = await db.execute(
+                select(File).where(
+                    File.id.in_(chunk),
+                    File.expires_at != None,
+                    File.expires_at <= now,
+                    File.storage_expires_on == None,
                 )
-                files_to_delete = res.scalars().all()
-
-                for f in files_to_delete:
-                    ok = await _retry_minio_delete(f.bucket or settings.MINIO_BUCKET, f.object_name)
-                    if ok:
-                        await db.delete(f)
-                        files_deleted += 1
-                    else:
-                        FAILED_FILE_DELETES += 1
-                        logger.error("Failed to delete object from MinIO after retries: %s", f.object_name)
-
-                if files_to_delete:
-                    await db.commit()
-
-            CLEANED_FILES += files_deleted
-            CLEANED_LINKS += links_deactivated
+            )
+            files_to_delete = res.scalars().all()
+
+            for f in files_to_delete:
+                ok = await _retry_storage_delete(f.bucket or settings.MINIO_BUCKET, f.object_name)
+                if ok:
+                    await db.delete(f)
+                    object_cache.invalidate(f.bucket or settings.MINIO_BUCKET, f.object_name)
+                    page_cache.invalidate_files([f.id])
+                    files_deleted += 1
+                else:
+                    failed += 1
+                    logger.error("Failed to delete object from MinIO after retries: %s", f.object_name)
+                    expiry_scheduler.retry_file(f.id, now + timedelta(seconds=FAILED_RETRY_SECS))
+
+            if files_to_delete:
+                await db.commit()
+
+    CLEANED_FILES += files_deleted
+    CLEANED_LINKS += links_deactivated
+    FAILED_FILE_DELETES += failed
+
+    duration = (datetime.utcnow() - started).total_seconds()
+    report_cleanup(files_deleted, links_deactivated, FAILED_FILE_DELETES, duration)
+    logger.info("cleanup_summary files_deleted=%s links_deactivated=%s failed_minio=%s duration=%.3fs total_files=%s total_links=%s",
+                files_deleted, links_deactivated, FAILED_FILE_DELETES, duration, CLEANED_FILES, CLEANED_LINKS)
 
-            duration = (datetime.utcnow() - started).total_seconds()
-            report_cleanup(files_deleted, links_deactivated, FAILED_FILE_DELETES, duration)
-            logger.info("cleanup_summary files_deleted=%s links_deactivated=%s failed_minio=%s duration=%.3fs total_files=%s total_links=%s",
-                        files_deleted, links_deactivated, FAILED_FILE_DELETES, duration, CLEANED_FILES, CLEANED_LINKS)
-
-            await asyncio.sleep(INTERVAL_SECS)
-
-        except asyncio.CancelledError:
-            logger.info("Cleanup task cancelled by shutdown")
-            raise
-        except Exception as e:
-            logger.exception("Cleanup loop error: %s", e)
-            await asyncio.sleep(min(60, INTERVAL_SECS))
+async def cleanup_expired_files():
+    """Run the expiry scheduler, restarting it after unexpected errors."""
+    logger.info("Cleanup task started: max_per_loop=%s", MAX_PER_LOOP)
+
+    # A previous leadership term may have left a stale heap behind.
+    expiry_scheduler.reset()
+    lifecycle_sync = asyncio.create_task(_lifecycle_sync_loop()) if lifecycle_enabled() else None
+    bulk_delete_sweep = asyncio.create_task(_bulk_delete_sweep_loop())
+    try:
+        while True:
+            try:
+                await expiry_scheduler.run(cleanup_due)
+            except asyncio.CancelledError:
+                logger.info("Cleanup task cancelled")
+                raise
+            except Exception as e:
+                logger.exception("Cleanup loop error: %s", e)
+                expiry_scheduler.reset()
+                await asyncio.sleep(ERROR_BACKOFF_SECS)
+    finally:
+        if lifecycle_sync is not None:
+            lifecycle_sync.cancel()
+        bulk_delete_sweep.cancel()
+        # Followers must not accumulate schedule() calls they will never fire.
+        expiry_scheduler.reset()
 
 async def start_cleanup_task():
-    return await cleanup_expired_files()
\ No newline at end of file
+    """Run cleanup only in the process holding the ``cleanup`` lease."""
+    return await cleanup_lease.run(cleanup_expired_files)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+
+from app.core.database import SessionLocal
+from app.models.file import File
+from app.models.share_link import ShareLink
+from app.tasks.checkpoint import lower_checkpoint, take_checkpoint
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH = int(os.getenv("EXPIRY_LOAD_BATCH", "500"))
+RESYNC_SECS = int(os.getenv("EXPIRY_RESYNC_SECONDS", "3600"))
+SIGNAL_POLL_SECS = float(os.getenv("EXPIRY_SIGNAL_POLL_SECONDS", "5"))
+
+# job_checkpoints row holding the earliest deadline scheduled by a process that is not
+# running the scheduler, as a sortable timestamp; the leader takes and clears it.
+DIRTY_MARKER = "expiry_dirty_since"
+
+KIND_FILE = "file"
+KIND_LINK = "link"
+
+DueHandler = Callable[[list[str], list[str]], Awaitable[None]]
+
+
+class ExpiryScheduler:
+    """
+    In-memory min-heap of upcoming File/ShareLink deadlines.
+
+    Rows are loaded lazily in keyset batches over the ``expires_at`` indexes: a
+    per-kind watermark remembers how far the heap is known to be complete, and a
+    new batch is fetched only when the earliest loaded deadline lies past it.
+    Between deadlines the loop just sleeps, polling a one-row marker that other
+    processes lower when they schedule a deadline; the heap is reloaded only if
+    that deadline falls in the range it already covers.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, str, str]] = []
+        self._wakeup = asyncio.Event()
+        self._running = False
+        self._dirty: datetime | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything loaded so far; the next refill starts from the beginning."""
+        self._heap.clear()
+        # (expires_at, id) of the last loaded row; None = nothing loaded yet,
+        # _EXHAUSTED = every row of this kind is already in the heap.
+        self._watermark: dict[str, tuple[datetime, str] | None | object] = {
+            KIND_FILE: None,
+            KIND_LINK: None,
+        }
+
+    def _covers(self, kind: str, deadline: datetime) -> bool:
+        wm = self._watermark[kind]
+        if wm is _EXHAUSTED:
+            return True
+        return wm is not None and deadline <= wm[0]
+
+    def schedule(self, kind: str, obj_id: str, expires_at: datetime | None) -> None:
+        """Register a new or moved deadline (upload, share creation, extension)."""
+        if expires_at is None:
+            return
+        if not self._running:
+            # Another process runs the scheduler: tell it through the shared marker.
+            self._mark_dirty(expires_at)
+            return
+        # Deadlines beyond the watermark will be picked up by the next batch load.
+        if not self._covers(kind, expires_at):
+            return
+        heapq.heappush(self._heap, (expires_at, kind, str(obj_id)))
+        self._wakeup.set()
+
+    def schedule_file(self, file_id: str, expires_at: datetime | None) -> None:
+        self.schedule(KIND_FILE, file_id, expires_at)
+
+    def schedule_link(self, link_id: str, expires_at: datetime | None) -> None:
+        self.schedule(KIND_LINK, link_id, expires_at)
+
+    def _mark_dirty(self, deadline: datetime) -> None:
+        if self._dirty is None or deadline < self._dirty:
+            self._dirty = deadline
+        # One writer per process; calls made while it runs only lower the pending value.
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_dirty())
+
+    async def _flush_dirty(self) -> None:
+        while self._dirty is not None:
+            deadline, self._dirty = self._dirty, None
+            try:
+                await lower_checkpoint(DIRTY_MARKER, f"{deadline:%Y-%m-%dT%H:%M:%S.%f}")
+            except Exception as e:
+                # The leader's periodic resync still picks the row up.
+                logger.warning("Cannot signal expiry deadline %s: %s", deadline, e)
+
+    async def _poll_dirty(self) -> None:
+        marker = await take_checkpoint(DIRTY_MARKER)
+        if marker is None:
+            return
+        deadline = datetime.strptime(marker, "%Y-%m-%dT%H:%M:%S.%f")
+        # Deadlines past the watermarks arrive with a later batch; earlier ones need a reload.
+        if self._covers(KIND_FILE, deadline) or self._covers(KIND_LINK, deadline):
+            logger.debug("expiry_dirty deadline=%s, reloading", deadline)
+            self.reset()
+
+    def retry_file(self, file_id: str, at: datetime) -> None:
+        """
+        Re-queue a file whose expiry failed. Its own deadline is already behind the
+        watermark, so unlike schedule() the entry is pushed unconditionally.
+        """
+        heapq.heappush(self._heap, (at, KIND_FILE, str(file_id)))
+        self._wakeup.set()
+
+    async def _load_batch(self, kind: str) -> None:
+        model = File if kind == KIND_FILE else ShareLink
+        conditions = [model.expires_at != None]
+        if kind == KIND_LINK:
+            conditions.append(ShareLink.is_active == True)
+        wm = self._watermark[kind]
+        if isinstance(wm, tuple):
+            last_at, last_id = wm
+            conditions.append(or_(
+                model.expires_at > last_at,
+                and_(model.expires_at == last_at, model.id > last_id),
+            ))
+
+        async with SessionLocal() as db:
+            rows = (await db.execute(
+                select(model.id, model.expires_at)
+                .where(and_(*conditions))
+                .order_by(model.expires_at, model.id)
+                .limit(LOAD_BATCH)
+            )).all()
+
+        for obj_id, expires_at in rows:
+            heapq.heappush(self._heap, (expires_at, kind, obj_id))
+        if len(rows) < LOAD_BATCH:
+            self._watermark[kind] = _EXHAUSTED
+        else:
+            self._watermark[kind] = (rows[-1][1], rows[-1][0])
+        logger.debug("expiry_load kind=%s rows=%s", kind, len(rows))
+
+    async def _refill(self) -> None:
+        """Load batches until the heap head is guaranteed to be the true next deadline."""
+        for kind in (KIND_FILE, KIND_LINK):
+            while self._watermark[kind] is not _EXHAUSTED:
+                head = self._heap[0][0] if self._heap else None
+                if head is not None and self._covers(kind, head):
+                    break
+                await self._load_batch(kind)
+
+    def _pop_due(self, now: datetime) -> tuple[list[str], list[str]]:
+        file_ids: list[str] = []
+        link_ids: list[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, obj_id = heapq.heappop(self._heap)
+            (file_ids if kind == KIND_FILE else link_ids).append(obj_id)
+        return list(dict.fromkeys(file_ids)), list(dict.fromkeys(link_ids))
+
+    async def run(self, on_due: DueHandler) -> None:
+        logger.info("Expiry scheduler started: load_batch=%s resync=%ss signal_poll=%ss",
+                    LOAD_BATCH, RESYNC_SECS, SIGNAL_POLL_SECS)
+        self._running = True
+        try:
+            await self._run(on_due)
+        finally:
+            self._running = False
+
+    async def _run(self, on_due: DueHandler) -> None:
+        last_sync = datetime.utcnow()
+        # Signals written before this term are covered by the initial load.
+        await take_checkpoint(DIRTY_MARKER)
+        while True:
+            await self._refill()
+
+            now = datetime.utcnow()
+            file_ids, link_ids = self._pop_due(now)
+            if file_ids or link_ids:
+                await on_due(file_ids, link_ids)
+                continue
+
+            timeout: float | None = None
+            if self._heap:
+                timeout = max(0.0, (self._heap[0][0] - now).total_seconds())
+            if RESYNC_SECS > 0:
+                until_resync = RESYNC_SECS - (now - last_sync).total_seconds()
+                timeout = until_resync if timeout is None else min(timeout, until_resync)
+            if SIGNAL_POLL_SECS > 0:
+                timeout = SIGNAL_POLL_SECS if timeout is None else min(timeout, SIGNAL_POLL_SECS)
+
+            self._wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+
+            if SIGNAL_POLL_SECS > 0:
+                await self._poll_dirty()
+
+            if RESYNC_SECS > 0 and (datetime.utcnow() - last_sync).total_seconds() >= RESYNC_SECS:
+                # Picks up rows written without schedule(), or whose signal was lost.
+                self.reset()
+                last_sync = datetime.utcnow()
+
+
+_EXHAUSTED = object()
+
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal
+from app.models.job_lease import JobLease
+from app.monitoring.setup import report_lease_change, report_lease_renewal
+
+logger = logging.getLogger(__name__)
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseElector:
+    """
+    Lease-based leader election over a row in ``job_leases``.
+
+    Every process competes for the same named lease; the holder renews it every
+    ``renew_secs`` and runs the job, the others retry at the same cadence and take
+    over once the lease has been expired for ``ttl_secs`` (i.e. the leader died or
+    stopped heartbeating). Acquisition and renewal are one conditional UPDATE, so
+    at most one holder can win a given lease period.
+    """
+
+    def __init__(self, name: str, ttl_secs: int, renew_secs: int) -> None:
+        if renew_secs >= ttl_secs:
+            raise ValueError("Lease renew interval must be shorter than its TTL")
+        self.name = name
+        self.ttl_secs = ttl_secs
+        self.renew_secs = renew_secs
+        self.is_leader = False
+
+    async def try_acquire(self) -> bool:
+        """Acquire or renew the lease; returns whether this instance holds it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_secs)
+        async with SessionLocal() as db:
+            res = await db.execute(
+                update(JobLease)
+                .where(
+                    JobLease.name == self.name,
+                    or_(JobLease.holder == INSTANCE_ID, JobLease.expires_at < now),
+                )
+                .values(holder=INSTANCE_ID, expires_at=expires_at, renewed_at=now)
+            )
+            if res.rowcount:
+                await db.commit()
+                return True
+
+            db.add(JobLease(name=self.name, holder=INSTANCE_ID, expires_at=expires_at,
+                            acquired_at=now, renewed_at=now))
+            try:
+                await db.commit()
+                return True
+            except IntegrityError:
+                # Row exists and is held by someone else.
+                await db.rollback()
+                return False
+
+    async def release(self) -> None:
+        """Expire our lease immediately so a standby can take over without waiting for the TTL."""
+        async with SessionLocal() as db:
+            await db.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.holder == INSTANCE_ID)
+                .values(expires_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    def _set_leader(self, value: bool) -> None:
+        if value != self.is_leader:
+            self.is_leader = value
+            report_lease_change(self.name, value)
+            logger.info("lease=%s holder=%s leader=%s", self.name, INSTANCE_ID, value)
+
+    async def run(self, job: Callable[[], Awaitable[None]]) -> None:
+        """Run ``job`` only while holding the lease; cancel it as soon as the lease is lost."""
+        job_task: asyncio.Task | None = None
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    held = await self.try_acquire()
+                    report_lease_renewal(self.name, time.perf_counter() - started, ok=True)
+                except Exception as e:
+                    logger.warning("lease=%s renewal failed: %s", self.name, e)
+                    report_lease_renewal(self.name, time.perf_counter() - started, ok=False)
+                    # We cannot prove we still hold it; step down rather than risk two leaders.
+                    held = False
+
+                self._set_leader(held)
+                if held and job_task is None:
+                    job_task = asyncio.create_task(job())
+                elif not held and job_task is not None:
+                    await _cancel(job_task)
+                    job_task = None
+
+                if job_task is not None and job_task.done():
+                    # The job exited on its own; surface its error and start over on the next beat.
+                    exc = None if job_task.cancelled() else job_task.exception()
+                    if exc:
+                        logger.error("lease=%s job crashed: %s", self.name, exc)
+                    job_task = None
+
+                await asyncio.sleep(self.renew_secs)
+        finally:
+            if job_task is not None:
+                await _cancel(job_task)
+            if self.is_leader:
+                self._set_leader(False)
+                with contextlib.suppress(Exception):
+                    await asyncio.shield(self.release())
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import html
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.file import File
+from app.models.share_link import ShareLink
+from app.models.user import User
+from app.monitoring.setup import report_expiry_notify
+from app.tasks.cleanup import LEASE_RENEW_SECS, LEASE_TTL_SECS
+from app.tasks.leader import LeaseElector
+from app.utils.email import send_email
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECS = int(os.getenv("EXPIRY_NOTIFY_WINDOW_SECONDS", "43200"))
+INTERVAL_SECS = int(os.getenv("EXPIRY_NOTIFY_INTERVAL_SECONDS", "900"))
+BATCH_SIZE = int(os.getenv("EXPIRY_NOTIFY_BATCH_SIZE", "1000"))
+MAIL_CONCURRENCY = int(os.getenv("EXPIRY_NOTIFY_MAIL_CONCURRENCY", "4"))
+DIGEST_MAX_ITEMS = 50
+
+notify_lease = LeaseElector("expiry_notify", ttl_secs=LEASE_TTL_SECS, renew_secs=LEASE_RENEW_SECS)
+
+
+@dataclass
+class Digest:
+    email: str
+    files: list[tuple[str, datetime]] = field(default_factory=list)
+    links: list[tuple[str, datetime]] = field(default_factory=list)
+    omitted: int = 0
+    file_ids: list[str] = field(default_factory=list)
+    link_ids: list[str] = field(default_factory=list)
+
+    def add(self, bucket: list, name: str, expires_at: datetime) -> None:
+        # Cap the listing so one owner with thousands of expiring rows stays one small email.
+        if len(self.files) + len(self.links) < DIGEST_MAX_ITEMS:
+            bucket.append((name, expires_at))
+        else:
+            self.omitted += 1
+
+
+def _render_digest(d: Digest) -> str:
+    def _items(rows):
+        return "".join(
+            f"<li>{html.escape(name)} — expires {expires_at:%Y-%m-%d %H:%M} UTC</li>"
+            for name, expires_at in sorted(rows, key=lambda r: r[1])
+        )
+
+    parts = ["<p>Some of your SecureShare items expire soon.</p>"]
+    if d.files:
+        parts.append(f"<p><strong>Files</strong></p><ul>{_items(d.files)}</ul>")
+    if d.links:
+        parts.append(f"<p><strong>Share links</strong></p><ul>{_items(d.links)}</ul>")
+    if d.omitted:
+        parts.append(f"<p>…and {d.omitted} more.</p>")
+    dashboard = html.escape(settings.PUBLIC_BASE_URL.rstrip("/") + "/ui", quote=True)
+    parts.append(f'<p>Open your <a href="{dashboard}">dashboard</a> to extend them.</p>')
+    return "\n".join(parts)
+
+
+async def _collect(digests: dict[str, Digest], now: datetime, horizon: datetime) -> int:
+    """
+    Gather every not-yet-notified file/link expiring in (now, horizon].
+
+    The ``(expiry_notified_at, expires_at)`` indexes turn the filter into a range
+    scan over un-notified rows only, read in ``(expires_at, id)`` keyset batches.
+    Rows are stamped by ``_mark_notified`` only once their digest was delivered.
+    """
+    collected = 0
+    queries = [
+        (File, lambda: select(File.id, File.filename, File.expires_at, User.email)
+            .join(User, User.id == File.owner_id)
+            .where(File.expiry_notified_at == None, File.expires_at > now, File.expires_at <= horizon)
+            .order_by(File.expires_at, File.id)),
+        (ShareLink, lambda: select(ShareLink.id, File.filename, ShareLink.expires_at, User.email)
+            .join(File, File.id == ShareLink.file_id)
+            .join(User, User.id == File.owner_id)
+            .where(ShareLink.expiry_notified_at == None, ShareLink.is_active == True,
+                   ShareLink.expires_at > now, ShareLink.expires_at <= horizon)
+            .order_by(ShareLink.expires_at, ShareLink.id)),
+    ]
+    for model, build in queries:
+        after = None
+        while True:
+            stmt = build()
+            if after is not None:
+                stmt = stmt.where(or_(
+                    model.expires_at > after[0],
+                    and_(model.expires_at == after[0], model.id > after[1]),
+                ))
+            async with SessionLocal() as db:
+                rows = (await db.execute(stmt.limit(BATCH_SIZE))).all()
+            if not rows:
+                break
+
+            for row_id, name, expires_at, email in rows:
+                if not email:
+                    continue
+                d = digests.setdefault(email, Digest(email=email))
+                d.add(d.files if model is File else d.links, name or "file", expires_at)
+                (d.file_ids if model is File else d.link_ids).append(row_id)
+            collected += len(rows)
+            if len(rows) < BATCH_SIZE:
+                break
+            after = (rows[-1][2], rows[-1][0])
+    return collected
+
+
+async def _mark_notified(d: Digest) -> None:
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        for model, ids in ((File, d.file_ids), (ShareLink, d.link_ids)):
+            for i in range(0, len(ids), BATCH_SIZE):
+                await db.execute(
+                    update(model)
+                    .where(model.id.in_(ids[i:i + BATCH_SIZE]), model.expiry_notified_at == None)
+                    .values(expiry_notified_at=now)
+                )
+        await db.commit()
+
+
+async def _mail_worker(queue: asyncio.Queue) -> None:
+    while True:
+        d: Digest = await queue.get()
+        try:
+            ok = await send_email(d.email, "Your SecureShare items expire soon", _render_digest(d))
+            report_expiry_notify(0, 1 if ok else 0, 0 if ok else 1)
+            if ok:
+                await _mark_notified(d)
+            else:
+                # Left unstamped, the rows are picked up again by the next pass.
+                logger.warning("Expiry digest not delivered to %s", d.email)
+        except Exception as e:
+            report_expiry_notify(0, 0, 1)
+            logger.exception("Expiry digest failed for %s: %s", d.email, e)
+        finally:
+            queue.task_done()
+
+
+async def notify_pass(queue: asyncio.Queue) -> None:
+    """
+    Collect one digest per owner for the current warning window and send it.
+
+    Waits until the queue drains, so the next pass never collects rows whose digest is
+    still waiting; rows of undelivered digests (failed send, shutdown) stay unstamped
+    and are retried then.
+    """
+    now = datetime.utcnow()
+    digests: dict[str, Digest] = {}
+    collected = await _collect(digests, now, now + timedelta(seconds=WINDOW_SECS))
+    report_expiry_notify(collected, 0, 0)
+    for d in digests.values():
+        await queue.put(d)
+    await queue.join()
+    if collected:
+        logger.info("expiry_notify_summary items=%s digests=%s", collected, len(digests))
+
+
+async def _notify_loop() -> None:
+    # Bounded so a huge pass applies backpressure instead of buffering every digest.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAIL_CONCURRENCY * 100)
+    workers = [asyncio.create_task(_mail_worker(queue)) for _ in range(MAIL_CONCURRENCY)]
+    try:
+        while True:
+            try:
+                await notify_pass(queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Expiry notification pass failed: %s", e)
+            await asyncio.sleep(INTERVAL_SECS)
+    finally:
+        for w in workers:
+            w.cancel()
+        for w in workers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await w
+
+
+async def start_notify_task():
+    """Send pre-expiry digests only from the process holding the ``expiry_notify`` lease."""
+    return await notify_lease.run(_notify_loop)
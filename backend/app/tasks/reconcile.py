@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.storage import storage
+from app.models.file import File
+from app.monitoring.setup import report_reconcile
+from app.tasks.checkpoint import load_checkpoint, save_checkpoint
+from app.tasks.cleanup import LEASE_RENEW_SECS, LEASE_TTL_SECS
+from app.tasks.leader import LeaseElector
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_SECS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "86400"))
+BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "1000"))
+BATCH_PAUSE = float(os.getenv("RECONCILE_BATCH_PAUSE_SECS", "0.5"))
+GRACE_SECS = int(os.getenv("RECONCILE_GRACE_SECONDS", "86400"))
+
+CHECKPOINT_NAME = "storage_reconcile"
+
+reconcile_lease = LeaseElector("reconcile", ttl_secs=LEASE_TTL_SECS, renew_secs=LEASE_RENEW_SECS)
+
+
+@dataclass
+class ReconcileReport:
+    objects_scanned: int = 0
+    orphans_found: int = 0
+    orphans_deleted: int = 0
+    bytes_reclaimed: int = 0
+    in_grace: int = 0
+    dangling_rows: int = 0
+    delete_errors: int = 0
+    completed: bool = False
+
+
+async def _known_names(bucket: str, lower: str | None, upper: str | None) -> set[str]:
+    """Object names of ``files`` rows in the key range (lower, upper]."""
+    conditions = [
+        or_(File.bucket == bucket, File.bucket == None),
+        File.object_name != None,
+    ]
+    if lower is not None:
+        conditions.append(File.object_name > lower)
+    if upper is not None:
+        conditions.append(File.object_name <= upper)
+    async with SessionLocal() as db:
+        rows = await db.execute(select(File.object_name).where(*conditions))
+        return set(rows.scalars().all())
+
+
+async def reconcile_pass(dry_run: bool = False, max_batches: int | None = None) -> ReconcileReport:
+    """
+    Merge the bucket listing with the ``files`` table, one key range at a time.
+
+    MinIO lists keys in lexicographic order, so each batch of BATCH_SIZE objects
+    covers a key range ``(cursor, last_name]``; the matching rows are fetched
+    through the ``object_name`` index and compared as a set. Memory stays at one
+    batch regardless of bucket size. Orphaned objects older than GRACE_SECS are
+    removed (in-flight uploads are younger), rows without an object are only
+    reported. The cursor is checkpointed after every batch so an interrupted
+    pass resumes where it stopped; dry runs never touch the checkpoint.
+    """
+    bucket = settings.MINIO_BUCKET
+    report = ReconcileReport()
+    cursor = None if dry_run else await load_checkpoint(CHECKPOINT_NAME)
+    if cursor:
+        logger.info("reconcile resuming after %s", cursor)
+
+    batches = 0
+    while True:
+        batch = await storage.list_page(bucket, cursor, BATCH_SIZE)
+        upper = batch[-1].name if batch else None
+        known = await _known_names(bucket, cursor, upper)
+
+        listed = {o.name for o in batch}
+        dangling = known - listed
+        if dangling:
+            logger.warning("reconcile rows_without_object=%s sample=%s", len(dangling), sorted(dangling)[:5])
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=GRACE_SECS)
+        orphans = []
+        in_grace = 0
+        for o in batch:
+            if o.name in known:
+                continue
+            if o.last_modified and o.last_modified > cutoff:
+                in_grace += 1
+            else:
+                orphans.append(o)
+
+        deleted = []
+        if orphans and not dry_run:
+            failed = await storage.delete_many(bucket, [o.name for o in orphans])
+            deleted = [o for o in orphans if o.name not in failed]
+            report.delete_errors += len(failed)
+        reclaimed = sum((o.size or 0) for o in (orphans if dry_run else deleted))
+
+        report.objects_scanned += len(batch)
+        report.orphans_found += len(orphans)
+        report.orphans_deleted += len(deleted)
+        report.bytes_reclaimed += reclaimed
+        report.in_grace += in_grace
+        report.dangling_rows += len(dangling)
+        report_reconcile(len(batch), len(deleted), reclaimed, len(dangling))
+
+        if not batch:
+            report.completed = True
+            if not dry_run:
+                await save_checkpoint(CHECKPOINT_NAME, None)
+            break
+
+        cursor = upper
+        if not dry_run:
+            await save_checkpoint(CHECKPOINT_NAME, cursor)
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            break
+        await asyncio.sleep(BATCH_PAUSE)
+
+    logger.info("reconcile_summary scanned=%s orphans=%s deleted=%s reclaimed_bytes=%s in_grace=%s "
+                "rows_without_object=%s delete_errors=%s completed=%s dry_run=%s",
+                report.objects_scanned, report.orphans_found, report.orphans_deleted,
+                report.bytes_reclaimed, report.in_grace, report.dangling_rows,
+                report.delete_errors, report.completed, dry_run)
+    return report
+
+
+async def _reconcile_loop() -> None:
+    while True:
+        try:
+            await reconcile_pass()
+            await asyncio.sleep(INTERVAL_SECS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Reconcile pass failed: %s", e)
+            await asyncio.sleep(min(600, INTERVAL_SECS))
+
+
+async def start_reconcile_task():
+    """Run periodic reconciliation only in the process holding the ``reconcile`` lease."""
+    return await reconcile_lease.run(_reconcile_loop)
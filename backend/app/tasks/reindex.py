@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections.abc import Awaitable
+from dataclasses import dataclass
+
+from sqlalchemy import select, text
+
+from app.core.database import SessionLocal
+from app.models.file import File
+from app.monitoring.setup import report_reindex
+from app.services.file_index import extract_file, store_web_page
+from app.services.html_extract import Extracted
+from app.services.page_cache import page_cache
+from app.tasks.checkpoint import load_checkpoint, save_checkpoint
+from app.tasks.cleanup import LEASE_RENEW_SECS, LEASE_TTL_SECS
+from app.tasks.leader import LeaseElector
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "50"))
+CONCURRENCY = int(os.getenv("REINDEX_CONCURRENCY", "4"))
+BATCH_PAUSE = float(os.getenv("REINDEX_BATCH_PAUSE_SECS", "0.1"))
+
+CHECKPOINT_NAME = "file_reindex"
+
+reindex_lease = LeaseElector("reindex", ttl_secs=LEASE_TTL_SECS, renew_secs=LEASE_RENEW_SECS)
+
+# The shadow index. file_fts_next names 'file_text' as its content table from the start:
+# external content is only read at query time, and after the swap that name is the
+# rebuilt table. Live writes to file_text are mirrored in while the walk runs, so files
+# indexed behind the cursor are not lost.
+SHADOW_DDL = [
+    """
+    CREATE TABLE file_text_next (
+        id INTEGER NOT NULL,
+        file_id VARCHAR(36) NOT NULL,
+        title VARCHAR,
+        body TEXT,
+        PRIMARY KEY (id),
+        FOREIGN KEY(file_id) REFERENCES files (id),
+        UNIQUE (file_id)
+    )
+    """,
+    "CREATE VIRTUAL TABLE file_fts_next USING fts5(title, body, content='file_text', content_rowid='id')",
+    """
+    CREATE TRIGGER file_text_next_ai AFTER INSERT ON file_text_next BEGIN
+        INSERT INTO file_fts_next(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_next_ad AFTER DELETE ON file_text_next BEGIN
+        INSERT INTO file_fts_next(file_fts_next, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_next_au AFTER UPDATE OF title, body ON file_text_next BEGIN
+        INSERT INTO file_fts_next(file_fts_next, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO file_fts_next(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_mirror_ai AFTER INSERT ON file_text BEGIN
+        INSERT INTO file_text_next(file_id, title, body) VALUES (new.file_id, new.title, new.body)
+        ON CONFLICT(file_id) DO UPDATE SET title = excluded.title, body = excluded.body;
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_mirror_au AFTER UPDATE OF title, body ON file_text BEGIN
+        INSERT INTO file_text_next(file_id, title, body) VALUES (new.file_id, new.title, new.body)
+        ON CONFLICT(file_id) DO UPDATE SET title = excluded.title, body = excluded.body;
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_mirror_ad AFTER DELETE ON file_text BEGIN
+        DELETE FROM file_text_next WHERE file_id = old.file_id;
+    END
+    """,
+]
+SHADOW_TRIGGERS = (
+    "file_text_mirror_ai", "file_text_mirror_au", "file_text_mirror_ad",
+    "file_text_next_ai", "file_text_next_ad", "file_text_next_au",
+)
+LIVE_TRIGGERS = ("file_text_ai", "file_text_ad", "file_text_au", "files_ad")
+LIVE_TRIGGER_DDL = [
+    """
+    CREATE TRIGGER file_text_ai AFTER INSERT ON file_text BEGIN
+        INSERT INTO file_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_ad AFTER DELETE ON file_text BEGIN
+        INSERT INTO file_fts(file_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER file_text_au AFTER UPDATE OF title, body ON file_text BEGIN
+        INSERT INTO file_fts(file_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO file_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER files_ad AFTER DELETE ON files BEGIN
+        DELETE FROM file_text WHERE file_id = old.id;
+    END
+    """,
+]
+
+UPSERT = text("""
+    INSERT INTO file_text_next(file_id, title, body) VALUES (:file_id, :title, :body)
+    ON CONFLICT(file_id) DO UPDATE SET title = excluded.title, body = excluded.body
+""")
+
+
+class ReindexBusy(RuntimeError):
+    """Another re-index holds the ``reindex`` lease."""
+
+
+@dataclass
+class ReindexReport:
+    files_scanned: int = 0
+    indexed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    batches: int = 0
+    cursor: str | None = None
+    completed: bool = False
+    error: str | None = None
+
+
+current: ReindexReport | None = None
+_job: asyncio.Task | None = None
+
+
+async def _drop_shadow() -> None:
+    async with SessionLocal() as db:
+        for name in SHADOW_TRIGGERS:
+            await db.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        await db.execute(text("DROP TABLE IF EXISTS file_fts_next"))
+        await db.execute(text("DROP TABLE IF EXISTS file_text_next"))
+        await db.commit()
+
+
+async def _shadow_exists() -> bool:
+    async with SessionLocal() as db:
+        res = await db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_text_next'"))
+        return res.first() is not None
+
+
+async def _create_shadow() -> None:
+    await _drop_shadow()
+    async with SessionLocal() as db:
+        for ddl in SHADOW_DDL:
+            await db.execute(text(ddl))
+        await db.commit()
+
+
+async def _swap() -> None:
+    """Replace file_text/file_fts with the shadow in one transaction; readers never see a gap."""
+    async with SessionLocal() as db:
+        # The first DML opens the transaction; sqlite3 keeps the DDL after it inside.
+        await db.execute(text("DELETE FROM file_text_next WHERE file_id NOT IN (SELECT id FROM files)"))
+        for name in SHADOW_TRIGGERS + LIVE_TRIGGERS:
+            await db.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        await db.execute(text("ALTER TABLE file_text RENAME TO file_text_old"))
+        await db.execute(text("ALTER TABLE file_fts RENAME TO file_fts_old"))
+        await db.execute(text("ALTER TABLE file_text_next RENAME TO file_text"))
+        await db.execute(text("ALTER TABLE file_fts_next RENAME TO file_fts"))
+        await db.execute(text("DROP TABLE file_fts_old"))
+        await db.execute(text("DROP TABLE file_text_old"))
+        for ddl in LIVE_TRIGGER_DDL:
+            await db.execute(text(ddl))
+        await db.commit()
+    page_cache.clear()
+
+
+async def _extract_batch(files: list[File], report: ReindexReport) -> list[tuple[File, str, Extracted]]:
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(file: File):
+        async with sem:
+            try:
+                kind, outcome, doc = await extract_file(file)
+            except Exception as e:
+                logger.warning("reindex failed file=%s: %s", file.id, e)
+                report.failed += 1
+                report_reindex("failed")
+                return None
+        report_reindex(outcome)
+        if doc is None:
+            report.skipped += 1
+            return None
+        report.indexed += 1
+        return file, kind, doc
+
+    results = await asyncio.gather(*(one(f) for f in files))
+    return [r for r in results if r is not None]
+
+
+async def _write_batch(extracted: list[tuple[File, str, Extracted]]) -> None:
+    """Store one batch in the shadow index (and refresh /pages entries) in a single transaction."""
+    if not extracted:
+        return
+    async with SessionLocal() as db:
+        ids = [f.id for f, _, _ in extracted]
+        live = set((await db.execute(select(File.id).where(File.id.in_(ids)))).scalars().all())
+        for file, kind, doc in extracted:
+            if file.id not in live:
+                continue  # deleted while it was being extracted
+            await db.execute(UPSERT, {"file_id": file.id, "title": doc.title, "body": doc.text})
+            if kind == "html":
+                await store_web_page(db, file, doc.title, doc.safe_html)
+        await db.commit()
+
+
+async def reindex_pass(restart: bool = False, max_batches: int | None = None) -> ReindexReport:
+    """
+    Rebuild the file index from storage into a shadow table, then swap it in.
+
+    Files are walked in ``id`` order, BATCH_SIZE at a time, with up to CONCURRENCY
+    extractions in flight; each batch is written in one transaction and the last id
+    checkpointed, so an interrupted pass resumes after it. Search keeps reading the
+    live index throughout. ``restart`` discards a partial rebuild.
+    """
+    global current
+    report = current = ReindexReport()
+    cursor = None if restart else await load_checkpoint(CHECKPOINT_NAME)
+    if cursor is None or not await _shadow_exists():
+        await _create_shadow()
+        cursor = ""
+        await save_checkpoint(CHECKPOINT_NAME, cursor)
+    elif cursor:
+        logger.info("reindex resuming after %s", cursor)
+
+    while True:
+        async with SessionLocal() as db:
+            res = await db.execute(select(File).where(File.id > cursor).order_by(File.id).limit(BATCH_SIZE))
+            files = list(res.scalars().all())
+
+        if not files:
+            await _swap()
+            await save_checkpoint(CHECKPOINT_NAME, None)
+            report.completed = True
+            break
+
+        await _write_batch(await _extract_batch(files, report))
+        cursor = report.cursor = files[-1].id
+        await save_checkpoint(CHECKPOINT_NAME, cursor)
+        report.files_scanned += len(files)
+        report.batches += 1
+        if max_batches is not None and report.batches >= max_batches:
+            break
+        await asyncio.sleep(BATCH_PAUSE)
+
+    logger.info("reindex_summary scanned=%s indexed=%s skipped=%s failed=%s completed=%s",
+                report.files_scanned, report.indexed, report.skipped, report.failed, report.completed)
+    return report
+
+
+async def _holding_lease(job: Awaitable[ReindexReport]) -> ReindexReport:
+    """Run ``job`` (lease already acquired), renewing the lease and cancelling the job if it is lost."""
+    task = asyncio.ensure_future(job)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=reindex_lease.renew_secs)
+            if done:
+                return task.result()
+            if not await reindex_lease.try_acquire():
+                task.cancel()
+                raise ReindexBusy("Lost the reindex lease")
+    finally:
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        await reindex_lease.release()
+
+
+async def run_reindex(restart: bool = False, max_batches: int | None = None) -> ReindexReport:
+    """Run a pass to completion; only one process may rebuild at a time."""
+    if not await reindex_lease.try_acquire():
+        raise ReindexBusy("A re-index is already running")
+    return await _holding_lease(reindex_pass(restart, max_batches))
+
+
+async def start_reindex(restart: bool = False) -> None:
+    """Start a pass in the background of this process (admin endpoint)."""
+    global _job
+    if _job is not None and not _job.done():
+        raise ReindexBusy("A re-index is already running")
+    if not await reindex_lease.try_acquire():
+        raise ReindexBusy("A re-index is already running")
+    _job = asyncio.create_task(_holding_lease(reindex_pass(restart)))
+    _job.add_done_callback(_job_done)
+
+
+def _job_done(task: asyncio.Task) -> None:
+    """Nobody awaits the background pass: log its failure and show it in the progress report."""
+    if task.cancelled() or task.exception() is None:
+        return
+    exc = task.exception()
+    logger.error("reindex failed", exc_info=exc)
+    if current is not None:
+        current.error = f"{type(exc).__name__}: {exc}"
+
+
+def reindex_running() -> bool:
+    return _job is not None and not _job.done()
+
+
+async def stop_reindex() -> None:
+    """Cancel a background pass; it resumes from its checkpoint next time."""
+    if _job is not None and not _job.done():
+        _job.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await _job
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
+from starlette.concurrency import run_in_threadpool
 
 
 async def send_email(to_email: str, subject: str, body: str):
@@ -19,7 +20,7 @@ async def send_email(to_email: str, subject: str, body: str):
         )
         
         sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
-        response = sg.send(message)
+        response = await run_in_threadpool(sg.send, message)
         
         if response.status_code == 202:
             return True
@@ -0,0 +1,70 @@
+"""
+Response bodies compressed once and served many times.
+
+A ``Precompressed`` holds the identity bytes, a strong ETag and gzip (plus brotli,
+when the optional ``brotli`` package is installed) variants; serving it is a header
+lookup and ``Accept-Encoding`` negotiation, with ``If-None-Match`` answered by a 304.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.codecs import accepts_encoding
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+MIN_COMPRESS = 512
+
+
+@dataclass(frozen=True)
+class Precompressed:
+    etag: str  # quoted, for the identity body
+    variants: dict[str, bytes]  # content-coding -> body
+
+    @property
+    def size(self) -> int:
+        return sum(len(b) for b in self.variants.values())
+
+    def etag_for(self, coding: str) -> str:
+        return self.etag if coding == "identity" else f'{self.etag[:-1]}-{coding}"'
+
+    def not_modified(self, if_none_match: str | None) -> bool:
+        """Whether ``If-None-Match`` names any representation of this body."""
+        if not if_none_match:
+            return False
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or any(self.etag_for(c) in tags for c in self.variants)
+
+    def negotiate(self, accept_encoding: str | None) -> tuple[str, bytes]:
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepts_encoding(accept_encoding, coding):
+                return coding, self.variants[coding]
+        return "identity", self.variants["identity"]
+
+    def response(self, request: Request, media_type: str, headers: dict[str, str] | None = None) -> Response:
+        headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+        coding, body = self.negotiate(request.headers.get("accept-encoding"))
+        headers["ETag"] = self.etag_for(coding)
+        if self.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(body, media_type=media_type, headers=headers)
+
+
+def precompress(body: bytes, compress: bool = True, gzip_level: int = 9, brotli_quality: int = 9) -> Precompressed:
+    """Hash ``body`` for its ETag and compress it; CPU-bound, large bodies belong in a thread."""
+    variants = {"identity": body}
+    if compress and len(body) >= MIN_COMPRESS:
+        variants["gzip"] = gzip.compress(body, gzip_level, mtime=0)
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=brotli_quality)
+    return Precompressed(f'"{hashlib.sha256(body).hexdigest()[:32]}"', variants)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+
+import anyio
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the open file to the server when it supports the ASGI
+    ``http.response.zerocopysend`` extension, so the body goes out via
+    ``os.sendfile`` without passing through Python; otherwise it falls back to
+    FileResponse's chunked reads.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if ZEROCOPY_EXTENSION not in scope.get("extensions", {}) or self.send_header_only:
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as fh:  # noqa: PTH123 - the server needs a real file object
+            await send({"type": ZEROCOPY_EXTENSION, "file": fh, "more_body": False})
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,54 @@
+"""
+Static CSS/JS for the server-rendered pages.
+
+Files in ``app/web/static`` are read and precompressed once at import and served
+from ``/static/<name>.<hash>.<ext>``. The content hash is part of the URL, so
+responses carry ``Cache-Control: immutable`` and browsers fetch each version once.
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from app.utils.precompressed import Precompressed, precompress
+
+STATIC_DIR = Path(__file__).parent / "static"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+router = APIRouter(tags=["UI"], include_in_schema=False)
+
+_assets: dict[str, tuple[str, Precompressed]] = {}  # versioned name -> (media type, body)
+_urls: dict[str, str] = {}  # file name -> versioned URL
+
+
+def _register(path: Path) -> None:
+    data = path.read_bytes()
+    versioned = f"{path.stem}.{hashlib.sha256(data).hexdigest()[:12]}{path.suffix}"
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type == "application/javascript":
+        media_type += "; charset=utf-8"  # starlette adds it to text/* itself
+    _assets[versioned] = (media_type, precompress(data, gzip_level=9, brotli_quality=11))
+    _urls[path.name] = f"/static/{versioned}"
+
+
+def asset_url(name: str) -> str:
+    """Versioned URL of a static file, e.g. ``/static/ui.3f2a9c1d0b7e.css``."""
+    return _urls[name]
+
+
+@router.get("/static/{name}")
+async def static_asset(name: str, request: Request) -> Response:
+    asset = _assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    media_type, body = asset
+    return body.response(request, media_type, {"Cache-Control": CACHE_CONTROL})
+
+
+for _path in sorted(STATIC_DIR.iterdir()):
+    if _path.is_file():
+        _register(_path)
@@ -0,0 +1,17 @@
+// Auto-trigger the browser's download using the anchor
+const a = document.getElementById('dl');
+setTimeout(() => a.click(), 250);
+
+// Copy link
+document.getElementById('copy').addEventListener('click', async () => {
+  const url = document.getElementById('hidden').value;
+  try {
+    await navigator.clipboard.writeText(url);
+    document.getElementById('status').textContent = 'Link copied to clipboard.';
+  } catch (e) {
+    // Fallback: show the input so the user can copy manually
+    document.getElementById('hidden').classList.remove('hidden');
+    document.getElementById('hidden').select();
+    document.getElementById('status').textContent = 'Press Ctrl+C to copy the link below.';
+  }
+});
@@ -0,0 +1,91 @@
+const api = {
+  listFiles: () => fetch('/files', { headers: authHeaders() }),
+  createShare: (fileId) => fetch(`/share-links/create?file_id=${encodeURIComponent(fileId)}`, {
+      method: 'POST', headers: authHeaders()
+  }),
+};
+
+function authHeaders() {
+  const t = localStorage.getItem('secureshare_token');
+  return t ? { 'Authorization': 'Bearer ' + t } : {};
+}
+
+function saveToken() {
+  const t = document.getElementById('token').value.trim();
+  if (!t) return;
+  localStorage.setItem('secureshare_token', t);
+  document.getElementById('status').textContent = 'Token saved to this browser (localStorage).';
+  loadFiles();
+}
+function clearToken() {
+  localStorage.removeItem('secureshare_token');
+  document.getElementById('status').textContent = 'Token cleared.';
+  document.getElementById('list').innerHTML = '';
+}
+
+function fmtBytes(n) {
+  if (!n && n !== 0) return '—';
+  const units = ['B','KB','MB','GB','TB'];
+  let p = n === 0 ? 0 : Math.min(Math.floor(Math.log(n)/Math.log(1024)), units.length-1);
+  return (n/Math.pow(1024,p)).toFixed(2) + ' ' + units[p];
+}
+
+async function loadFiles() {
+  const resp = await api.listFiles();
+  if (!resp.ok) {
+    document.getElementById('status').textContent = 'Failed to load files: ' + resp.status + ' ' + (await resp.text());
+    return;
+  }
+
+  const files = await resp.json();
+  document.getElementById('status').textContent = files.length + ' file(s)';
+  const rows = files.map(f => `
+    <tr>
+      <td class="mono small">${f.id}</td>
+      <td><div>${f.filename || '—'}</div>
+          <div class="muted small">${f.content_type || ''}</div></td>
+      <td>${fmtBytes(f.size)}</td>
+      <td class="small">${f.expires_at || ''}</td>
+      <td>
+        <button onclick="share('${f.id}')">Get share link</button>
+        <div id="share-${f.id}" class="small muted" style="margin-top:6px;"></div>
+      </td>
+    </tr>`).join('');
+
+  document.getElementById('list').innerHTML = `
+    <table>
+      <thead><tr><th>ID</th><th>Name</th><th>Size</th><th>Expires</th><th>Actions</th></tr></thead>
+      <tbody>${rows}</tbody>
+    </table>`;
+}
+
+async function share(fileId) {
+  const box = document.getElementById('share-'+fileId);
+  box.textContent = 'Creating…';
+  const resp = await api.createShare(fileId);
+  if (!resp.ok) {
+    box.textContent = 'Error: ' + resp.status + ' ' + (await resp.text());
+    return;
+  }
+  const data = await resp.json();
+  const url = data.share_url;
+  box.innerHTML = `
+    <div>URL: <a class="mono" href="${url}" target="_blank" rel="noopener">${url}</a></div>
+    <div class="row" style="margin-top:6px;">
+      <button class="secondary" onclick="copy('${url}')">Copy</button>
+      <a class="btn" href="${url}">Open</a>
+    </div>
+  `;
+}
+
+async function copy(text) {
+  try { await navigator.clipboard.writeText(text); }
+  catch (e) {
+    const ta = document.createElement('textarea');
+    ta.value = text;
+    document.body.appendChild(ta);
+    ta.select();
+    document.execCommand('copy');
+    document.body.removeChild(ta);
+  }
+}
@@ -0,0 +1,48 @@
+"""
+Precompiled HTML templates for the server-rendered pages.
+
+Templates live in ``app/web/templates`` and use ``{{ name }}`` slots plus
+``{{ asset:file.css }}`` for the versioned URL of a static asset. Each is split into
+its static chunks once at import, with asset URLs already filled in, so rendering a
+page only escapes and joins the dynamic values. Values are HTML-escaped unless they
+are ``Markup``.
+"""
+from __future__ import annotations
+
+import html
+import re
+from pathlib import Path
+
+from app.web.assets import asset_url
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+_SLOT = re.compile(r"\{\{\s*([\w:.-]+)\s*\}\}")
+
+
+class Markup(str):
+    """Trusted HTML, inserted into a template as is."""
+
+
+class Template:
+    def __init__(self, source: str) -> None:
+        parts = _SLOT.split(source)
+        self.chunks: list[str] = [parts[0]]
+        self.slots: list[str] = []
+        for name, text in zip(parts[1::2], parts[2::2], strict=True):
+            if name.startswith("asset:"):
+                self.chunks[-1] += asset_url(name.removeprefix("asset:")) + text
+            else:
+                self.slots.append(name)
+                self.chunks.append(text)
+
+    def render(self, **values) -> str:
+        out = [self.chunks[0]]
+        for name, chunk in zip(self.slots, self.chunks[1:], strict=True):
+            value = values[name]
+            out.append(value if isinstance(value, Markup) else html.escape(str(value), quote=True))
+            out.append(chunk)
+        return "".join(out)
+
+
+def load(name: str) -> Template:
+    return Template((TEMPLATE_DIR / name).read_text(encoding="utf-8"))
@@ -1,7 +1,7 @@
 import './App.css';
 import './styles/theme.css';
 import api, { setOnUnauthorized } from './lib/api';
-import { ensureShareLink } from './lib/sharing';
+import { ensureShareLink, extendFilesExpiry } from './lib/sharing';
 import CopyButton from './components/CopyButton.jsx';
 import SecuritySettings from './SecuritySettings';
 import React, { useState, useEffect } from 'react';
@@ -213,6 +213,12 @@ const ResetPasswordForm = ({
 );
 
 
+// Files on the current page expiring within this window get the "Extend expiring" action.
+const EXPIRING_SOON_MS = 48 * 60 * 60 * 1000;
+
+// The API returns naive UTC timestamps; without a suffix Date.parse would read them as local time.
+const parseUtc = (s) => Date.parse(/(Z|[+-]\d\d:\d\d)$/i.test(s) ? s : `${s}Z`);
+
 const FileList = ({ files, shareLinks, onCreateShareLink, shareSettings, onDeleteFile, deletingId }) => (
   <div className="file-list">
     <h2>Your Files</h2>
@@ -303,6 +309,7 @@ function App() {
   const [reuseExisting, setReuseExisting] = useState(true);
   const [uploading, setUploading] = useState(false);
   const [deletingId, setDeletingId] = useState(null);
+  const [extending, setExtending] = useState(false);
 
   const [fileType, setFileType] = useState('');
   const [startDate, setStartDate] = useState('');
@@ -501,6 +508,25 @@ function App() {
     }
   };
 
+  const expiringIds = files
+    .filter((f) => f.expires_at && parseUtc(f.expires_at) <= Date.now() + EXPIRING_SOON_MS)
+    .map((f) => f.id);
+
+  const extendExpiring = async () => {
+    if (expiringIds.length === 0) return;
+    setExtending(true);
+    try {
+      const results = await extendFilesExpiry(expiringIds, { expireDays, includeLinks: true });
+      await fetchFiles();
+      const failed = results.filter((r) => r.status === 'storage_error').length;
+      if (failed > 0) alert(`${failed} file(s) could not be extended, please try again`);
+    } catch (e) {
+      alert('Extend failed: ' + (e.response?.data?.detail || e.message));
+    } finally {
+      setExtending(false);
+    }
+  };
+
   const uploadFile = async () => {
     if (!selectedFiles || selectedFiles.length === 0) return;
     setUploading(true);
@@ -864,6 +890,14 @@ function App() {
                 <button onClick={uploadFile} disabled={uploading} className="btn-primary">
                   Upload selected
                 </button>
+                <button
+                  onClick={extendExpiring}
+                  disabled={extending || expiringIds.length === 0}
+                  className="btn-secondary"
+                  title={`Extend files expiring within 48 hours, and their links, by ${expireDays} days`}
+                >
+                  {extending ? 'Extending...' : `Extend expiring (${expiringIds.length})`}
+                </button>
               </div>
 
               <FileList
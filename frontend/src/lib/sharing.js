@@ -29,3 +29,17 @@ export async function ensureShareLink(fileId, { expireDays, maxViews, reuseExist
 
   throw new Error('Share API: unexpected response shape');
 }
+
+export async function extendFilesExpiry(fileIds, { expireDays = 7, includeLinks = true } = {}) {
+  const { data } = await api.post('/files/bulk/extend', {
+    file_ids: fileIds,
+    expire_days: expireDays,
+    include_links: includeLinks,
+  });
+  return data.results;
+}
+
+export async function deleteFiles(fileIds) {
+  const { data } = await api.post('/files/bulk/delete', { file_ids: fileIds });
+  return data;
+}